@@ -37,9 +37,11 @@ CREATE TABLE IF NOT EXISTS promotions (
     segment VARCHAR(255),            -- Сегмент
     link VARCHAR(500),               -- Ссылка
     responsible_id INT,              -- Внешний ключ на users(id)
+    insert_key CHAR(32),             -- Ключ корреляции пакетной вставки (по нему читаются id созданных строк)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    FOREIGN KEY (responsible_id) REFERENCES users(id) ON DELETE SET NULL
+    FOREIGN KEY (responsible_id) REFERENCES users(id) ON DELETE SET NULL,
+    INDEX idx_promotions_insert_key (insert_key)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- Таблица informing (информирование)
@@ -48,14 +50,19 @@ CREATE TABLE IF NOT EXISTS informing (
     informing_type VARCHAR(100) NOT NULL,  -- Тип информирования
     project VARCHAR(100),
     start_date DATETIME,                   -- Дата старта
+    start_date_utc DATETIME,               -- Дата старта, нормализованная к UTC (заполняется приложением)
     title VARCHAR(255) NOT NULL,
     comment TEXT,
     segment VARCHAR(255),
     promo_id INT,                          -- Внешний ключ на promotions(id)
     link VARCHAR(500),
+    insert_key CHAR(32),                   -- Ключ корреляции пакетной вставки
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    FOREIGN KEY (promo_id) REFERENCES promotions(id) ON DELETE CASCADE
+    FOREIGN KEY (promo_id) REFERENCES promotions(id) ON DELETE CASCADE,
+    INDEX idx_informing_promo_start (promo_id, start_date),  -- каналы промо и свободные каналы (promo_id IS NULL) по дате
+    INDEX idx_informing_start_utc (start_date_utc, promo_id),
+    INDEX idx_informing_insert_key (insert_key)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- Таблица promotion_occurrences (рекуррентные события)
@@ -65,10 +72,42 @@ CREATE TABLE IF NOT EXISTS promotion_occurrences (
     occurrence_start DATETIME NOT NULL,    -- Дата начала конкретного вхождения
     occurrence_end DATETIME NOT NULL,      -- Дата окончания конкретного вхождения
     occurrence_key VARCHAR(255) UNIQUE,    -- Уникальный ключ вхождения (например, promo_id#YYYYMMDDHHMMSS)
+    insert_key CHAR(32),                   -- Ключ корреляции пакетной вставки
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (promo_id) REFERENCES promotions(id) ON DELETE CASCADE,
     INDEX idx_promo_id (promo_id),
     INDEX idx_occurrence_dates (occurrence_start, occurrence_end),
-    INDEX idx_occurrence_key (occurrence_key)
+    INDEX idx_occurrence_key (occurrence_key),
+    INDEX idx_occurrences_insert_key (insert_key)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Таблица notification_outbox (очередь email-уведомлений ответственным)
+-- Пишется в той же транзакции, что и промо-акция; отправляет фоновый воркер
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    recipient_id INT NOT NULL,                       -- Получатель, users(id)
+    promo_id INT,                                    -- Промо-акция, о которой уведомление
+    notification_type VARCHAR(50) NOT NULL,          -- assignment / update
+    payload TEXT NOT NULL,                           -- JSON с данными письма
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',   -- pending / sent / failed / skipped
+    attempts INT NOT NULL DEFAULT 0,
+    next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- UTC
+    last_error TEXT,
+    sent_at DATETIME,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_outbox_status_next (status, next_attempt_at),
+    INDEX idx_outbox_recipient_status (recipient_id, status)   -- Объединение уведомлений получателя в дайджест
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Таблица promo_deadlines (сроки задач промо-акций, рассчитанные по календарю праздников)
+-- Пишется в той же транзакции, что и промо-акция; пересчёт всех строк — POST /api/deadlines/rebuild
+CREATE TABLE IF NOT EXISTS promo_deadlines (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    promo_id INT NOT NULL,                 -- Внешний ключ на promotions(id)
+    kind VARCHAR(50) NOT NULL,             -- Вид срока (local_task, news_deadline, push_deadline, ...)
+    due_date DATE NOT NULL,                -- Дата срока
+    UNIQUE KEY uq_promo_deadlines_promo_kind (promo_id, kind),
+    INDEX idx_promo_deadlines_due (due_date, promo_id),  -- "Сроки на этой неделе" одним диапазонным запросом
+    FOREIGN KEY (promo_id) REFERENCES promotions(id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
\ No newline at end of file
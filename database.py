@@ -1,12 +1,22 @@
 import mysql.connector
 from mysql.connector import pooling
+from mysql.connector.errors import InterfaceError, PoolError
 import os
-from datetime import datetime, date
-from typing import List, Optional, Dict, Any
+import time
+import json
+import uuid
+import queue
+import threading
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta
+from typing import List, Optional, Dict, Any, Iterable
 from contextlib import contextmanager
 import logging
 from dotenv import load_dotenv
 import calendar
+from utils.deadline_calc import deadline_dates
 
 # Загружаем переменные окружения
 load_dotenv()
@@ -15,6 +25,348 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Бизнес-таймзона, в которой фронтенд присылает даты информирования.
+# Можно переопределить через переменную окружения BUSINESS_TZ (по умолчанию +03:00)
+BUSINESS_TZ = os.getenv('BUSINESS_TZ', '+03:00')
+
+def _parse_tz_offset(offset: str) -> timedelta:
+    """Смещение вида "+03:00" / "-05:30" в timedelta"""
+    sign = -1 if offset.strip().startswith('-') else 1
+    hours, _, minutes = offset.strip().lstrip('+-').partition(':')
+    return sign * timedelta(hours=int(hours), minutes=int(minutes or 0))
+
+BUSINESS_TZ_OFFSET = _parse_tz_offset(BUSINESS_TZ)
+
+def to_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Перевести дату информирования из бизнес-таймзоны в UTC (для start_date_utc)"""
+    return value - BUSINESS_TZ_OFFSET if value else None
+
+def month_bounds(month: str):
+    """Границы месяца "YYYY-MM" в виде полуинтервала [первый день, первый день следующего)"""
+    year, month_num = month.split('-')
+    year, month_num = int(year), int(month_num)
+    
+    first_day = date(year, month_num, 1)
+    next_month_first_day = date(year + month_num // 12, month_num % 12 + 1, 1)
+    return first_day, next_month_first_day
+
+# Максимальное число id в одном WHERE promo_id IN (...) при догрузке информирований
+INFORMING_IN_CHUNK_SIZE = int(os.getenv('INFORMING_IN_CHUNK_SIZE', '1000'))
+
+# Окно (в секундах), в течение которого уведомления одному получателю копятся
+# в очереди и уходят одним письмом-дайджестом; 0 — отправлять сразу
+NOTIFICATION_COALESCE_SECONDS = int(os.getenv('NOTIFICATION_COALESCE_SECONDS', '60'))
+
+def _parse_date(date_str: str) -> Optional[datetime]:
+    """Парсинг даты из строки"""
+    if not date_str:
+        return None
+    
+    try:
+        date_str = date_str.strip()
+        
+        if 'T' in date_str:
+            # ISO формат
+            return datetime.fromisoformat(date_str.replace('Z', '+00:00')).replace(tzinfo=None)
+        elif ' ' in date_str:
+            # Формат с пробелом
+            return datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
+        else:
+            # Простой формат даты
+            return datetime.strptime(date_str, "%Y-%m-%d")
+    except Exception as e:
+        logger.warning(f"Не удалось распарсить дату '{date_str}': {e}")
+        return None
+
+# Колонки, которые заполняются при создании записей (порядок совпадает с *_values ниже)
+PROMOTION_INSERT_COLUMNS = (
+    'project', 'promo_type', 'promo_kind', 'start_date', 'end_date',
+    'title', 'comment', 'segment', 'link', 'responsible_id'
+)
+INFORMING_INSERT_COLUMNS = (
+    'informing_type', 'project', 'start_date', 'start_date_utc',
+    'title', 'comment', 'segment', 'promo_id', 'link'
+)
+OCCURRENCE_INSERT_COLUMNS = ('promo_id', 'occurrence_start', 'occurrence_end', 'occurrence_key')
+
+def _promotion_values(promo_data: Dict[str, Any]) -> tuple:
+    """Значения для INSERT INTO promotions из данных запроса"""
+    return (
+        promo_data.get('project'),
+        promo_data.get('promo_type'),
+        promo_data.get('promo_kind'),
+        _parse_date(promo_data.get('start_date')),
+        _parse_date(promo_data.get('end_date')),
+        promo_data.get('name'),  # В БД это title
+        promo_data.get('comment'),
+        promo_data.get('segments'),  # В БД это segment
+        promo_data.get('link'),
+        promo_data.get('responsible_id')
+    )
+
+def _informing_values(info_data: Dict[str, Any]) -> tuple:
+    """Значения для INSERT INTO informing из данных запроса"""
+    start_date = _parse_date(info_data.get('start_date'))
+    return (
+        info_data.get('type'),  # В БД это informing_type
+        info_data.get('project'),
+        start_date,
+        to_utc(start_date),
+        info_data.get('name'),  # В БД это title
+        info_data.get('comment'),
+        info_data.get('segments'),  # В БД это segment
+        info_data.get('promo_id'),
+        info_data.get('link')
+    )
+
+def _comparable_values(values: tuple) -> tuple:
+    """Значения строки для сравнения «изменилось ли»: NULL из БД и '' из запроса считаются одинаковыми"""
+    return tuple('' if value is None else value for value in values)
+
+def _occurrence_values(occ_data: Dict[str, Any]) -> tuple:
+    """Значения для INSERT INTO promotion_occurrences; ключ по умолчанию — promo_id#YYYYMMDDHHMMSS"""
+    occurrence_start = _parse_date(occ_data.get('occurrence_start'))
+    occurrence_key = occ_data.get('occurrence_key')
+    if not occurrence_key and occurrence_start:
+        occurrence_key = f"{occ_data.get('promo_id')}#{occurrence_start:%Y%m%d%H%M%S}"
+    return (
+        occ_data.get('promo_id'),
+        occurrence_start,
+        _parse_date(occ_data.get('occurrence_end')),
+        occurrence_key
+    )
+
+NOTIFICATION_OUTBOX_INSERT_COLUMNS = ('recipient_id', 'promo_id', 'notification_type', 'payload')
+
+def _outbox_values(promo_id: int, promo_data: Dict[str, Any], notification_type: str,
+                   changed_by: str = "Система") -> tuple:
+    """Значения для INSERT INTO notification_outbox: уведомление ответственному о промо-акции"""
+    payload = {
+        'promo_name': promo_data.get('name'),
+        'project': promo_data.get('project'),
+        'promo_type': promo_data.get('promo_type'),
+        'start_date': promo_data.get('start_date'),
+        'end_date': promo_data.get('end_date'),
+        'changed_by': changed_by
+    }
+    return (
+        promo_data.get('responsible_id'),
+        promo_id,
+        notification_type,
+        json.dumps(payload, ensure_ascii=False)
+    )
+
+def _insert_rows(cursor, table: str, columns: tuple, rows: List[tuple],
+                 key_column: str = 'insert_key') -> List[int]:
+    """
+    Вставить все строки одним INSERT ... VALUES (...), (...) и вернуть их id
+    в порядке rows.
+
+    id не вычисляются как lastrowid + N: при innodb_autoinc_lock_mode=2 и
+    параллельных вставках из нескольких воркеров диапазон может быть не
+    сплошным. Вместо этого у каждой строки есть уникальный ключ корреляции
+    key_column (по умолчанию insert_key — случайный uuid4, генерируется здесь;
+    если key_column уже среди columns, берётся из значений), и id читаются обратно одним SELECT id, key ... WHERE key IN (...).
+    """
+    if not rows:
+        return []
+    
+    if key_column in columns:
+        key_index = columns.index(key_column)
+        keys = [row[key_index] for row in rows]
+    else:
+        keys = [uuid.uuid4().hex for _ in rows]
+        columns = columns + (key_column,)
+        rows = [row + (key,) for row, key in zip(rows, keys)]
+    
+    row_placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    query = (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+        + ', '.join([row_placeholders] * len(rows))
+    )
+    cursor.execute(query, tuple(value for row in rows for value in row))
+    
+    id_by_key = {}
+    for chunk in _chunks(keys, INFORMING_IN_CHUNK_SIZE):
+        placeholders = ', '.join(['%s'] * len(chunk))
+        cursor.execute(
+            f"SELECT id, {key_column} FROM {table} WHERE {key_column} IN ({placeholders})",
+            tuple(chunk)
+        )
+        for row in cursor.fetchall():
+            if isinstance(row, dict):
+                id_by_key[row[key_column]] = row['id']
+            else:
+                id_by_key[row[1]] = row[0]
+    
+    return [id_by_key[key] for key in keys]
+
+def _enqueue_notifications(cursor, rows: List[tuple]) -> None:
+    """
+    Поставить уведомления в notification_outbox одним INSERT (в транзакции изменения промо-акции).
+
+    Уведомление становится готовым к отправке через NOTIFICATION_COALESCE_SECONDS:
+    всё, что за это время придёт тому же получателю, воркер заберёт вместе
+    с ним и отправит одним письмом (см. NotificationOutboxRepository.claim_batch).
+    """
+    if not rows:
+        return
+    
+    row_placeholders = (
+        '(' + ', '.join(['%s'] * len(NOTIFICATION_OUTBOX_INSERT_COLUMNS))
+        + ', UTC_TIMESTAMP() + INTERVAL %s SECOND)'
+    )
+    cursor.execute(
+        f"INSERT INTO notification_outbox ({', '.join(NOTIFICATION_OUTBOX_INSERT_COLUMNS)}, next_attempt_at) VALUES "
+        + ', '.join([row_placeholders] * len(rows)),
+        tuple(value for row in rows for value in row + (NOTIFICATION_COALESCE_SECONDS,))
+    )
+    logger.info(f"📨 В очередь уведомлений добавлено {len(rows)} писем")
+
+PROMO_DEADLINES_INSERT_COLUMNS = ('promo_id', 'kind', 'due_date')
+
+def _deadline_rows(promo_id: int, promo_data: Dict[str, Any]) -> List[tuple]:
+    """Строки promo_deadlines (promo_id, вид срока, дата) для промо-акции из данных запроса"""
+    start_date = _parse_date(promo_data.get('start_date'))
+    end_date = _parse_date(promo_data.get('end_date')) or start_date
+    if not start_date or not promo_data.get('project'):
+        return []
+    
+    try:
+        dates = deadline_dates(promo_data.get('project'), start_date, end_date)
+    except Exception as e:
+        # Сроки — производные данные: их отсутствие не должно мешать сохранить саму акцию
+        logger.warning(f"Не удалось рассчитать сроки для промо-акции {promo_id}: {e}")
+        return []
+    return [(promo_id, kind, due_date) for kind, due_date in dates.items()]
+
+def _write_deadlines(cursor, promo_ids: List[int], rows: List[tuple], replace: bool = False) -> None:
+    """
+    Записать рассчитанные сроки промо-акций в promo_deadlines (в транзакции изменения акции).
+
+    При replace=True прежние сроки этих акций удаляются: после смены дат или
+    проекта часть видов сроков может поменять дату, а строка на акцию и вид
+    срока всегда одна (UNIQUE promo_id, kind).
+    """
+    if replace:
+        for chunk in _chunks(promo_ids, INFORMING_IN_CHUNK_SIZE):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f"DELETE FROM promo_deadlines WHERE promo_id IN ({placeholders})", tuple(chunk))
+    
+    if not rows:
+        return
+    
+    row_placeholders = '(' + ', '.join(['%s'] * len(PROMO_DEADLINES_INSERT_COLUMNS)) + ')'
+    cursor.execute(
+        f"INSERT INTO promo_deadlines ({', '.join(PROMO_DEADLINES_INSERT_COLUMNS)}) VALUES "
+        + ', '.join([row_placeholders] * len(rows)),
+        tuple(value for row in rows for value in row)
+    )
+
+def _chunks(values: List[Any], size: int):
+    """Разбить список на пачки не длиннее size"""
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+def _promotion_from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Промо-акция сразу в формате ответа календаря из строки promotions"""
+    promo_start_date = row['start_date']
+    promo_end_date = row['end_date']
+    return {
+        'id': str(row['id']),  # Строкой для совместимости с id рекуррентных событий "occ_N"
+        'project': row['project'] or '',
+        'promo_type': row['promo_type'] or '',
+        'promo_kind': row['promo_kind'] or '',
+        'start_date': promo_start_date.isoformat() + "Z" if promo_start_date else '',
+        'end_date': promo_end_date.isoformat() + "Z" if promo_end_date else '',
+        'name': row['title'] or '',  # В БД это title
+        'comment': row['comment'] or '',
+        'segments': row['segment'] or '',  # В БД это segment
+        'link': row['link'] or '',
+        'info_channels': [],
+        'responsible_id': row['responsible_id'],
+        'responsible_name': None,  # Заполняется из справочника пользователей (_resolve_responsible_names)
+        'is_recurring': False  # Флаг для отличия от рекуррентных событий
+    }
+
+def _resolve_responsible_names(cursor, promotions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Проставить responsible_name из справочника пользователей вместо LEFT JOIN users"""
+    users = user_directory.get_many(
+        (promo['responsible_id'] for promo in promotions if promo['responsible_id']), cursor
+    )
+    for promo in promotions:
+        user = users.get(promo['responsible_id'])
+        promo['responsible_name'] = user['login'] if user else None
+    return promotions
+
+def _fetch_info_channels(cursor, promo_projects: Dict[int, str]) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Второй этап чтения календаря: информирования для уже отобранных промо-акций.
+
+    Вместо LEFT JOIN informing (который повторяет все поля промо-акции, включая
+    comment TEXT, в каждой строке канала) каналы читаются отдельным узким запросом
+    WHERE promo_id IN (...) по idx_informing_promo_start и соединяются с промо
+    по словарю. promo_projects — {promo_id: проект промо-акции}, проект нужен
+    для каналов без своего проекта.
+    """
+    channels_by_promo = {promo_id: [] for promo_id in promo_projects}
+    
+    for chunk in _chunks(list(promo_projects), INFORMING_IN_CHUNK_SIZE):
+        placeholders = ', '.join(['%s'] * len(chunk))
+        cursor.execute(f"""
+            SELECT id, promo_id, informing_type, project, start_date, title, comment, segment, link
+            FROM informing
+            WHERE promo_id IN ({placeholders})
+            ORDER BY start_date ASC
+        """, tuple(chunk))
+        
+        for row in cursor.fetchall():
+            promo_id = row['promo_id']
+            info_start_date = row['start_date']
+            channels_by_promo[promo_id].append({
+                'id': row['id'],
+                'type': row['informing_type'] or '',
+                'project': row['project'] or promo_projects[promo_id] or '',
+                'start_date': info_start_date.isoformat() + "Z" if info_start_date else '',
+                'name': row['title'] or '',
+                'comment': row['comment'] or '',
+                'segments': row['segment'] or '',
+                'promo_id': promo_id,
+                'link': row['link'] or ''
+            })
+    
+    return channels_by_promo
+
+def _fetch_promotions_by_ids(cursor, promo_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Промо-акции (с информированиями) по списку id — по одному разу на каждую акцию"""
+    promotions = []
+    for chunk in _chunks(list(promo_ids), INFORMING_IN_CHUNK_SIZE):
+        placeholders = ', '.join(['%s'] * len(chunk))
+        cursor.execute(f"""
+            SELECT 
+                p.id, p.project, p.promo_type, p.promo_kind, p.start_date, p.end_date,
+                p.title, p.comment, p.segment, p.link, p.responsible_id
+            FROM promotions p
+            WHERE p.id IN ({placeholders})
+        """, tuple(chunk))
+        promotions.extend(_promotion_from_row(row) for row in cursor.fetchall())
+    
+    _resolve_responsible_names(cursor, promotions)
+    _attach_info_channels(cursor, promotions)
+    return {int(promo['id']): promo for promo in promotions}
+
+def _attach_info_channels(cursor, promotions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Догрузить информирования к списку промо-акций (hash join по promo_id)"""
+    if not promotions:
+        return promotions
+    
+    channels_by_promo = _fetch_info_channels(
+        cursor, {int(promo['id']): promo['project'] for promo in promotions}
+    )
+    for promo in promotions:
+        promo['info_channels'] = channels_by_promo[int(promo['id'])]
+    return promotions
+
 class DatabaseConfig:
     """Конфигурация базы данных"""
     
@@ -25,6 +377,8 @@ class DatabaseConfig:
         self.password = os.getenv('MYSQL_PASSWORD', '789159987Cs')
         self.database = os.getenv('MYSQL_DATABASE', 'promo_db')
         self.port = int(os.getenv('MYSQL_PORT', '3306'))
+        # Проверять соединение ping'ом только если оно простаивало дольше (сек)
+        self.idle_check_seconds = float(os.getenv('MYSQL_IDLE_CHECK_SECONDS', '30'))
         
         # self.config = {
         #     'host': self.host,
@@ -48,7 +402,10 @@ class DatabaseConfig:
             'port': self.port,
             'pool_name': f'promo_pool_{os.getpid()}',  # уникально для процесса
             'pool_size': 5,                    # было 10 → 5 под 1 vCPU/1GB RAM
-            'pool_reset_session': True,
+            # reset_session при возврате в пул стоил COM_RESET_CONNECTION + повторную
+            # настройку сессии; сессию настраиваем один раз на физическое соединение
+            'pool_reset_session': False,
+            'time_zone': '+00:00',             # фиксируем сессию в UTC при (пере)подключении
             'connection_timeout': 5,           # быстрый fail при сетевых проблемах
             'consume_results': True,           # чтобы не зависали незабранные результаты
             'use_pure': True,                  # детерминированное поведение драйвера
@@ -80,6 +437,93 @@ class DatabaseConfig:
         """Получить конфигурацию для пула соединений"""
         return self.config
 
+class IdleCheckingConnectionPool(pooling.MySQLConnectionPool):
+    """
+    Пул соединений с проверкой здоровья только после простоя.
+
+    Стандартный MySQLConnectionPool выполняет ping (is_connected) при каждой
+    выдаче соединения. Здесь ping выполняется, только если соединение пролежало
+    в пуле дольше idle_check_seconds; настройка сессии (time_zone и т.п.)
+    выполняется драйвером один раз при подключении/переподключении.
+    Счётчики в stats показывают, сколько служебных обращений к серверу
+    пришлось на выдачи соединений.
+
+    get_connection повторяет выдачу из MySQLConnectionPool и опирается на его
+    внутренние атрибуты, поэтому мажорная версия драйвера закреплена в
+    requirements.txt. Если атрибутов в установленной версии нет, пул работает
+    как стандартный (ping при каждой выдаче) и пишет предупреждение.
+    """
+    
+    # Внутренние атрибуты MySQLConnectionPool, нужные для выдачи без ping
+    _DRIVER_INTERNALS = ('_cnx_queue', '_cnx_config', '_config_version', '_queue_connection')
+    
+    def __init__(self, idle_check_seconds: float = 30, **kwargs):
+        self.idle_check_seconds = idle_check_seconds
+        self.stats = {
+            'checkouts': 0,       # выдачи соединений из пула
+            'health_checks': 0,   # ping'и после простоя
+            'reconnects': 0,      # переподключения разорванных соединений
+            'session_inits': 0,   # настройки сессии (новые физические соединения)
+        }
+        super().__init__(**kwargs)
+        
+        self.idle_check_supported = all(hasattr(self, name) for name in self._DRIVER_INTERNALS)
+        if not self.idle_check_supported:
+            logger.warning(
+                "⚠️ Версия mysql-connector-python не поддерживает выдачу без ping — "
+                "соединения проверяются при каждой выдаче"
+            )
+    
+    def add_connection(self, cnx=None) -> None:
+        """Вернуть соединение в пул, запомнив время последнего использования"""
+        with pooling.CONNECTION_POOL_LOCK:
+            if cnx is None:
+                self.stats['session_inits'] += 1
+            else:
+                cnx.pool_last_used = time.monotonic()
+            super().add_connection(cnx)
+    
+    def _queue_connection(self, cnx) -> None:
+        """Положить соединение в очередь; новое соединение считается только что использованным"""
+        # Соединение только что создано и сессия настроена — пинговать его при первой выдаче незачем
+        if not hasattr(cnx, 'pool_last_used'):
+            cnx.pool_last_used = time.monotonic()
+        super()._queue_connection(cnx)
+    
+    def get_connection(self) -> pooling.PooledMySQLConnection:
+        """Выдать соединение; ping только если оно простаивало дольше порога"""
+        if not self.idle_check_supported:
+            with pooling.CONNECTION_POOL_LOCK:
+                self.stats['checkouts'] += 1
+                self.stats['health_checks'] += 1
+                return super().get_connection()
+        
+        with pooling.CONNECTION_POOL_LOCK:
+            try:
+                cnx = self._cnx_queue.get(block=False)
+            except queue.Empty as err:
+                raise PoolError("Failed getting connection; pool exhausted") from err
+            
+            self.stats['checkouts'] += 1
+            idle_seconds = time.monotonic() - cnx.pool_last_used
+            config_changed = self._config_version != cnx.pool_config_version
+            
+            if config_changed or idle_seconds > self.idle_check_seconds:
+                self.stats['health_checks'] += 1
+                if config_changed or not cnx.is_connected():
+                    cnx.config(**self._cnx_config)
+                    try:
+                        cnx.reconnect()
+                    except InterfaceError:
+                        # Не удалось переподключиться — возвращаем соединение в пул
+                        self._queue_connection(cnx)
+                        raise
+                    cnx.pool_config_version = self._config_version
+                    self.stats['reconnects'] += 1
+                    self.stats['session_inits'] += 1
+            
+            return pooling.PooledMySQLConnection(self, cnx)
+
 class DatabaseManager:
     """Менеджер для работы с базой данных"""
     
@@ -95,7 +539,9 @@ class DatabaseManager:
             logger.info(f"🔄 Попытка подключения к MySQL: {config['host']}:{config['port']}")
             logger.info(f"📋 Пользователь: {config['user']}, База данных: {config['database']}")
             
-            self.pool = pooling.MySQLConnectionPool(**config)
+            self.pool = IdleCheckingConnectionPool(
+                idle_check_seconds=self.config.idle_check_seconds, **config
+            )
             logger.info("✅ Пул соединений MySQL инициализирован")
         except Exception as e:
             logger.error(f"❌ Ошибка инициализации пула соединений: {e}")
@@ -124,23 +570,9 @@ class DatabaseManager:
         """Контекстный менеджер для получения соединения из пула"""
         connection = None
         try:
+            # Проверка здоровья и настройка сессии (UTC) выполняются пулом:
+            # ping — только после простоя, SET time_zone — один раз на соединение
             connection = self.pool.get_connection()
-
-            # здоровье соединения: если отвалилось — быстро переподключиться
-            try:
-                connection.ping(reconnect=True, attempts=1, delay=0)
-            except Exception:
-                connection.reconnect(attempts=1, delay=0)
-
-            # фиксируем сессию в UTC (п.5)
-            try:
-                cur_tz = connection.cursor()
-                cur_tz.execute("SET time_zone = '+00:00'")
-                cur_tz.close()
-            except Exception:
-                # не падаем из-за SET time_zone
-                pass
-
             yield connection
         except Exception:
             if connection and getattr(connection, "in_transaction", False):
@@ -150,6 +582,15 @@ class DatabaseManager:
             if connection:
                 connection.close()
 
+    def get_stats(self) -> Dict[str, Any]:
+        """Счётчики служебных обращений к MySQL при выдаче соединений"""
+        stats = dict(self.pool.stats)
+        overhead = stats['health_checks'] + stats['reconnects'] + stats['session_inits']
+        stats['overhead_round_trips_per_checkout'] = (
+            round(overhead / stats['checkouts'], 3) if stats['checkouts'] else 0.0
+        )
+        return stats
+    
     @contextmanager
     def get_cursor(self, dictionary=True):
         """Контекстный менеджер для получения курсора"""
@@ -159,6 +600,54 @@ class DatabaseManager:
                 yield cursor, connection
             finally:
                 cursor.close()
+    
+    @contextmanager
+    def transaction(self, dictionary=True):
+        """
+        Единица работы: все запросы внутри блока выполняются на одном соединении
+        в одной транзакции. COMMIT — при выходе из блока, ROLLBACK — при исключении
+        (выполняет get_connection), поэтому частично созданных записей не остаётся.
+        """
+        with self.get_connection() as connection:
+            connection.start_transaction()
+            cursor = connection.cursor(dictionary=dictionary)
+            try:
+                yield cursor, connection
+                connection.commit()
+            finally:
+                cursor.close()
+
+class AsyncRepository:
+    """
+    Асинхронная обёртка над синхронным репозиторием.
+
+    Каждый публичный метод репозитория становится awaitable и выполняется в
+    ограниченном пуле потоков, размер которого равен размеру пула соединений
+    MySQL. Так медленный запрос не блокирует event loop uvicorn, а число
+    одновременных обращений к БД никогда не превышает число соединений
+    (mysql-connector не ждёт свободное соединение, а сразу падает с PoolError).
+    """
+    
+    def __init__(self, repository, executor: ThreadPoolExecutor):
+        self._repository = repository
+        self._executor = executor
+        self._methods = {}
+    
+    def __getattr__(self, name):
+        attr = getattr(self._repository, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+        
+        method = self._methods.get(name)
+        if method is None:
+            @functools.wraps(attr)
+            async def method(*args, **kwargs):
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    self._executor, functools.partial(attr, *args, **kwargs)
+                )
+            self._methods[name] = method
+        return method
 
 class PromoRepository:
     """Репозиторий для работы с промо-акциями"""
@@ -192,90 +681,25 @@ class PromoRepository:
             raise
     
     def get_all_promotions_with_informing(self) -> List[Dict[str, Any]]:
-        """Получить все промо-акции с информированиями одним запросом (оптимизированная версия)"""
+        """Получить все промо-акции с информированиями (два узких запроса вместо N+1)"""
         try:
             with self.db.get_cursor() as (cursor, connection):
-                # Единый JOIN запрос вместо N+1 запросов
+                # Сначала промо-акции, затем их информирования одним запросом WHERE promo_id IN (...);
+                # логины ответственных — из справочника пользователей, без JOIN users
                 query = """
                     SELECT 
-                        p.id as promo_id,
-                        p.project,
-                        p.promo_type,
-                        p.promo_kind,
-                        p.start_date as promo_start_date,
-                        p.end_date as promo_end_date,
-                        p.title as promo_title,
-                        p.comment as promo_comment,
-                        p.segment as promo_segment,
-                        p.link as promo_link,
-                        p.responsible_id,
-                        u.login as responsible_name,
-                        i.id as info_id,
-                        i.informing_type,
-                        i.project as info_project,
-                        i.start_date as info_start_date,
-                        i.title as info_title,
-                        i.comment as info_comment,
-                        i.segment as info_segment,
-                        i.link as info_link
+                        p.id, p.project, p.promo_type, p.promo_kind, p.start_date, p.end_date,
+                        p.title, p.comment, p.segment, p.link, p.responsible_id
                     FROM promotions p
-                    LEFT JOIN users u ON p.responsible_id = u.id
-                    LEFT JOIN informing i ON p.id = i.promo_id
-                    ORDER BY p.start_date DESC, i.start_date ASC
+                    ORDER BY p.start_date DESC
                 """
                 
                 cursor.execute(query)
-                rows = cursor.fetchall()
-                
-                # Группируем результаты по промо-акциям
-                promotions_map = {}
-                
-                for row in rows:
-                    promo_id = row['promo_id']
-                    
-                    # Создаем промо-акцию если её ещё нет
-                    if promo_id not in promotions_map:
-                        promo_start_date = row['promo_start_date']
-                        promo_end_date = row['promo_end_date']
-                        
-                        promotions_map[promo_id] = {
-                            'id': promo_id,
-                            'project': row['project'] or '',
-                            'promo_type': row['promo_type'] or '',
-                            'promo_kind': row['promo_kind'] or '',
-                            'start_date': promo_start_date.isoformat() + "Z" if promo_start_date else '',
-                            'end_date': promo_end_date.isoformat() + "Z" if promo_end_date else '',
-                            'title': row['promo_title'] or '',
-                            'comment': row['promo_comment'] or '',
-                            'segment': row['promo_segment'] or '',
-                            'link': row['promo_link'] or '',
-                            'responsible_id': row['responsible_id'],
-                            'responsible_name': row['responsible_name'],
-                            'info_channels': []
-                        }
-                    
-                    # Добавляем информирование если оно есть
-                    if row['info_id']:
-                        info_start_date = row['info_start_date']
-                        
-                        info_channel = {
-                            'id': row['info_id'],
-                            'type': row['informing_type'] or '',
-                            'project': row['info_project'] or row['project'] or '',
-                            'start_date': info_start_date.isoformat() + "Z" if info_start_date else '',
-                            'name': row['info_title'] or '',
-                            'comment': row['info_comment'] or '',
-                            'segments': row['info_segment'] or '',
-                            'promo_id': promo_id,
-                            'link': row['info_link'] or ''
-                        }
-                        
-                        promotions_map[promo_id]['info_channels'].append(info_channel)
-                
-                # Возвращаем список промо-акций
-                promotions_list = list(promotions_map.values())
+                promotions_list = [_promotion_from_row(row) for row in cursor.fetchall()]
+                _resolve_responsible_names(cursor, promotions_list)
+                _attach_info_channels(cursor, promotions_list)
                 
-                logger.info(f"✅ Загружено {len(promotions_list)} промо-акций с информированиями одним запросом")
+                logger.info(f"✅ Загружено {len(promotions_list)} промо-акций с информированиями")
                 return promotions_list
                 
         except Exception as e:
@@ -284,128 +708,58 @@ class PromoRepository:
 
     def get_promotions_by_month(self, month: str) -> List[Dict[str, Any]]:
         """Получить промо-акции за конкретный месяц с информированиями"""
+        # Полуинтервал месяца "YYYY-MM": [первый день, первый день следующего месяца)
+        return self.get_promotions_by_range(*month_bounds(month))
+    
+    def get_promotions_by_range(self, first_day: date, next_month_first_day: date) -> List[Dict[str, Any]]:
+        """Получить промо-акции, попадающие в полуинтервал дат [first_day, next_month_first_day), с информированиями"""
         try:
-            # Парсим месяц в формате "YYYY-MM"
-            year, month_num = month.split('-')
-            year, month_num = int(year), int(month_num)
-            
-            # Вычисляем первый и последний день месяца
-            first_day = date(year, month_num, 1)
-            last_day = date(year, month_num, calendar.monthrange(year, month_num)[1])
-            
-            # Бизнес-таймзона для нормализации дат информирования → UTC
-            # Можно переопределить через переменную окружения BUSINESS_TZ (по умолчанию +03:00)
-            import os as _os
-            business_tz = _os.getenv('BUSINESS_TZ', '+03:00')
-            
             with self.db.get_cursor() as (cursor, connection):
-                # Запрос для получения промо-акций, которые пересекаются с указанным месяцем
+                # Промо-акции периода отбираются UNION'ом диапазонных выборок по индексам
+                # (idx_promotions_start_date, idx_promotions_end_date, idx_informing_start_utc)
+                # вместо OR по всему результату LEFT JOIN
                 query = """
                     SELECT 
-                        p.id as promo_id,
-                        p.project,
-                        p.promo_type,
-                        p.promo_kind,
-                        p.start_date as promo_start_date,
-                        p.end_date as promo_end_date,
-                        p.title as promo_title,
-                        p.comment as promo_comment,
-                        p.segment as promo_segment,
-                        p.link as promo_link,
-                        p.responsible_id,
-                        u.login as responsible_name,
-                        i.id as info_id,
-                        i.informing_type,
-                        i.project as info_project,
-                        i.start_date as info_start_date,
-                        i.title as info_title,
-                        i.comment as info_comment,
-                        i.segment as info_segment,
-                        i.link as info_link
-                    FROM promotions p
-                    LEFT JOIN users u ON p.responsible_id = u.id
-                    LEFT JOIN informing i ON p.id = i.promo_id
-                    WHERE (
+                        p.id, p.project, p.promo_type, p.promo_kind, p.start_date, p.end_date,
+                        p.title, p.comment, p.segment, p.link, p.responsible_id
+                    FROM (
                         -- Промо-акция начинается в указанном месяце
-                        (p.start_date >= %s AND p.start_date <= %s)
-                        OR 
+                        SELECT id AS promo_id FROM promotions
+                        WHERE start_date >= %s AND start_date < %s
+                        UNION
                         -- Промо-акция заканчивается в указанном месяце
-                        (p.end_date >= %s AND p.end_date <= %s)
-                        OR
+                        SELECT id FROM promotions
+                        WHERE end_date >= %s AND end_date < %s
+                        UNION
                         -- Промо-акция пересекает указанный месяц (начинается до и заканчивается после)
-                        (p.start_date <= %s AND p.end_date >= %s)
-                        OR
-                        -- Есть информирование в указанном месяце (нормализуем к UTC через CONVERT_TZ)
-                        (
-                            i.start_date IS NOT NULL
-                            AND DATE(CONVERT_TZ(i.start_date, %s, '+00:00')) BETWEEN %s AND %s
-                        )
-                    )
-                    ORDER BY p.start_date DESC, i.start_date ASC
+                        SELECT id FROM promotions
+                        WHERE end_date >= %s AND start_date < %s
+                        UNION
+                        -- Есть информирование в указанном месяце (дата уже нормализована к UTC при записи)
+                        SELECT promo_id FROM informing
+                        WHERE start_date_utc >= %s AND start_date_utc < %s AND promo_id IS NOT NULL
+                    ) month_promos
+                    INNER JOIN promotions p ON p.id = month_promos.promo_id
+                    ORDER BY p.start_date DESC
                 """
                 
                 cursor.execute(query, (
-                    first_day, last_day,  # start_date в месяце
-                    first_day, last_day,  # end_date в месяце
-                    first_day, last_day,  # пересечение месяца
-                    business_tz,          # исходная TZ данных информирования
-                    first_day, last_day   # информирование в месяце
+                    first_day, next_month_first_day,   # start_date в месяце
+                    first_day, next_month_first_day,   # end_date в месяце
+                    next_month_first_day, first_day,   # пересечение месяца
+                    first_day, next_month_first_day    # информирование в месяце (UTC)
                 ))
-                rows = cursor.fetchall()
-                
-                # Группируем результаты по промо-акциям
-                promotions_map = {}
-                
-                for row in rows:
-                    promo_id = row['promo_id']
-                    
-                    # Создаем промо-акцию если её ещё нет
-                    if promo_id not in promotions_map:
-                        promo_start_date = row['promo_start_date']
-                        promo_end_date = row['promo_end_date']
-                        
-                        promotions_map[promo_id] = {
-                            'id': promo_id,
-                            'project': row['project'] or '',
-                            'promo_type': row['promo_type'] or '',
-                            'promo_kind': row['promo_kind'] or '',
-                            'start_date': promo_start_date.isoformat() + "Z" if promo_start_date else '',
-                            'end_date': promo_end_date.isoformat() + "Z" if promo_end_date else '',
-                            'title': row['promo_title'] or '',
-                            'comment': row['promo_comment'] or '',
-                            'segment': row['promo_segment'] or '',
-                            'link': row['promo_link'] or '',
-                            'responsible_id': row['responsible_id'],
-                            'responsible_name': row['responsible_name'],
-                            'info_channels': []
-                        }
-                    
-                    # Добавляем информирование если оно есть
-                    if row['info_id']:
-                        info_start_date = row['info_start_date']
-                        
-                        info_channel = {
-                            'id': row['info_id'],
-                            'type': row['informing_type'] or '',
-                            'project': row['info_project'] or row['project'] or '',
-                            'start_date': info_start_date.isoformat() + "Z" if info_start_date else '',
-                            'name': row['info_title'] or '',
-                            'comment': row['info_comment'] or '',
-                            'segments': row['info_segment'] or '',
-                            'promo_id': promo_id,
-                            'link': row['info_link'] or ''
-                        }
-                        
-                        promotions_map[promo_id]['info_channels'].append(info_channel)
+                promotions_list = [_promotion_from_row(row) for row in cursor.fetchall()]
+                _resolve_responsible_names(cursor, promotions_list)
                 
-                # Возвращаем список промо-акций
-                promotions_list = list(promotions_map.values())
+                # Информирования — вторым узким запросом, без повторения полей промо в каждой строке
+                _attach_info_channels(cursor, promotions_list)
                 
-                logger.info(f"✅ Загружено {len(promotions_list)} промо-акций за {month} с информированиями")
+                logger.info(f"✅ Загружено {len(promotions_list)} промо-акций за {first_day} — {next_month_first_day} с информированиями")
                 return promotions_list
                 
         except Exception as e:
-            logger.error(f"Ошибка получения промо-акций за месяц {month}: {e}")
+            logger.error(f"Ошибка получения промо-акций за период {first_day} — {next_month_first_day}: {e}")
             raise
     
     def get_promotion_by_id(self, promotion_id: int) -> Optional[Dict[str, Any]]:
@@ -473,50 +827,88 @@ class PromoRepository:
         """Создать несколько промо-акций одним запросом (batch insert)"""
         try:
             with self.db.get_cursor() as (cursor, connection):
-                query = """
-                    INSERT INTO promotions 
-                    (project, promo_type, promo_kind, start_date, end_date, 
-                     title, comment, segment, link, responsible_id)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """
-                
-                # Подготавливаем данные для batch insert
-                values = []
-                for promo_data in promotions_data:
-                    start_date = self._parse_date(promo_data.get('start_date'))
-                    end_date = self._parse_date(promo_data.get('end_date'))
-                    
-                    values.append((
-                        promo_data.get('project'),
-                        promo_data.get('promo_type'),
-                        promo_data.get('promo_kind'),
-                        start_date,
-                        end_date,
-                        promo_data.get('name'),  # В БД это title
-                        promo_data.get('comment'),
-                        promo_data.get('segments'),  # В БД это segment
-                        promo_data.get('link'),
-                        promo_data.get('responsible_id')
-                    ))
-                
-                # Выполняем batch insert
-                cursor.executemany(query, values)
+                created_ids = _insert_rows(
+                    cursor, 'promotions', PROMOTION_INSERT_COLUMNS,
+                    [_promotion_values(promo_data) for promo_data in promotions_data]
+                )
                 connection.commit()
                 
-                # Получаем ID созданных записей
-                first_id = cursor.lastrowid
-                created_ids = list(range(first_id, first_id + len(promotions_data)))
-                
                 logger.info(f"✅ Создано {len(created_ids)} промо-акций одним запросом: {created_ids}")
                 return created_ids
         except Exception as e:
             logger.error(f"Ошибка batch создания промо-акций: {e}")
             raise
     
-    def update_promotion(self, promotion_id: int, promotion_data: Dict[str, Any]) -> bool:
-        """Обновить промо-акцию"""
+    def create_promotions_bundle(self, promotions_data: List[Dict[str, Any]],
+                                 notification_type: Optional[str] = None,
+                                 changed_by: str = "Система") -> List[int]:
+        """
+        Создать промо-акции вместе с их каналами информирования и вхождениями
+        в одной транзакции на одном соединении.
+
+        Каждый элемент promotions_data — данные промо-акции с необязательными
+        вложенными списками 'info_channels' и 'occurrences' (без promo_id —
+        он проставляется после вставки акций). Каждая таблица пишется одним
+        многострочным INSERT, при ошибке откатывается всё создание целиком.
+        Там же рассчитываются и записываются сроки задач (promo_deadlines).
+        Если передан notification_type, в той же транзакции в notification_outbox
+        ставятся уведомления ответственным (отправляет фоновый воркер).
+        """
         try:
-            with self.db.get_cursor() as (cursor, connection):
+            with self.db.transaction() as (cursor, connection):
+                promotion_ids = _insert_rows(
+                    cursor, 'promotions', PROMOTION_INSERT_COLUMNS,
+                    [_promotion_values(promo_data) for promo_data in promotions_data]
+                )
+                
+                informings_values = []
+                occurrences_values = []
+                for promotion_id, promo_data in zip(promotion_ids, promotions_data):
+                    for info_data in promo_data.get('info_channels') or []:
+                        informings_values.append(_informing_values({**info_data, 'promo_id': promotion_id}))
+                    for occ_data in promo_data.get('occurrences') or []:
+                        # Один и тот же список вхождений приходит для каждого проекта, а
+                        # occurrence_key уникален в таблице — ключ клиента уточняется id акции
+                        occurrence_key = occ_data.get('occurrence_key')
+                        occurrences_values.append(_occurrence_values({
+                            **occ_data,
+                            'promo_id': promotion_id,
+                            'occurrence_key': f"{promotion_id}#{occurrence_key}" if occurrence_key else None
+                        }))
+                
+                _insert_rows(cursor, 'informing', INFORMING_INSERT_COLUMNS, informings_values)
+                _insert_rows(cursor, 'promotion_occurrences', OCCURRENCE_INSERT_COLUMNS, occurrences_values)
+                
+                deadline_rows = [
+                    row
+                    for promotion_id, promo_data in zip(promotion_ids, promotions_data)
+                    for row in _deadline_rows(promotion_id, promo_data)
+                ]
+                _write_deadlines(cursor, promotion_ids, deadline_rows)
+                
+                if notification_type:
+                    _enqueue_notifications(cursor, [
+                        _outbox_values(promotion_id, promo_data, notification_type, changed_by)
+                        for promotion_id, promo_data in zip(promotion_ids, promotions_data)
+                        if promo_data.get('responsible_id')
+                    ])
+            
+            logger.info(
+                f"✅ Создано в одной транзакции: {len(promotion_ids)} промо-акций, "
+                f"{len(informings_values)} информирований, {len(occurrences_values)} вхождений, "
+                f"{len(deadline_rows)} сроков"
+            )
+            return promotion_ids
+        except Exception as e:
+            logger.error(f"Ошибка создания промо-акций с информированиями: {e}")
+            raise
+    
+    def update_promotion(self, promotion_id: int, promotion_data: Dict[str, Any],
+                         notification_type: Optional[str] = None,
+                         changed_by: str = "Система") -> bool:
+        """Обновить промо-акцию, пересчитать её сроки (и поставить уведомление ответственному в outbox той же транзакцией)"""
+        try:
+            with self.db.transaction() as (cursor, connection):
                 query = """
                     UPDATE promotions 
                     SET project = %s, promo_type = %s, promo_kind = %s, 
@@ -545,7 +937,16 @@ class PromoRepository:
                 ))
                 
                 affected_rows = cursor.rowcount
-                connection.commit()
+                
+                # Даты или проект могли измениться — сроки пересчитываются целиком
+                _write_deadlines(
+                    cursor, [promotion_id], _deadline_rows(promotion_id, promotion_data), replace=True
+                )
+                
+                if notification_type and promotion_data.get('responsible_id'):
+                    _enqueue_notifications(cursor, [
+                        _outbox_values(promotion_id, promotion_data, notification_type, changed_by)
+                    ])
                 
                 logger.info(f"✅ Обновлена промо-акция {promotion_id}")
                 return affected_rows > 0
@@ -553,6 +954,81 @@ class PromoRepository:
             logger.error(f"Ошибка обновления промо-акции {promotion_id}: {e}")
             raise
     
+    def get_deadlines_due(self, first_day: date, next_day: date,
+                          kinds: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Сроки задач с датой в полуинтервале [first_day, next_day) — один диапазонный запрос по idx_promo_deadlines_due"""
+        try:
+            with self.db.get_cursor() as (cursor, connection):
+                query = """
+                    SELECT 
+                        d.promo_id, d.kind, d.due_date,
+                        p.project, p.title, p.start_date, p.responsible_id
+                    FROM promo_deadlines d
+                    INNER JOIN promotions p ON p.id = d.promo_id
+                    WHERE d.due_date >= %s AND d.due_date < %s
+                """
+                params = [first_day, next_day]
+                if kinds:
+                    query += f" AND d.kind IN ({', '.join(['%s'] * len(kinds))})"
+                    params.extend(kinds)
+                query += " ORDER BY d.due_date, d.promo_id, d.kind"
+                
+                cursor.execute(query, tuple(params))
+                deadlines = [
+                    {
+                        'promo_id': str(row['promo_id']),
+                        'kind': row['kind'],
+                        'due_date': row['due_date'].isoformat(),
+                        'project': row['project'] or '',
+                        'name': row['title'] or '',  # В БД это title
+                        'start_date': row['start_date'].isoformat() + "Z" if row['start_date'] else '',
+                        'responsible_id': row['responsible_id'],
+                        'responsible_name': None
+                    }
+                    for row in cursor.fetchall()
+                ]
+                _resolve_responsible_names(cursor, deadlines)
+                
+                logger.info(f"✅ Загружено {len(deadlines)} сроков за {first_day} — {next_day}")
+                return deadlines
+        except Exception as e:
+            logger.error(f"Ошибка получения сроков за период {first_day} — {next_day}: {e}")
+            raise
+    
+    def rebuild_deadlines(self, chunk_size: int = 500) -> int:
+        """
+        Пересчитать promo_deadlines для всех промо-акций.
+
+        Нужен для заполнения таблицы по уже существующим акциям и после
+        изменения календарей праздников: сохранённые сроки сами не пересчитываются.
+        Каждая пачка акций пишется своей транзакцией.
+        """
+        try:
+            with self.db.get_cursor() as (cursor, connection):
+                cursor.execute("SELECT id, project, start_date, end_date FROM promotions ORDER BY id")
+                promotions = cursor.fetchall()
+            
+            written = 0
+            for chunk in _chunks(promotions, chunk_size):
+                rows = [
+                    row
+                    for promo in chunk
+                    for row in _deadline_rows(promo['id'], {
+                        'project': promo['project'],
+                        'start_date': promo['start_date'].isoformat() if promo['start_date'] else None,
+                        'end_date': promo['end_date'].isoformat() if promo['end_date'] else None
+                    })
+                ]
+                with self.db.transaction() as (cursor, connection):
+                    _write_deadlines(cursor, [promo['id'] for promo in chunk], rows, replace=True)
+                written += len(rows)
+            
+            logger.info(f"✅ Пересчитаны сроки {len(promotions)} промо-акций: {written} строк")
+            return written
+        except Exception as e:
+            logger.error(f"Ошибка пересчёта сроков промо-акций: {e}")
+            raise
+    
     def delete_promotion(self, promotion_id: int) -> bool:
         """Удалить промо-акцию"""
         try:
@@ -574,24 +1050,7 @@ class PromoRepository:
     
     def _parse_date(self, date_str: str) -> Optional[datetime]:
         """Парсинг даты из строки"""
-        if not date_str:
-            return None
-        
-        try:
-            date_str = date_str.strip()
-            
-            if 'T' in date_str:
-                # ISO формат
-                return datetime.fromisoformat(date_str.replace('Z', '+00:00')).replace(tzinfo=None)
-            elif ' ' in date_str:
-                # Формат с пробелом
-                return datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
-            else:
-                # Простой формат даты
-                return datetime.strptime(date_str, "%Y-%m-%d")
-        except Exception as e:
-            logger.warning(f"Не удалось распарсить дату '{date_str}': {e}")
-            return None
+        return _parse_date(date_str)
 
 class InformingRepository:
     """Репозиторий для работы с информированием"""
@@ -649,14 +1108,29 @@ class InformingRepository:
             logger.error(f"Ошибка получения информирований для промо {promo_id}: {e}")
             raise
     
+    def get_informing_by_id(self, informing_id: int) -> Optional[Dict[str, Any]]:
+        """Получить информирование по ID"""
+        try:
+            with self.db.get_cursor() as (cursor, connection):
+                cursor.execute("SELECT * FROM informing WHERE id = %s", (informing_id,))
+                informing = cursor.fetchone()
+                
+                if informing and informing['start_date']:
+                    informing['start_date'] = informing['start_date'].isoformat() + "Z"
+                
+                return informing
+        except Exception as e:
+            logger.error(f"Ошибка получения информирования {informing_id}: {e}")
+            raise
+    
     def create_informing(self, informing_data: Dict[str, Any]) -> int:
         """Создать новое информирование"""
         try:
             with self.db.get_cursor() as (cursor, connection):
                 query = """
                     INSERT INTO informing 
-                    (informing_type, project, start_date, title, comment, segment, promo_id, link)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                    (informing_type, project, start_date, start_date_utc, title, comment, segment, promo_id, link)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
                 """
                 
                 start_date = self._parse_date(informing_data.get('start_date'))
@@ -665,6 +1139,7 @@ class InformingRepository:
                     informing_data.get('type'),  # В БД это informing_type
                     informing_data.get('project'),
                     start_date,
+                    to_utc(start_date),  # Нормализованная к UTC дата для выборки по месяцу
                     informing_data.get('name'),  # В БД это title
                     informing_data.get('comment'),
                     informing_data.get('segments'),  # В БД это segment
@@ -684,36 +1159,12 @@ class InformingRepository:
         """Создать несколько информирований одним запросом (batch insert)"""
         try:
             with self.db.get_cursor() as (cursor, connection):
-                query = """
-                    INSERT INTO informing 
-                    (informing_type, project, start_date, title, comment, segment, promo_id, link)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """
-                
-                # Подготавливаем данные для batch insert
-                values = []
-                for info_data in informings_data:
-                    start_date = self._parse_date(info_data.get('start_date'))
-                    
-                    values.append((
-                        info_data.get('type'),  # В БД это informing_type
-                        info_data.get('project'),
-                        start_date,
-                        info_data.get('name'),  # В БД это title
-                        info_data.get('comment'),
-                        info_data.get('segments'),  # В БД это segment
-                        info_data.get('promo_id'),
-                        info_data.get('link')
-                    ))
-                
-                # Выполняем batch insert
-                cursor.executemany(query, values)
+                created_ids = _insert_rows(
+                    cursor, 'informing', INFORMING_INSERT_COLUMNS,
+                    [_informing_values(info_data) for info_data in informings_data]
+                )
                 connection.commit()
                 
-                # Получаем ID созданных записей
-                first_id = cursor.lastrowid
-                created_ids = list(range(first_id, first_id + len(informings_data)))
-                
                 logger.info(f"✅ Создано {len(created_ids)} информирований одним запросом: {created_ids}")
                 return created_ids
         except Exception as e:
@@ -726,7 +1177,7 @@ class InformingRepository:
             with self.db.get_cursor() as (cursor, connection):
                 query = """
                     UPDATE informing 
-                    SET informing_type = %s, project = %s, start_date = %s, 
+                    SET informing_type = %s, project = %s, start_date = %s, start_date_utc = %s, 
                         title = %s, comment = %s, segment = %s, promo_id = %s, 
                         link = %s, updated_at = CURRENT_TIMESTAMP
                     WHERE id = %s
@@ -738,6 +1189,7 @@ class InformingRepository:
                     informing_data.get('type'),
                     informing_data.get('project'),
                     start_date,
+                    to_utc(start_date),
                     informing_data.get('name'),
                     informing_data.get('comment'),
                     informing_data.get('segments'),
@@ -755,6 +1207,80 @@ class InformingRepository:
             logger.error(f"Ошибка обновления информирования {informing_id}: {e}")
             raise
     
+    def sync_promo_channels(self, promo_id: int, channels: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Привести каналы информирования промо-акции к присланному списку одной транзакцией.
+
+        Каналы с id существующей строки обновляются, без id (или с чужим id) —
+        создаются, отсутствующие в списке — удаляются. Вместо запроса на каждый
+        канал: SELECT ... FOR UPDATE текущих строк, один многострочный INSERT для
+        новых, один INSERT ... ON DUPLICATE KEY UPDATE для изменённых и один
+        DELETE ... WHERE id IN (...). Строки без изменений не трогаются.
+        """
+        try:
+            with self.db.transaction() as (cursor, connection):
+                cursor.execute(f"""
+                    SELECT id, {', '.join(INFORMING_INSERT_COLUMNS)}
+                    FROM informing
+                    WHERE promo_id = %s
+                    FOR UPDATE
+                """, (promo_id,))
+                existing = {
+                    str(row['id']): _comparable_values(tuple(row[column] for column in INFORMING_INSERT_COLUMNS))
+                    for row in cursor.fetchall()
+                }
+                
+                new_rows = []
+                changed_rows = []
+                kept_ids = set()
+                for channel in channels:
+                    values = _informing_values({**channel, 'promo_id': promo_id})
+                    channel_id = str(channel.get('id') or '')
+                    
+                    if channel_id in existing and channel_id not in kept_ids:
+                        kept_ids.add(channel_id)
+                        if existing[channel_id] != _comparable_values(values):
+                            changed_rows.append((int(channel_id),) + values)
+                    else:
+                        new_rows.append(values)
+                
+                deleted_ids = [int(channel_id) for channel_id in existing if channel_id not in kept_ids]
+                
+                _insert_rows(cursor, 'informing', INFORMING_INSERT_COLUMNS, new_rows)
+                
+                if changed_rows:
+                    columns = ('id',) + INFORMING_INSERT_COLUMNS
+                    row_placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+                    # Строки заблокированы FOR UPDATE выше, поэтому все они дойдут до ветки UPDATE;
+                    # алиас строки вместо устаревшей с MySQL 8.0.20 функции VALUES()
+                    cursor.execute(
+                        f"INSERT INTO informing ({', '.join(columns)}) VALUES "
+                        + ', '.join([row_placeholders] * len(changed_rows))
+                        + " AS new ON DUPLICATE KEY UPDATE "
+                        + ', '.join(f"{column} = new.{column}" for column in INFORMING_INSERT_COLUMNS)
+                        + ", updated_at = CURRENT_TIMESTAMP",
+                        tuple(value for row in changed_rows for value in row)
+                    )
+                
+                if deleted_ids:
+                    placeholders = ', '.join(['%s'] * len(deleted_ids))
+                    cursor.execute(
+                        f"DELETE FROM informing WHERE promo_id = %s AND id IN ({placeholders})",
+                        (promo_id, *deleted_ids)
+                    )
+            
+            result = {
+                'created': len(new_rows),
+                'updated': len(changed_rows),
+                'deleted': len(deleted_ids),
+                'unchanged': len(kept_ids) - len(changed_rows)
+            }
+            logger.info(f"✅ Каналы промо-акции {promo_id} синхронизированы: {result}")
+            return result
+        except Exception as e:
+            logger.error(f"Ошибка синхронизации каналов промо-акции {promo_id}: {e}")
+            raise
+    
     def delete_informing(self, informing_id: int) -> bool:
         """Удалить информирование"""
         try:
@@ -772,33 +1298,18 @@ class InformingRepository:
     
     def _parse_date(self, date_str: str) -> Optional[datetime]:
         """Парсинг даты из строки"""
-        if not date_str:
-            return None
-        
-        try:
-            date_str = date_str.strip()
-            
-            if 'T' in date_str:
-                # ISO формат
-                return datetime.fromisoformat(date_str.replace('Z', '+00:00')).replace(tzinfo=None)
-            elif ' ' in date_str:
-                # Формат с пробелом
-                return datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
-            else:
-                # Простой формат даты
-                return datetime.strptime(date_str, "%Y-%m-%d")
-        except Exception as e:
-            logger.warning(f"Не удалось распарсить дату '{date_str}': {e}")
-            return None
+        return _parse_date(date_str)
     
     def get_standalone_channels_by_month(self, month: str) -> List[Dict[str, Any]]:
         """Получить каналы информирования без привязки к промо-событиям за указанный месяц"""
         try:
+            # Полуинтервал месяца вместо YEAR()/MONTH(), чтобы работал индекс
+            first_day, next_month_first_day = month_bounds(month)
+            
             with self.db.get_cursor() as (cursor, connection):
-                # Парсим месяц
-                year, month_num = month.split('-')
-                year, month_num = int(year), int(month_num)
-                
+                # promo_id IS NULL + диапазон start_date — диапазонное чтение по
+                # idx_informing_promo_start (promo_id, start_date): свободные каналы
+                # лежат в индексе отдельным отрезком, отсортированным по дате
                 query = """
                     SELECT 
                         i.id,
@@ -808,17 +1319,16 @@ class InformingRepository:
                         i.title as name,
                         i.comment,
                         i.segment as segments,
-                        i.link,
-                        i.promo_id
+                        i.promo_id,
+                        i.link
                     FROM informing i
                     WHERE i.promo_id IS NULL 
-                    AND i.start_date IS NOT NULL
-                    AND YEAR(i.start_date) = %s 
-                    AND MONTH(i.start_date) = %s
+                    AND i.start_date >= %s
+                    AND i.start_date < %s
                     ORDER BY i.start_date
                 """
                 
-                cursor.execute(query, (year, month_num))
+                cursor.execute(query, (first_day, next_month_first_day))
                 channels = cursor.fetchall()
                 
                 # Конвертируем даты и форматируем данные
@@ -845,122 +1355,73 @@ class OccurrenceRepository:
     
     def get_occurrences_by_month(self, month: str) -> List[Dict[str, Any]]:
         """Получить рекуррентные события за конкретный месяц с данными из promotions"""
+        return self.get_occurrences_by_range(*month_bounds(month))
+    
+    def get_occurrences_by_range(self, first_day: date, next_month_first_day: date) -> List[Dict[str, Any]]:
+        """Получить рекуррентные события, пересекающие полуинтервал [first_day, next_month_first_day)"""
         try:
-            # Парсим месяц в формате "YYYY-MM"
-            year, month_num = month.split('-')
-            year, month_num = int(year), int(month_num)
-            
-            # Вычисляем первый и последний день месяца
-            first_day = date(year, month_num, 1)
-            last_day = date(year, month_num, calendar.monthrange(year, month_num)[1])
-            
             with self.db.get_cursor() as (cursor, connection):
-                # Запрос для получения рекуррентных событий, которые пересекаются с указанным месяцем
+                # Вхождения читаются без JOIN'ов: у недельной акции их десятки в месяц,
+                # а поля акции и её каналы одинаковы для всех вхождений
                 query = """
                     SELECT 
                         po.id as occurrence_id,
                         po.promo_id,
                         po.occurrence_start,
                         po.occurrence_end,
-                        po.occurrence_key,
-                        p.project,
-                        p.promo_type,
-                        p.promo_kind,
-                        p.title as promo_title,
-                        p.comment as promo_comment,
-                        p.segment as promo_segment,
-                        p.link as promo_link,
-                        p.responsible_id,
-                        u.login as responsible_name,
-                        i.id as info_id,
-                        i.informing_type,
-                        i.project as info_project,
-                        i.start_date as info_start_date,
-                        i.title as info_title,
-                        i.comment as info_comment,
-                        i.segment as info_segment,
-                        i.link as info_link
+                        po.occurrence_key
                     FROM promotion_occurrences po
-                    INNER JOIN promotions p ON po.promo_id = p.id
-                    LEFT JOIN users u ON p.responsible_id = u.id
-                    LEFT JOIN informing i ON p.id = i.promo_id
-                    WHERE (
-                        -- Вхождение начинается в указанном месяце
-                        (po.occurrence_start >= %s AND po.occurrence_start <= %s)
-                        OR 
-                        -- Вхождение заканчивается в указанном месяце
-                        (po.occurrence_end >= %s AND po.occurrence_end <= %s)
-                        OR
-                        -- Вхождение пересекает указанный месяц (начинается до и заканчивается после)
-                        (po.occurrence_start <= %s AND po.occurrence_end >= %s)
-                    )
-                    ORDER BY po.occurrence_start ASC, i.start_date ASC
+                    WHERE
+                        -- Вхождение начинается до конца периода и заканчивается после его начала
+                        -- (диапазон по idx_occurrence_dates)
+                        po.occurrence_start < %s AND po.occurrence_end >= %s
+                    ORDER BY po.occurrence_start ASC
                 """
                 
-                cursor.execute(query, (
-                    first_day, last_day,  # occurrence_start в месяце
-                    first_day, last_day,  # occurrence_end в месяце
-                    first_day, last_day   # пересечение месяца
-                ))
+                cursor.execute(query, (next_month_first_day, first_day))
                 rows = cursor.fetchall()
                 
-                # Группируем результаты по вхождениям
-                occurrences_map = {}
+                # Поля промо-акций и их информирования — по одному разу на каждую акцию
+                promotions = _fetch_promotions_by_ids(
+                    cursor, list(dict.fromkeys(row['promo_id'] for row in rows))
+                ) if rows else {}
                 
+                occurrences_list = []
                 for row in rows:
-                    occurrence_key = row['occurrence_key']
+                    promo = promotions.get(row['promo_id'])
+                    if promo is None:
+                        # Акцию удалили между запросами
+                        continue
                     
-                    # Создаем вхождение если его ещё нет
-                    if occurrence_key not in occurrences_map:
-                        occurrence_start = row['occurrence_start']
-                        occurrence_end = row['occurrence_end']
-                        
-                        occurrences_map[occurrence_key] = {
-                            'id': f"occ_{row['occurrence_id']}",  # Префикс для отличия от обычных промо
-                            'promo_id': row['promo_id'],
-                            'occurrence_id': row['occurrence_id'],
-                            'occurrence_key': row['occurrence_key'],
-                            'project': row['project'] or '',
-                            'promo_type': row['promo_type'] or '',
-                            'promo_kind': row['promo_kind'] or '',
-                            'start_date': occurrence_start.isoformat() + "Z" if occurrence_start else '',
-                            'end_date': occurrence_end.isoformat() + "Z" if occurrence_end else '',
-                            'name': row['promo_title'] or '',
-                            'comment': row['promo_comment'] or '',
-                            'segment': row['promo_segment'] or '',
-                            'link': row['promo_link'] or '',
-                            'responsible_id': row['responsible_id'],
-                            'responsible_name': row['responsible_name'],
-                            'info_channels': [],
-                            'is_recurring': True  # Флаг для отличия от обычных событий
-                        }
+                    occurrence_start = row['occurrence_start']
+                    occurrence_end = row['occurrence_end']
                     
-                    # Добавляем информирование если оно есть
-                    if row['info_id']:
-                        info_start_date = row['info_start_date']
-                        
-                        info_channel = {
-                            'id': row['info_id'],
-                            'type': row['informing_type'] or '',
-                            'project': row['info_project'] or row['project'] or '',
-                            'start_date': info_start_date.isoformat() + "Z" if info_start_date else '',
-                            'name': row['info_title'] or '',
-                            'comment': row['info_comment'] or '',
-                            'segments': row['info_segment'] or '',
-                            'promo_id': row['promo_id'],
-                            'link': row['info_link'] or ''
-                        }
-                        
-                        occurrences_map[occurrence_key]['info_channels'].append(info_channel)
-                
-                # Возвращаем список вхождений
-                occurrences_list = list(occurrences_map.values())
-                
-                logger.info(f"✅ Загружено {len(occurrences_list)} рекуррентных событий за {month}")
+                    occurrences_list.append({
+                        'id': f"occ_{row['occurrence_id']}",  # Префикс для отличия от обычных промо
+                        'promo_id': row['promo_id'],
+                        'occurrence_id': row['occurrence_id'],
+                        'occurrence_key': row['occurrence_key'],
+                        'project': promo['project'],
+                        'promo_type': promo['promo_type'],
+                        'promo_kind': promo['promo_kind'],
+                        'start_date': occurrence_start.isoformat() + "Z" if occurrence_start else '',
+                        'end_date': occurrence_end.isoformat() + "Z" if occurrence_end else '',
+                        'name': promo['name'],
+                        'comment': promo['comment'],
+                        'segments': promo['segments'],
+                        'link': promo['link'],
+                        # Один и тот же список каналов на все вхождения акции (только для чтения)
+                        'info_channels': promo['info_channels'],
+                        'responsible_id': promo['responsible_id'],
+                        'responsible_name': promo['responsible_name'],
+                        'is_recurring': True  # Флаг для отличия от обычных событий
+                    })
+                
+                logger.info(f"✅ Загружено {len(occurrences_list)} рекуррентных событий за {first_day} — {next_month_first_day}")
                 return occurrences_list
                 
         except Exception as e:
-            logger.error(f"Ошибка получения рекуррентных событий за месяц {month}: {e}")
+            logger.error(f"Ошибка получения рекуррентных событий за период {first_day} — {next_month_first_day}: {e}")
             raise
     
     def get_occurrences_by_promo_id(self, promo_id: int) -> List[Dict[str, Any]]:
@@ -1046,33 +1507,12 @@ class OccurrenceRepository:
         """Создать несколько вхождений одним запросом (batch insert)"""
         try:
             with self.db.get_cursor() as (cursor, connection):
-                query = """
-                    INSERT INTO promotion_occurrences 
-                    (promo_id, occurrence_start, occurrence_end, occurrence_key)
-                    VALUES (%s, %s, %s, %s)
-                """
-                
-                # Подготавливаем данные для batch insert
-                values = []
-                for occ_data in occurrences_data:
-                    occurrence_start = self._parse_date(occ_data.get('occurrence_start'))
-                    occurrence_end = self._parse_date(occ_data.get('occurrence_end'))
-                    
-                    values.append((
-                        occ_data.get('promo_id'),
-                        occurrence_start,
-                        occurrence_end,
-                        occ_data.get('occurrence_key')
-                    ))
-                
-                # Выполняем batch insert
-                cursor.executemany(query, values)
+                created_ids = _insert_rows(
+                    cursor, 'promotion_occurrences', OCCURRENCE_INSERT_COLUMNS,
+                    [_occurrence_values(occ_data) for occ_data in occurrences_data]
+                )
                 connection.commit()
                 
-                # Получаем ID созданных записей
-                first_id = cursor.lastrowid
-                created_ids = list(range(first_id, first_id + len(occurrences_data)))
-                
                 logger.info(f"✅ Создано {len(created_ids)} вхождений одним запросом: {created_ids}")
                 return created_ids
         except Exception as e:
@@ -1142,24 +1582,7 @@ class OccurrenceRepository:
     
     def _parse_date(self, date_str: str) -> Optional[datetime]:
         """Парсинг даты из строки"""
-        if not date_str:
-            return None
-        
-        try:
-            date_str = date_str.strip()
-            
-            if 'T' in date_str:
-                # ISO формат
-                return datetime.fromisoformat(date_str.replace('Z', '+00:00')).replace(tzinfo=None)
-            elif ' ' in date_str:
-                # Формат с пробелом
-                return datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
-            else:
-                # Простой формат даты
-                return datetime.strptime(date_str, "%Y-%m-%d")
-        except Exception as e:
-            logger.warning(f"Не удалось распарсить дату '{date_str}': {e}")
-            return None
+        return _parse_date(date_str)
 
 class UserRepository:
     """Репозиторий для работы с пользователями"""
@@ -1238,6 +1661,9 @@ class UserRepository:
                 affected_rows = cursor.rowcount
                 connection.commit()
                 
+                # Логин/почта могли измениться — перечитываем запись в справочнике
+                user_directory.refresh_user(user_id, cursor)
+                
                 logger.info(f"✅ Обновлен пользователь {user_id}")
                 return affected_rows > 0
                 
@@ -1258,12 +1684,313 @@ class UserRepository:
             logger.error(f"Ошибка получения всех пользователей: {e}")
             raise
 
+class UserDirectory:
+    """
+    In-memory справочник пользователей id -> {login, mail, role}.
+
+    Нужен календарю (имя ответственного) и очереди уведомлений (почта
+    получателя) вместо LEFT JOIN users в каждом запросе. Справочник
+    загружается целиком одним запросом и перечитывается после ttl секунд,
+    при обращении к неизвестному id (не чаще раза в miss_reload_interval
+    секунд — пользователей заводят напрямую в БД) и точечно после
+    UserRepository.update_user.
+
+    Методы принимают курсор вызывающего, чтобы загрузка шла в его соединении,
+    а не занимала второе соединение из пула.
+    """
+    
+    FIELDS = ('id', 'login', 'mail', 'role')
+    
+    def __init__(self, db_manager: DatabaseManager, ttl: float = 300, miss_reload_interval: float = 30):
+        self.db = db_manager
+        self.ttl = ttl
+        self.miss_reload_interval = miss_reload_interval
+        self._users: Dict[int, Dict[str, Any]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'loads': 0}
+    
+    def get(self, user_id: Optional[int], cursor=None) -> Optional[Dict[str, Any]]:
+        """Пользователь по id или None"""
+        if not user_id:
+            return None
+        return self.get_many([user_id], cursor).get(user_id)
+    
+    def get_many(self, user_ids: Iterable[int], cursor=None) -> Dict[int, Dict[str, Any]]:
+        """Пользователи по списку id: {id: {id, login, mail, role}} (неизвестные id пропускаются)"""
+        user_ids = set(user_ids)
+        now = time.monotonic()
+        
+        with self._lock:
+            stale = self._loaded_at is None or now - self._loaded_at > self.ttl
+            missing = not stale and not user_ids <= self._users.keys()
+            if missing and now - self._loaded_at < self.miss_reload_interval:
+                missing = False
+            self.stats['misses' if stale or missing else 'hits'] += 1
+        
+        if stale or missing:
+            self._load(cursor)
+        
+        with self._lock:
+            return {user_id: self._users[user_id] for user_id in user_ids if user_id in self._users}
+    
+    def refresh_user(self, user_id: int, cursor=None) -> None:
+        """Перечитать одного пользователя (после изменения его данных)"""
+        try:
+            with self._cursor(cursor) as cur:
+                cur.execute(f"SELECT {', '.join(self.FIELDS)} FROM users WHERE id = %s", (user_id,))
+                row = cur.fetchone()
+        except Exception as e:
+            logger.error(f"Ошибка обновления справочника для пользователя {user_id}: {e}")
+            self.invalidate()
+            return
+        
+        with self._lock:
+            if row:
+                self._users[user_id] = self._as_dict(row)
+            else:
+                self._users.pop(user_id, None)
+    
+    def invalidate(self) -> None:
+        """Перечитать справочник при следующем обращении"""
+        with self._lock:
+            self._loaded_at = None
+    
+    def _load(self, cursor=None) -> None:
+        try:
+            with self._cursor(cursor) as cur:
+                cur.execute(f"SELECT {', '.join(self.FIELDS)} FROM users")
+                rows = cur.fetchall()
+        except Exception as e:
+            logger.error(f"Ошибка загрузки справочника пользователей: {e}")
+            raise
+        
+        users = {}
+        for row in rows:
+            user = self._as_dict(row)
+            users[user['id']] = user
+        with self._lock:
+            self._users = users
+            self._loaded_at = time.monotonic()
+            self.stats['loads'] += 1
+        logger.info(f"👥 Справочник пользователей загружен: {len(users)}")
+    
+    @contextmanager
+    def _cursor(self, cursor=None):
+        if cursor is not None:
+            yield cursor
+        else:
+            with self.db.get_cursor() as (own_cursor, connection):
+                yield own_cursor
+    
+    def _as_dict(self, row) -> Dict[str, Any]:
+        return dict(row) if isinstance(row, dict) else dict(zip(self.FIELDS, row))
+
+class NotificationOutboxRepository:
+    """Репозиторий очереди email-уведомлений (notification_outbox)"""
+    
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+    
+    def claim_batch(self, limit: int, lease_seconds: int) -> List[Dict[str, Any]]:
+        """
+        Забрать готовые к отправке уведомления.
+
+        Сначала выбираются до limit готовых строк, затем для их получателей
+        добираются все остальные ожидающие уведомления — в т.ч. ещё не
+        дождавшиеся конца окна объединения (attempts = 0), — чтобы воркер
+        отправил каждому получателю одно письмо. Строки, уже арендованные
+        другим воркером (attempts > 0 и next_attempt_at в будущем), не берутся.
+
+        Строки выбираются FOR UPDATE SKIP LOCKED, поэтому несколько воркеров
+        (в т.ч. в разных процессах) не получают одно и то же письмо. Забранным
+        строкам next_attempt_at сдвигается на lease_seconds вперёд: если воркер
+        упадёт, не отметив результат, письмо будет взято повторно после аренды.
+        """
+        try:
+            with self.db.transaction() as (cursor, connection):
+                cursor.execute("""
+                    SELECT recipient_id
+                    FROM notification_outbox
+                    WHERE status = 'pending' AND next_attempt_at <= UTC_TIMESTAMP()
+                    ORDER BY next_attempt_at
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                """, (limit,))
+                recipient_ids = list(dict.fromkeys(row['recipient_id'] for row in cursor.fetchall()))
+                if not recipient_ids:
+                    return []
+                
+                placeholders = ', '.join(['%s'] * len(recipient_ids))
+                cursor.execute(f"""
+                    SELECT id, recipient_id, promo_id, notification_type, payload, attempts
+                    FROM notification_outbox
+                    WHERE recipient_id IN ({placeholders})
+                      AND status = 'pending'
+                      AND (next_attempt_at <= UTC_TIMESTAMP() OR attempts = 0)
+                    ORDER BY recipient_id, id
+                    FOR UPDATE SKIP LOCKED
+                """, tuple(recipient_ids))
+                rows = cursor.fetchall()
+                
+                # Почта и логин получателей — из справочника пользователей
+                recipients = user_directory.get_many(recipient_ids, cursor)
+                
+                if rows:
+                    placeholders = ', '.join(['%s'] * len(rows))
+                    cursor.execute(f"""
+                        UPDATE notification_outbox
+                        SET attempts = attempts + 1,
+                            next_attempt_at = UTC_TIMESTAMP() + INTERVAL %s SECOND
+                        WHERE id IN ({placeholders})
+                    """, (lease_seconds, *[row['id'] for row in rows]))
+                
+                for row in rows:
+                    recipient = recipients.get(row['recipient_id']) or {}
+                    row['mail'] = recipient.get('mail')
+                    row['login'] = recipient.get('login')
+                    row['payload'] = json.loads(row['payload']) if row['payload'] else {}
+                    row['attempts'] += 1
+                return rows
+        except Exception as e:
+            logger.error(f"Ошибка выборки уведомлений из очереди: {e}")
+            raise
+    
+    def mark_sent(self, notification_ids: List[int]) -> None:
+        """Отметить уведомления отправленными"""
+        if not notification_ids:
+            return
+        try:
+            with self.db.get_cursor() as (cursor, connection):
+                placeholders = ', '.join(['%s'] * len(notification_ids))
+                cursor.execute(f"""
+                    UPDATE notification_outbox
+                    SET status = 'sent', sent_at = UTC_TIMESTAMP(), last_error = NULL
+                    WHERE id IN ({placeholders})
+                """, tuple(notification_ids))
+                connection.commit()
+        except Exception as e:
+            logger.error(f"Ошибка отметки отправленных уведомлений {notification_ids}: {e}")
+            raise
+    
+    def mark_retry(self, notification_id: int, error: str, delay_seconds: int) -> None:
+        """Отложить повторную отправку уведомления на delay_seconds"""
+        try:
+            with self.db.get_cursor() as (cursor, connection):
+                cursor.execute("""
+                    UPDATE notification_outbox
+                    SET last_error = %s, next_attempt_at = UTC_TIMESTAMP() + INTERVAL %s SECOND
+                    WHERE id = %s
+                """, (error, delay_seconds, notification_id))
+                connection.commit()
+        except Exception as e:
+            logger.error(f"Ошибка переноса уведомления {notification_id}: {e}")
+            raise
+    
+    def mark_failed(self, notification_id: int, error: str, status: str = 'failed') -> None:
+        """Окончательно снять уведомление с отправки (failed — исчерпаны попытки, skipped — отправлять некому)"""
+        try:
+            with self.db.get_cursor() as (cursor, connection):
+                cursor.execute("""
+                    UPDATE notification_outbox
+                    SET status = %s, last_error = %s
+                    WHERE id = %s
+                """, (status, error, notification_id))
+                connection.commit()
+        except Exception as e:
+            logger.error(f"Ошибка отметки уведомления {notification_id}: {e}")
+            raise
+
 # Глобальные экземпляры - отложенная инициализация
 db_manager = None
 promo_repo = None
 informing_repo = None
 occurrence_repo = None
 user_repo = None
+outbox_repo = None
+user_directory = None
+db_executor = None
+async_repos = None
+async_outbox_repo = None
+
+# Очередь email-уведомлений (см. create_table.sql)
+NOTIFICATION_OUTBOX_DDL = """
+    CREATE TABLE IF NOT EXISTS notification_outbox (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        recipient_id INT NOT NULL,
+        promo_id INT,
+        notification_type VARCHAR(50) NOT NULL,
+        payload TEXT NOT NULL,
+        status VARCHAR(20) NOT NULL DEFAULT 'pending',
+        attempts INT NOT NULL DEFAULT 0,
+        next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        last_error TEXT,
+        sent_at DATETIME,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        INDEX idx_outbox_status_next (status, next_attempt_at),
+        INDEX idx_outbox_recipient_status (recipient_id, status)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# Рассчитанные сроки задач промо-акций (см. create_table.sql)
+PROMO_DEADLINES_DDL = """
+    CREATE TABLE IF NOT EXISTS promo_deadlines (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        promo_id INT NOT NULL,
+        kind VARCHAR(50) NOT NULL,
+        due_date DATE NOT NULL,
+        UNIQUE KEY uq_promo_deadlines_promo_kind (promo_id, kind),
+        INDEX idx_promo_deadlines_due (due_date, promo_id),
+        FOREIGN KEY (promo_id) REFERENCES promotions(id) ON DELETE CASCADE
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+def ensure_schema():
+    """Добавить недостающие таблицы и колонки (миграции схемы, выполняются при старте)"""
+    global db_manager
+    if db_manager is None:
+        return
+    
+    try:
+        with db_manager.get_cursor(dictionary=False) as (cursor, connection):
+            # Таблицы, добавленные после первоначальной схемы create_table.sql
+            cursor.execute(NOTIFICATION_OUTBOX_DDL)
+            cursor.execute(PROMO_DEADLINES_DDL)
+            
+            # Колонки, добавленные после первоначальной схемы create_table.sql
+            columns = [
+                ("informing", "start_date_utc", "DATETIME NULL AFTER start_date"),
+                ("promotions", "insert_key", "CHAR(32) NULL"),
+                ("informing", "insert_key", "CHAR(32) NULL"),
+                ("promotion_occurrences", "insert_key", "CHAR(32) NULL"),
+            ]
+            
+            for table_name, column_name, definition in columns:
+                cursor.execute("""
+                    SELECT COUNT(*)
+                    FROM information_schema.columns
+                    WHERE table_schema = DATABASE()
+                    AND table_name = %s
+                    AND column_name = %s
+                """, (table_name, column_name))
+                
+                if cursor.fetchone()[0] == 0:
+                    cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {definition}")
+                    logger.info(f"✅ Добавлена колонка {table_name}.{column_name}")
+            
+            # Дозаполняем UTC-дату информирования для строк, записанных без неё
+            cursor.execute("""
+                UPDATE informing
+                SET start_date_utc = CONVERT_TZ(start_date, %s, '+00:00')
+                WHERE start_date IS NOT NULL AND start_date_utc IS NULL
+            """, (BUSINESS_TZ,))
+            if cursor.rowcount:
+                logger.info(f"✅ Заполнено start_date_utc для {cursor.rowcount} информирований")
+            
+            connection.commit()
+            
+    except Exception as e:
+        logger.error(f"❌ Ошибка обновления схемы базы данных: {e}")
 
 def optimize_database():
     """Создать индексы для оптимизации производительности"""
@@ -1282,10 +2009,16 @@ def optimize_database():
                 ("idx_promotions_project", "promotions", "project"),
                 ("idx_promotions_responsible_id", "promotions", "responsible_id"),
                 ("idx_informing_promo_start", "informing", "promo_id, start_date"),
+                ("idx_informing_start_utc", "informing", "start_date_utc, promo_id"),
+                ("idx_promotions_end_date", "promotions", "end_date"),
+                ("idx_promotions_insert_key", "promotions", "insert_key"),
+                ("idx_informing_insert_key", "informing", "insert_key"),
+                ("idx_occurrences_insert_key", "promotion_occurrences", "insert_key"),
                 ("idx_users_login", "users", "login"),
                 ("idx_occurrences_promo_id", "promotion_occurrences", "promo_id"),
                 ("idx_occurrences_dates", "promotion_occurrences", "occurrence_start, occurrence_end"),
-                ("idx_occurrences_key", "promotion_occurrences", "occurrence_key")
+                ("idx_occurrences_key", "promotion_occurrences", "occurrence_key"),
+                ("idx_outbox_recipient_status", "notification_outbox", "recipient_id, status")
             ]
             
             created_count = 0
@@ -1322,7 +2055,8 @@ def optimize_database():
 
 def get_db_manager():
     """Получить менеджер базы данных с отложенной инициализацией"""
-    global db_manager, promo_repo, informing_repo, occurrence_repo, user_repo
+    global db_manager, promo_repo, informing_repo, occurrence_repo, user_repo, outbox_repo
+    global user_directory, db_executor, async_repos, async_outbox_repo
     
     if db_manager is None:
         try:
@@ -1331,9 +2065,26 @@ def get_db_manager():
             informing_repo = InformingRepository(db_manager)
             occurrence_repo = OccurrenceRepository(db_manager)
             user_repo = UserRepository(db_manager)
+            outbox_repo = NotificationOutboxRepository(db_manager)
+            user_directory = UserDirectory(
+                db_manager,
+                ttl=float(os.getenv('USER_DIRECTORY_TTL', '300'))
+            )
+            
+            # Потоков ровно столько, сколько соединений в пуле
+            db_executor = ThreadPoolExecutor(
+                max_workers=db_manager.config.get_pool_config()['pool_size'],
+                thread_name_prefix='db'
+            )
+            async_repos = tuple(
+                AsyncRepository(repo, db_executor)
+                for repo in (promo_repo, informing_repo, occurrence_repo, user_repo)
+            )
+            async_outbox_repo = AsyncRepository(outbox_repo, db_executor)
             logger.info("✅ База данных успешно инициализирована")
             
-            # Автоматически создаем индексы для оптимизации
+            # Приводим схему к актуальной и создаем индексы для оптимизации
+            ensure_schema()
             optimize_database()
             
         except Exception as e:
@@ -1345,4 +2096,14 @@ def get_db_manager():
 def get_repositories():
     """Получить репозитории с проверкой инициализации"""
     get_db_manager()  # Убеждаемся что БД инициализирована
-    return promo_repo, informing_repo, occurrence_repo, user_repo 
\ No newline at end of file
+    return promo_repo, informing_repo, occurrence_repo, user_repo
+
+def get_async_repositories():
+    """Получить асинхронные репозитории (методы выполняются в пуле потоков БД)"""
+    get_db_manager()  # Убеждаемся что БД инициализирована
+    return async_repos
+
+def get_outbox_repository():
+    """Получить асинхронный репозиторий очереди уведомлений"""
+    get_db_manager()  # Убеждаемся что БД инициализирована
+    return async_outbox_repo
@@ -1,18 +1,26 @@
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, status, Header, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional, Literal
+from typing import List, Optional, Literal, Set
 import os
 import uuid
 from datetime import datetime, date, timedelta
 import calendar
+import hashlib
+from contextlib import asynccontextmanager
 from pydantic import BaseModel, validator
-import pandas as pd
 from roaters.promo_fields import router as promo_fields_router
-from database import get_repositories
+from database import get_async_repositories, get_db_manager, month_bounds
 from roaters.user_router import user_router
 from roaters.auth_router import auth_router
 from roaters.protected_routes import protected_router
+from roaters.deadlines_router import deadlines_router
+from utils.notification_outbox import notification_worker
 from utils.email_service import email_service
+from utils.fast_json import dumps, join_months
+from utils.idempotency import idempotency_store, request_fingerprint, IdempotencyKeyMismatch
+from utils.month_cache import (
+    events_cache, standalone_channels_cache, months_between, informing_months, month_key, etag_matches
+)
 
 # Настройки JWT
 SECRET_KEY = "your-secret-key-here"  # В продакшене использовать безопасный ключ
@@ -21,7 +29,19 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 часа
 
 # Контекст для хеширования паролей
 
-app = FastAPI(title="Promo Calendar API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Запуск и остановка фоновых задач приложения"""
+    try:
+        get_db_manager()  # Воркеру очереди уведомлений нужна БД
+        notification_worker.start()
+    except Exception as e:
+        print(f"⚠️ Воркер очереди уведомлений не запущен: {e}")
+    yield
+    await notification_worker.stop()
+    email_service.close()  # QUIT для авторизованных SMTP-сессий из пула
+
+app = FastAPI(title="Promo Calendar API", version="1.0.0", lifespan=lifespan)
 
 # Подключаем роутеры
 
@@ -29,6 +49,7 @@ app.include_router(promo_fields_router)
 app.include_router(user_router)
 app.include_router(auth_router)
 app.include_router(protected_router)
+app.include_router(deadlines_router)
 
 # CORS middleware для работы сReact
 app.add_middleware(
@@ -83,6 +104,37 @@ class InfoChannelInput(BaseModel):
     def validate_id(cls, v):
         return validate_id_field(v)
 
+def parse_input_datetime(v: str) -> datetime:
+    """Разобрать дату из запроса так же, как её сохранит репозиторий (ISO, YYYY-MM-DD HH:MM:SS или YYYY-MM-DD)"""
+    v = v.strip()
+    try:
+        if 'T' in v:
+            return datetime.fromisoformat(v.replace('Z', '+00:00')).replace(tzinfo=None)
+        elif ' ' in v:
+            return datetime.strptime(v, '%Y-%m-%d %H:%M:%S')
+        else:
+            return datetime.strptime(v, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError('Дата должна быть в формате ISO datetime, YYYY-MM-DD HH:MM:SS или YYYY-MM-DD')
+
+class OccurrenceInput(BaseModel):
+    occurrence_start: str
+    occurrence_end: str
+    occurrence_key: Optional[str] = None  # В БД сохраняется как promo_id#ключ; по умолчанию promo_id#YYYYMMDDHHMMSS
+    
+    @validator('occurrence_start', 'occurrence_end')
+    def validate_occurrence_date(cls, v):
+        parse_input_datetime(v)
+        return v
+    
+    @validator('occurrence_key')
+    def validate_occurrence_key(cls, v):
+        return (v.strip() or None) if v else None
+    
+    def key_suffix(self) -> str:
+        """Часть ключа вхождения после promo_id#"""
+        return self.occurrence_key or f"{parse_input_datetime(self.occurrence_start):%Y%m%d%H%M%S}"
+
 class PromoEventCreate(BaseModel):
     project: List[str]  # Список проектов
     promo_type: str
@@ -93,6 +145,7 @@ class PromoEventCreate(BaseModel):
     comment: Optional[str] = ""
     segments: str = "СНГ"
     info_channels: List[InfoChannelInput] = []  # Изменяем с dict на List[InfoChannelInput]
+    occurrences: List[OccurrenceInput] = []  # Вхождения рекуррентной акции (создаются для каждого проекта)
     link: Optional[str] = ""
     responsible_id: Optional[int] = None  # ID ответственного пользователя
     
@@ -105,6 +158,18 @@ class PromoEventCreate(BaseModel):
             if not project or not project.strip():
                 raise ValueError('Название проекта не может быть пустым')
         return [project.strip() for project in v]
+    
+    @validator('occurrences')
+    def validate_occurrence_keys(cls, v):
+        # Ключ вхождения уникален в таблице: совпадение внутри одной акции (явные ключи
+        # или одинаковое начало без ключа) уронило бы всю транзакцию создания
+        seen = set()
+        for occurrence in v:
+            suffix = occurrence.key_suffix()
+            if suffix in seen:
+                raise ValueError(f'Повторяющийся ключ вхождения: {suffix}')
+            seen.add(suffix)
+        return v
 
 class PromoEvent(BaseModel):
     id: str
@@ -224,7 +289,7 @@ class DeleteEventRequest(BaseModel):
 def get_repos():
     """Хелпер для получения репозиториев с обработкой ошибок"""
     try:
-        return get_repositories()
+        return get_async_repositories()
     except Exception as e:
         # В случае недоступности БД, выводим детальную ошибку
         print(f"❌ База данных недоступна: {e}")
@@ -242,85 +307,52 @@ def get_repos():
             detail="База данных временно недоступна. Проверьте подключение к MySQL серверу."
         )
 
-async def send_responsible_notification(
-    responsible_id: int, 
-    promo_name: str, 
-    project: str, 
-    promo_type: str, 
-    start_date: str, 
-    end_date: str, 
-    notification_type: str = "assignment",
-    assigned_by: str = "Система"
-):
-    """
-    Отправить уведомление ответственному пользователю
+async def collect_promo_months(promo_id: int) -> Set[str]:
+    """Месяцы календаря, в которых отображается промо-акция (сама акция, её каналы и вхождения)"""
+    promo_repo, informing_repo, occurrence_repo, user_repo = get_repos()
+    
+    months = set()
+    promotion = await promo_repo.get_promotion_by_id(promo_id)
+    if promotion:
+        months.update(months_between(promotion.get('start_date'), promotion.get('end_date')))
     
-    Args:
-        responsible_id: ID ответственного пользователя
-        promo_name: Название промо-акции
-        project: Проект
-        promo_type: Тип промо-акции
-        start_date: Дата начала
-        end_date: Дата окончания
-        notification_type: Тип уведомления ("assignment" или "update")
-        assigned_by: Кто назначил/обновил
-    """
+    for channel in await informing_repo.get_informing_by_promo_id(promo_id):
+        months.update(informing_months(channel.get('start_date')))
+    
+    for occurrence in await occurrence_repo.get_occurrences_by_promo_id(promo_id):
+        months.update(months_between(occurrence.get('occurrence_start'), occurrence.get('occurrence_end')))
+    
+    return months
+
+def cached_json_response(body: bytes, etag: Optional[str], if_none_match: Optional[str]) -> Response:
+    """Ответ с уже сериализованным JSON и ETag: 304 без тела, если у клиента актуальная версия месяца"""
+    headers = {"Cache-Control": "no-cache"}
+    if etag:
+        headers["ETag"] = etag
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def run_idempotent(scope: str, idempotency_key: Optional[str], request: BaseModel, handler):
+    """Выполнить создание один раз на Idempotency-Key (ретраи фронтенда не плодят дубликаты)"""
     try:
-        # Получаем репозитории
-        promo_repo, informing_repo, occurrence_repo, user_repo = get_repos()
-        
-        # Получаем данные пользователя
-        user = user_repo.get_user_by_id(responsible_id)
-        if not user:
-            print(f"⚠️ Пользователь с ID {responsible_id} не найден")
-            return
-        
-        user_email = user.get('mail')
-        user_login = user.get('login', 'Пользователь')
-        
-        if not user_email:
-            print(f"⚠️ У пользователя {user_login} не указан email")
-            return
-        
-        # Отправляем уведомление в зависимости от типа
-        if notification_type == "assignment":
-            success = email_service.send_responsible_assignment_notification(
-                to_email=user_email,
-                responsible_name=user_login,
-                promo_name=promo_name,
-                project=project,
-                promo_type=promo_type,
-                start_date=start_date,
-                end_date=end_date,
-                assigned_by=assigned_by
-            )
-        elif notification_type == "update":
-            success = email_service.send_responsible_update_notification(
-                to_email=user_email,
-                responsible_name=user_login,
-                promo_name=promo_name,
-                project=project,
-                promo_type=promo_type,
-                start_date=start_date,
-                end_date=end_date,
-                updated_by=assigned_by
-            )
-        else:
-            print(f"⚠️ Неизвестный тип уведомления: {notification_type}")
-            return
-        
-        if success:
-            print(f"✅ Email уведомление отправлено на {user_email}")
-        else:
-            print(f"❌ Ошибка отправки email уведомления на {user_email}")
-            
-    except Exception as e:
-        print(f"❌ Ошибка при отправке уведомления: {e}")
+        return await idempotency_store.run(scope, idempotency_key, request_fingerprint(request.model_dump()), handler)
+    except IdempotencyKeyMismatch:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key уже использован для запроса с другими данными"
+        )
 
 @app.get("/")
 async def root():
     return {"message": "Promo Calendar API"}
 
+@app.get("/api/db/stats")
+async def get_db_stats():
+    """Счётчики служебных обращений к MySQL (ping, переподключения, настройка сессии)"""
+    get_repos()  # Убеждаемся что БД инициализирована
+    return get_db_manager().get_stats()
+
 def convert_date_to_iso(date_str: str) -> str:
     """Конвертирует дату из различных форматов в ISO формат"""
     if not date_str:
@@ -352,9 +384,110 @@ def convert_date_to_iso(date_str: str) -> str:
         print(f"Ошибка конвертации даты '{date_str}': {str(e)}")
         return date_str
 
+def build_calendar_events(promotions, occurrences) -> list:
+    """Собрать события календаря из промо-акций и рекуррентных вхождений, отсортированные по дате начала"""
+    # Репозитории уже отдают события в формате ответа — остаётся только объединить и отсортировать
+    aggregated_data = promotions + occurrences
+    aggregated_data.sort(key=lambda x: x.get('start_date', ''))
+    return aggregated_data
+
+# Максимальная длина диапазона GET /api/events?from=...&to=... (год)
+MAX_EVENTS_RANGE_MONTHS = 12
+
+def normalize_month(month: str) -> str:
+    """Проверить месяц "YYYY-MM" и привести его к каноническому виду"""
+    try:
+        year, month_num = month.split('-')
+        year, month_num = int(year), int(month_num)
+        if not (1 <= month_num <= 12):
+            raise ValueError("Месяц должен быть от 1 до 12")
+    except (ValueError, IndexError, AttributeError):
+        raise HTTPException(
+            status_code=400, 
+            detail="Неверный формат месяца. Используйте формат YYYY-MM (например, 2025-09)"
+        )
+    return f"{year}-{month_num:02d}"
+
+def calendar_event_months(event) -> Set[str]:
+    """Месяцы, в выдачу которых попадает событие (те же условия, что и в запросах за месяц)"""
+    months = set(months_between(event.get('start_date'), event.get('end_date')))
+    if not event.get('is_recurring'):
+        # Промо-акция также видна в месяце каждого своего информирования (по дате в UTC)
+        for channel in event.get('info_channels', []):
+            months.update(informing_months(channel.get('start_date')))
+    return months
+
+def combined_etag(etags: List[Optional[str]]) -> Optional[str]:
+    """ETag ответа за несколько месяцев — хэш от ETag'ов каждого месяца"""
+    if not etags or not all(etags):
+        return None
+    return '"' + hashlib.sha1(",".join(etags).encode()).hexdigest() + '"'
+
+async def get_events_range(from_month: str, to_month: str, if_none_match: Optional[str]):
+    """События за диапазон месяцев одним проходом по БД, разложенные по месяцам"""
+    try:
+        promo_repo, informing_repo, occurrence_repo, user_repo = get_repos()
+        
+        from_month = normalize_month(from_month)
+        to_month = normalize_month(to_month or from_month)
+        if from_month > to_month:
+            raise HTTPException(status_code=400, detail="Параметр from должен быть не позже to")
+        
+        months = months_between(f"{from_month}-01", f"{to_month}-01")
+        if len(months) > MAX_EVENTS_RANGE_MONTHS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Диапазон не может превышать {MAX_EVENTS_RANGE_MONTHS} месяцев"
+            )
+        
+        # Если все месяцы диапазона уже в кэше — в БД не ходим
+        cached = {month: events_cache.get(month) for month in months}
+        if all(entry is not None for entry in cached.values()):
+            body = join_months({month: entry[1] for month, entry in cached.items()})
+            etag = combined_etag([entry[0] for entry in cached.values()])
+            return cached_json_response(body, etag, if_none_match)
+        cache_versions = {month: events_cache.version(month) for month in months}
+        
+        # Один запрос на весь диапазон: промо-акция, пересекающая несколько месяцев, приходит один раз
+        first_day, _ = month_bounds(from_month)
+        _, next_month_first_day = month_bounds(to_month)
+        promotions = await promo_repo.get_promotions_by_range(first_day, next_month_first_day)
+        occurrences = await occurrence_repo.get_occurrences_by_range(first_day, next_month_first_day)
+        
+        # Раскладываем события по месяцам (список уже отсортирован по дате начала)
+        buckets = {month: [] for month in months}
+        for event in build_calendar_events(promotions, occurrences):
+            for month in calendar_event_months(event):
+                if month in buckets:
+                    buckets[month].append(event)
+        
+        # Заодно наполняем помесячный кэш — соседние запросы за один месяц его переиспользуют
+        bodies = {}
+        etags = []
+        for month in months:
+            bodies[month] = dumps({"events": buckets[month]})
+            etags.append(events_cache.set(month, bodies[month], cache_versions[month]))
+        
+        print(f"✅ Загружено событий за {from_month} — {to_month}: обычных {len(promotions)}, рекуррентных {len(occurrences)}")
+        return cached_json_response(join_months(bodies), combined_etag(etags), if_none_match)
+        
+    except Exception as e:
+        print(f"Критическая ошибка: {str(e)}")
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(status_code=500, detail=f"Ошибка получения данных: {str(e)}")
+
 @app.get("/api/events")
-async def get_events(month: Optional[str] = None):
-    """Получить события из базы данных за указанный месяц или все события"""
+async def get_events(
+    month: Optional[str] = None,
+    from_month: Optional[str] = Query(None, alias="from"),
+    to_month: Optional[str] = Query(None, alias="to"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Получить события из базы данных за указанный месяц или за диапазон месяцев from..to"""
+    if from_month or to_month:
+        return await get_events_range(from_month or to_month, to_month, if_none_match)
+    
     try:
         # Получаем репозитории
         promo_repo, informing_repo, occurrence_repo, user_repo = get_repos()
@@ -365,92 +498,41 @@ async def get_events(month: Optional[str] = None):
             month = f"{current_date.year}-{current_date.month:02d}"
         
         # Валидация формата месяца
-        try:
-            year, month_num = month.split('-')
-            year, month_num = int(year), int(month_num)
-            if not (1 <= month_num <= 12):
-                raise ValueError("Месяц должен быть от 1 до 12")
-        except (ValueError, IndexError):
-            raise HTTPException(
-                status_code=400, 
-                detail="Неверный формат месяца. Используйте формат YYYY-MM (например, 2025-09)"
-            )
+        month = normalize_month(month)
+        
+        # Отдаём собранный ответ из кэша, если месяц не менялся
+        cached = events_cache.get(month)
+        if cached is not None:
+            etag, body = cached
+            return cached_json_response(body, etag, if_none_match)
+        cache_version = events_cache.version(month)
         
         # Получаем обычные промо-акции за указанный месяц
-        promotions = promo_repo.get_promotions_by_month(month)
+        promotions = await promo_repo.get_promotions_by_month(month)
         
         # Получаем рекуррентные события за указанный месяц
-        occurrences = occurrence_repo.get_occurrences_by_month(month)
+        occurrences = await occurrence_repo.get_occurrences_by_month(month)
         
-        # Объединяем данные
-        aggregated_data = []
-        
-        # Добавляем обычные промо-акции
-        for promo in promotions:
-            try:
-                event = {
-                    'id': str(promo['id']),  # Конвертируем в строку для совместимости
-                    'project': promo.get('project', ''),
-                    'promo_type': promo.get('promo_type', ''),
-                    'promo_kind': promo.get('promo_kind', ''),
-                    'start_date': promo.get('start_date', ''),
-                    'end_date': promo.get('end_date', ''),
-                    'name': promo.get('title', ''),  # В БД это title
-                    'comment': promo.get('comment', ''),
-                    'segments': promo.get('segment', ''),  # В БД это segment
-                    'link': promo.get('link', ''),
-                    'info_channels': promo.get('info_channels', []),  # Уже включены в результат JOIN
-                    'responsible_id': promo.get('responsible_id'),
-                    'responsible_name': promo.get('responsible_name'),
-                    'is_recurring': False  # Флаг для отличия от рекуррентных событий
-                }
-                
-                aggregated_data.append(event)
-            except Exception as row_error:
-                print(f"Ошибка при обработке промо-акции {promo.get('id')}: {str(row_error)}")
-                continue
-        
-        # Добавляем рекуррентные события
-        for occurrence in occurrences:
-            try:
-                event = {
-                    'id': occurrence.get('id', ''),  # Уже содержит префикс "occ_"
-                    'promo_id': occurrence.get('promo_id'),
-                    'occurrence_id': occurrence.get('occurrence_id'),
-                    'occurrence_key': occurrence.get('occurrence_key'),
-                    'project': occurrence.get('project', ''),
-                    'promo_type': occurrence.get('promo_type', ''),
-                    'promo_kind': occurrence.get('promo_kind', ''),
-                    'start_date': occurrence.get('start_date', ''),
-                    'end_date': occurrence.get('end_date', ''),
-                    'name': occurrence.get('name', ''),
-                    'comment': occurrence.get('comment', ''),
-                    'segments': occurrence.get('segment', ''),
-                    'link': occurrence.get('link', ''),
-                    'info_channels': occurrence.get('info_channels', []),
-                    'responsible_id': occurrence.get('responsible_id'),
-                    'responsible_name': occurrence.get('responsible_name'),
-                    'is_recurring': True  # Флаг для отличия от обычных событий
-                }
-                
-                aggregated_data.append(event)
-            except Exception as row_error:
-                print(f"Ошибка при обработке рекуррентного события {occurrence.get('occurrence_id')}: {str(row_error)}")
-                continue
-        
-        # Сортируем по дате начала
-        aggregated_data.sort(key=lambda x: x.get('start_date', ''))
+        aggregated_data = build_calendar_events(promotions, occurrences)
         
         print(f"✅ Загружено {len(aggregated_data)} событий за {month} (обычных: {len(promotions)}, рекуррентных: {len(occurrences)})")
-        return {"events": aggregated_data}
+        body = dumps({"events": aggregated_data})
+        etag = events_cache.set(month, body, cache_version)
+        return cached_json_response(body, etag, if_none_match)
         
     except Exception as e:
         print(f"Критическая ошибка: {str(e)}")
+        if isinstance(e, HTTPException):
+            raise e
         raise HTTPException(status_code=500, detail=f"Ошибка получения данных: {str(e)}")
 
 @app.post("/api/events")
-async def create_event(event: PromoEventCreate):
-    """Создать промо события для всех проектов из списка (оптимизированная версия с batch insert)"""
+async def create_event(event: PromoEventCreate, idempotency_key: Optional[str] = Header(None)):
+    """Создать промо события для всех проектов из списка (повтор с тем же Idempotency-Key вернёт первый ответ)"""
+    return await run_idempotent("create_event", idempotency_key, event, lambda: create_event_once(event))
+
+async def create_event_once(event: PromoEventCreate):
+    """Создать промо события для всех проектов из списка (одна транзакция, многострочные INSERT)"""
     try:
         # Получаем репозитории
         promo_repo, informing_repo, occurrence_repo, user_repo = get_repos()
@@ -459,7 +541,7 @@ async def create_event(event: PromoEventCreate):
         if not event.project or not event.promo_type or not event.name:
             raise HTTPException(status_code=400, detail="Не все обязательные поля заполнены")
         
-        # Подготавливаем данные для batch создания промо-акций
+        # Подготавливаем промо-акции для всех проектов вместе с их каналами и вхождениями
         promotions_data = []
         for project in event.project:
             promo_data = {
@@ -472,52 +554,37 @@ async def create_event(event: PromoEventCreate):
                 'comment': event.comment or '',
                 'segments': event.segments or 'СНГ',  # В репозитории будет сохранено в поле segment
                 'link': event.link or '',
-                'responsible_id': event.responsible_id
+                'responsible_id': event.responsible_id,
+                'info_channels': [
+                    {
+                        'type': channel.type,  # В репозитории будет сохранено в поле informing_type
+                        'project': channel.project or project,  # Используем проект из цикла или из канала
+                        'start_date': channel.start_date,
+                        'name': channel.name,  # В репозитории будет сохранено в поле title
+                        'comment': channel.comment or '',
+                        'segments': channel.segments or 'СНГ',  # В репозитории будет сохранено в поле segment
+                        'link': channel.link or ''
+                    }
+                    for channel in event.info_channels
+                    if channel.start_date  # Проверяем наличие даты
+                ],
+                'occurrences': [occurrence.model_dump() for occurrence in event.occurrences]
             }
             promotions_data.append(promo_data)
         
-        # Создаем все промо-акции одним batch запросом
-        promotion_ids = promo_repo.create_promotions_batch(promotions_data)
-        
-        # Подготавливаем данные для batch создания информирований
-        if event.info_channels:
-            informings_data = []
-            for i, project in enumerate(event.project):
-                promotion_id = promotion_ids[i]
-                
-                for channel in event.info_channels:
-                    if channel.start_date:  # Проверяем наличие даты
-                        info_data = {
-                            'type': channel.type,  # В репозитории будет сохранено в поле informing_type
-                            'project': channel.project or project,  # Используем проект из цикла или из канала
-                            'start_date': channel.start_date,
-                            'name': channel.name,  # В репозитории будет сохранено в поле title
-                            'comment': channel.comment or '',
-                            'segments': channel.segments or 'СНГ',  # В репозитории будет сохранено в поле segment
-                            'promo_id': promotion_id,
-                            'link': channel.link or ''
-                        }
-                        informings_data.append(info_data)
-            
-            # Создаем все информирования одним batch запросом
-            if informings_data:
-                informing_repo.create_informings_batch(informings_data)
-        
-        # Отправляем уведомления ответственным (если назначены)
-        if event.responsible_id:
-            for i, project in enumerate(event.project):
-                promotion_id = promotion_ids[i]
-                # Отправляем уведомление асинхронно (не блокируем ответ)
-                await send_responsible_notification(
-                    responsible_id=event.responsible_id,
-                    promo_name=event.name,
-                    project=project,
-                    promo_type=event.promo_type,
-                    start_date=event.start_date,
-                    end_date=event.end_date,
-                    notification_type="assignment",
-                    assigned_by="Система"
-                )
+        # Создаем акции, информирования и вхождения в одной транзакции; туда же в очередь
+        # ставятся уведомления ответственным — их отправит фоновый воркер, не задерживая ответ
+        promotion_ids = await promo_repo.create_promotions_bundle(
+            promotions_data, notification_type="assignment" if event.responsible_id else None
+        )
+        
+        # Сбрасываем кэш календаря за месяцы акции, её каналов и вхождений
+        touched_months = set(months_between(event.start_date, event.end_date))
+        for channel in event.info_channels:
+            touched_months.update(informing_months(channel.start_date))
+        for occurrence in event.occurrences:
+            touched_months.update(months_between(occurrence.occurrence_start, occurrence.occurrence_end))
+        events_cache.invalidate(touched_months)
         
         # Формируем ответ
         created_events = [
@@ -602,7 +669,7 @@ async def update_event(event_id: str, event: PromoEventUpdate):
         promotion_id = int(event_id)
         
         # Проверяем существование промо-акции
-        existing_promotion = promo_repo.get_promotion_by_id(promotion_id)
+        existing_promotion = await promo_repo.get_promotion_by_id(promotion_id)
         if not existing_promotion:
             raise HTTPException(status_code=404, detail="Промо событие не найдено")
         
@@ -623,70 +690,43 @@ async def update_event(event_id: str, event: PromoEventUpdate):
             'responsible_id': event.responsible_id
         }
         
+        # Месяцы, в которых акция отображалась до изменения
+        touched_months = await collect_promo_months(promotion_id)
+        
         # Проверяем, изменился ли ответственный
         old_responsible_id = existing_promotion.get('responsible_id')
         new_responsible_id = event.responsible_id
         
-        # Обновляем промо-акцию
-        promo_repo.update_promotion(promotion_id, promo_data)
-        
-        # Отправляем уведомление, если ответственный изменился или был назначен
+        # Уведомляем, если ответственный изменился или был назначен
+        notification_type = None
         if new_responsible_id and new_responsible_id != old_responsible_id:
-            await send_responsible_notification(
-                responsible_id=new_responsible_id,
-                promo_name=event.name,
-                project=project,
-                promo_type=event.promo_type,
-                start_date=event.start_date,
-                end_date=event.end_date,
-                notification_type="assignment" if old_responsible_id is None else "update",
-                assigned_by="Система"
-            )
+            notification_type = "assignment" if old_responsible_id is None else "update"
         
-        # Обработка каналов информирования
+        # Обновляем промо-акцию (уведомление ставится в очередь той же транзакцией)
+        await promo_repo.update_promotion(promotion_id, promo_data, notification_type=notification_type)
         
-        # 1. Получаем существующие каналы для этого промо
-        existing_channels = informing_repo.get_informing_by_promo_id(promotion_id)
-        existing_channel_ids = {str(ch['id']): ch['id'] for ch in existing_channels}
-        
-        # 2. Обрабатываем каждый канал из запроса
-        processed_channel_ids = set()
+        # Обработка каналов информирования: существующие (по id) обновляются, новые создаются,
+        # отсутствующие в запросе (удалённые на фронтенде) удаляются — всё одной транзакцией
+        channels_data = [
+            {
+                'id': channel.id,
+                'type': channel.type,
+                'project': project,  # Используем проект из списка
+                'start_date': channel.start_date,
+                'name': channel.name,
+                'comment': channel.comment,
+                'segments': channel.segments,
+                'link': channel.link
+            }
+            for channel in event.info_channels
+        ]
+        await informing_repo.sync_promo_channels(promotion_id, channels_data)
         
+        # ...и после изменения
+        touched_months.update(months_between(event.start_date, event.end_date))
         for channel in event.info_channels:
-            if channel.id and str(channel.id) in existing_channel_ids:
-                # Обновляем существующий канал
-                channel_data = {
-                    'type': channel.type,
-                    'project': project,  # Используем проект из списка
-                    'start_date': channel.start_date,
-                    'name': channel.name,
-                    'comment': channel.comment,
-                    'segments': channel.segments,
-                    'promo_id': promotion_id,
-                    'link': channel.link
-                }
-                
-                informing_repo.update_informing(existing_channel_ids[str(channel.id)], channel_data)
-                processed_channel_ids.add(str(channel.id))
-            else:
-                # Добавляем новый канал
-                channel_data = {
-                    'type': channel.type,
-                    'project': project,  # Используем проект из списка
-                    'start_date': channel.start_date,
-                    'name': channel.name,
-                    'comment': channel.comment,
-                    'segments': channel.segments,
-                    'promo_id': promotion_id,
-                    'link': channel.link
-                }
-                
-                informing_repo.create_informing(channel_data)
-        
-        # 3. Удаляем каналы, которые не были обновлены (были удалены на фронтенде)
-        for channel_id_str, channel_id in existing_channel_ids.items():
-            if channel_id_str not in processed_channel_ids:
-                informing_repo.delete_informing(channel_id)
+            touched_months.update(informing_months(channel.start_date))
+        events_cache.invalidate(touched_months)
         
         return {
             "message": "Промо событие и каналы информирования успешно обновлены",
@@ -725,12 +765,30 @@ async def update_channel(channel_id: str, channel: InfoChannelUpdate):
             'link': channel.link
         }
         
+        # Месяцы промо-акции, к которой канал был привязан до изменения
+        existing_channel = await informing_repo.get_informing_by_id(informing_id)
+        touched_months = set()
+        if existing_channel and existing_channel.get('promo_id'):
+            touched_months = await collect_promo_months(existing_channel['promo_id'])
+        
         # Обновляем канал информирования
-        success = informing_repo.update_informing(informing_id, channel_data)
+        success = await informing_repo.update_informing(informing_id, channel_data)
         
         if not success:
             raise HTTPException(status_code=404, detail="Канал информирования не найден")
         
+        if promo_id:
+            touched_months.update(await collect_promo_months(promo_id))
+        events_cache.invalidate(touched_months)
+        
+        # Свободные каналы: месяц до и после изменения
+        standalone_months = set()
+        if existing_channel and not existing_channel.get('promo_id'):
+            standalone_months.add(month_key(existing_channel.get('start_date')))
+        if not promo_id:
+            standalone_months.add(month_key(channel.start_date))
+        standalone_channels_cache.invalidate(standalone_months)
+        
         return {"message": "Канал информирования успешно обновлен"}
         
     except ValueError:
@@ -756,7 +814,7 @@ async def delete_event(event_id: str, delete_request: DeleteEventRequest):
             print(f"🔍 Попытка удаления рекуррентного события с ID: {event_id_int}")
             
             # Проверяем существование вхождения по его ID
-            target_occurrence = occurrence_repo.get_occurrence_by_id(event_id_int)
+            target_occurrence = await occurrence_repo.get_occurrence_by_id(event_id_int)
             
             if not target_occurrence:
                 print(f"❌ Рекуррентное событие с ID {event_id_int} не найдено в базе данных")
@@ -765,11 +823,15 @@ async def delete_event(event_id: str, delete_request: DeleteEventRequest):
             print(f"✅ Найдено рекуррентное событие: {target_occurrence}")
             
             # Удаляем вхождение
-            success = occurrence_repo.delete_occurrence(event_id_int)
+            success = await occurrence_repo.delete_occurrence(event_id_int)
             
             if not success:
                 raise HTTPException(status_code=404, detail="Рекуррентное событие не найдено")
             
+            events_cache.invalidate(months_between(
+                target_occurrence.get('occurrence_start'), target_occurrence.get('occurrence_end')
+            ))
+            
             return {
                 "message": "Рекуррентное событие успешно удалено"
             }
@@ -778,7 +840,7 @@ async def delete_event(event_id: str, delete_request: DeleteEventRequest):
             print(f"🔍 Попытка удаления обычного события с ID: {event_id_int}")
             
             # Проверяем существование промо-акции
-            existing_promotion = promo_repo.get_promotion_by_id(event_id_int)
+            existing_promotion = await promo_repo.get_promotion_by_id(event_id_int)
             if not existing_promotion:
                 print(f"❌ Обычное событие с ID {event_id_int} не найдено в таблице promotions")
                 raise HTTPException(status_code=404, detail="Промо событие не найдено")
@@ -786,15 +848,18 @@ async def delete_event(event_id: str, delete_request: DeleteEventRequest):
             print(f"✅ Найдено обычное событие: {existing_promotion}")
             
             # Получаем количество связанных информирований для отчета
-            existing_channels = informing_repo.get_informing_by_promo_id(event_id_int)
+            existing_channels = await informing_repo.get_informing_by_promo_id(event_id_int)
             channels_count = len(existing_channels)
+            touched_months = await collect_promo_months(event_id_int)
             
             # Удаляем промо-акцию (информирования удалятся автоматически благодаря каскадному удалению в репозитории)
-            success = promo_repo.delete_promotion(event_id_int)
+            success = await promo_repo.delete_promotion(event_id_int)
             
             if not success:
                 raise HTTPException(status_code=404, detail="Промо событие не найдено")
             
+            events_cache.invalidate(touched_months)
+            
             return {
                 "message": "Промо событие и связанные каналы информирования успешно удалены",
                 "deleted_channels_count": channels_count
@@ -816,12 +881,22 @@ async def delete_channel(channel_id: str):
         
         informing_id = int(channel_id)
         
+        # Месяцы промо-акции, к которой привязан канал
+        existing_channel = await informing_repo.get_informing_by_id(informing_id)
+        touched_months = set()
+        if existing_channel and existing_channel.get('promo_id'):
+            touched_months = await collect_promo_months(existing_channel['promo_id'])
+        
         # Удаляем канал информирования
-        success = informing_repo.delete_informing(informing_id)
+        success = await informing_repo.delete_informing(informing_id)
         
         if not success:
             raise HTTPException(status_code=404, detail="Канал информирования не найден")
         
+        events_cache.invalidate(touched_months)
+        if existing_channel and not existing_channel.get('promo_id'):
+            standalone_channels_cache.invalidate([month_key(existing_channel.get('start_date'))])
+        
         return {"message": "Канал информирования успешно удален"}
         
     except ValueError:
@@ -832,7 +907,11 @@ async def delete_channel(channel_id: str):
         raise HTTPException(status_code=500, detail=f"Ошибка удаления канала информирования: {str(e)}")
 
 @app.post("/api/channels", status_code=status.HTTP_201_CREATED)
-async def create_channel(channel: InfoChannelCreate):
+async def create_channel(channel: InfoChannelCreate, idempotency_key: Optional[str] = Header(None)):
+    """Создать новый канал информирования (повтор с тем же Idempotency-Key вернёт первый ответ)"""
+    return await run_idempotent("create_channel", idempotency_key, channel, lambda: create_channel_once(channel))
+
+async def create_channel_once(channel: InfoChannelCreate):
     """Создать новый канал информирования"""
     try:
         # Получаем репозитории
@@ -858,7 +937,13 @@ async def create_channel(channel: InfoChannelCreate):
         }
         
         # Создаем канал информирования
-        informing_id = informing_repo.create_informing(channel_data)
+        informing_id = await informing_repo.create_informing(channel_data)
+        
+        # Канал отображается внутри промо-акции во всех её месяцах
+        if channel_data['promo_id']:
+            events_cache.invalidate(await collect_promo_months(channel_data['promo_id']))
+        else:
+            standalone_channels_cache.invalidate([month_key(channel.start_date)])
         
         return {
             "message": "Канал информирования успешно создан",
@@ -886,7 +971,7 @@ async def create_channel(channel: InfoChannelCreate):
         )
 
 @app.get("/api/standalone-channels")
-async def get_standalone_channels(month: Optional[str] = None):
+async def get_standalone_channels(month: Optional[str] = None, if_none_match: Optional[str] = Header(None)):
     """Получить каналы информирования без привязки к промо-событиям за указанный месяц"""
     try:
         # Получаем репозитории
@@ -898,41 +983,28 @@ async def get_standalone_channels(month: Optional[str] = None):
             month = f"{current_date.year}-{current_date.month:02d}"
         
         # Валидация формата месяца
-        try:
-            year, month_num = month.split('-')
-            year, month_num = int(year), int(month_num)
-            if not (1 <= month_num <= 12):
-                raise ValueError("Месяц должен быть от 1 до 12")
-        except (ValueError, IndexError):
-            raise HTTPException(
-                status_code=400, 
-                detail="Неверный формат месяца. Используйте формат YYYY-MM (например, 2025-09)"
-            )
+        month = normalize_month(month)
+        
+        # Отдаём ответ из кэша (или 304), если месяц не менялся
+        cached = standalone_channels_cache.get(month)
+        if cached is not None:
+            etag, body = cached
+            return cached_json_response(body, etag, if_none_match)
+        cache_version = standalone_channels_cache.version(month)
         
         # Получаем каналы информирования без привязки к промо-событиям
-        channels = informing_repo.get_standalone_channels_by_month(month)
-        
-        # Форматируем ответ в нужную структуру
-        formatted_channels = []
-        for channel in channels:
-            formatted_channel = {
-                'id': channel.get('id'),
-                'type': channel.get('type', ''),
-                'project': channel.get('project', ''),
-                'start_date': channel.get('start_date', ''),
-                'name': channel.get('name', ''),
-                'comment': channel.get('comment', ''),
-                'segments': channel.get('segments', ''),
-                'promo_id': channel.get('promo_id'),  # Будет NULL для свободных каналов
-                'link': channel.get('link', '')
-            }
-            formatted_channels.append(formatted_channel)
+        # Репозиторий отдаёт каналы уже в формате ответа (promo_id будет NULL для свободных каналов)
+        channels = await informing_repo.get_standalone_channels_by_month(month)
         
-        print(f"✅ Загружено {len(formatted_channels)} свободных каналов информирования за {month}")
-        return {"channels": formatted_channels}
+        print(f"✅ Загружено {len(channels)} свободных каналов информирования за {month}")
+        body = dumps({"channels": channels})
+        etag = standalone_channels_cache.set(month, body, cache_version)
+        return cached_json_response(body, etag, if_none_match)
         
     except Exception as e:
         print(f"Критическая ошибка при получении свободных каналов: {str(e)}")
+        if isinstance(e, HTTPException):
+            raise e
         raise HTTPException(status_code=500, detail=f"Ошибка получения данных: {str(e)}")
 
 
@@ -5,6 +5,8 @@ from datetime import datetime
 import json
 from typing import Optional, Dict, Any
 
+from database import to_utc
+
 class SheetsToMySQLMigrator:
     """Класс для миграции данных из Google Sheets в MySQL"""
     
@@ -195,12 +197,13 @@ class SheetsToMySQLMigrator:
                     # Вставляем данные
                     insert_query = """
                         INSERT INTO informing 
-                        (informing_type, project, start_date, title, comment, segment, promo_id, link)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                        (informing_type, project, start_date, start_date_utc, title, comment, segment, promo_id, link)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
                     """
                     
                     cursor.execute(insert_query, (
-                        informing_type, project, start_date, title, comment, segment, mysql_promo_id, link
+                        informing_type, project, start_date, to_utc(start_date),
+                        title, comment, segment, mysql_promo_id, link
                     ))
                     
                     success_count += 1
@@ -13,16 +13,46 @@ CREATE INDEX IF NOT EXISTS idx_promotions_project ON promotions(project);
 -- 4. Индекс для связи promotions -> users
 CREATE INDEX IF NOT EXISTS idx_promotions_responsible_id ON promotions(responsible_id);
 
--- 5. Составной индекс для информирований (promo_id + start_date для сортировки)
+-- 5. Составной индекс для информирований (promo_id + start_date для сортировки).
+--    Он же обслуживает свободные каналы: MySQL не умеет частичные индексы, но условие
+--    promo_id IS NULL AND start_date >= ... AND start_date < ... читает только отрезок
+--    индекса со свободными каналами нужного месяца
 CREATE INDEX IF NOT EXISTS idx_informing_promo_start ON informing(promo_id, start_date);
 
 -- 6. Индекс для поиска пользователей по логину/паролю
 CREATE INDEX IF NOT EXISTS idx_users_login ON users(login);
 
+-- 7. Дата информирования в UTC (заполняется приложением при записи) и индекс
+--    для выборки информирований месяца диапазоном вместо DATE(CONVERT_TZ(...))
+ALTER TABLE informing ADD COLUMN IF NOT EXISTS start_date_utc DATETIME NULL AFTER start_date;
+UPDATE informing
+SET start_date_utc = CONVERT_TZ(start_date, '+03:00', '+00:00')
+WHERE start_date IS NOT NULL AND start_date_utc IS NULL;
+CREATE INDEX IF NOT EXISTS idx_informing_start_utc ON informing(start_date_utc, promo_id);
+
+-- 8. Индекс для промо-акций, заканчивающихся в месяце / пересекающих его
+CREATE INDEX IF NOT EXISTS idx_promotions_end_date ON promotions(end_date);
+
+-- 9. Ключ корреляции пакетных вставок: id созданных строк читаются по нему,
+--    а не вычисляются как lastrowid + N (под innodb_autoinc_lock_mode=2 диапазон не обязан быть сплошным)
+ALTER TABLE promotions ADD COLUMN IF NOT EXISTS insert_key CHAR(32) NULL;
+ALTER TABLE informing ADD COLUMN IF NOT EXISTS insert_key CHAR(32) NULL;
+ALTER TABLE promotion_occurrences ADD COLUMN IF NOT EXISTS insert_key CHAR(32) NULL;
+CREATE INDEX IF NOT EXISTS idx_promotions_insert_key ON promotions(insert_key);
+CREATE INDEX IF NOT EXISTS idx_informing_insert_key ON informing(insert_key);
+CREATE INDEX IF NOT EXISTS idx_occurrences_insert_key ON promotion_occurrences(insert_key);
+
+-- 10. Очередь уведомлений: воркер добирает все ожидающие письма получателя,
+--     чтобы отправить их одним дайджестом
+CREATE INDEX IF NOT EXISTS idx_outbox_recipient_status ON notification_outbox(recipient_id, status);
+
 -- Проверка созданных индексов
 SHOW INDEX FROM promotions;
 SHOW INDEX FROM informing;
 SHOW INDEX FROM users;
 
 -- Анализ производительности (опционально)
--- EXPLAIN SELECT ... - можно использовать для анализа планов выполнения запросов 
\ No newline at end of file
+-- EXPLAIN SELECT ... - можно использовать для анализа планов выполнения запросов
+-- Каждая ветка UNION в get_promotions_by_month должна давать type=range по своему индексу:
+-- EXPLAIN SELECT promo_id FROM informing
+--   WHERE start_date_utc >= '2025-09-01' AND start_date_utc < '2025-10-01' AND promo_id IS NOT NULL; 
\ No newline at end of file
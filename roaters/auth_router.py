@@ -4,7 +4,7 @@ from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime, timedelta
 import jwt
-from database import get_repositories
+from database import get_async_repositories
 import logging
 
 logger = logging.getLogger(__name__)
@@ -134,10 +134,10 @@ async def login(user_data: UserLogin, response: Response):
         logger.info(f"🔐 Попытка входа пользователя: {user_data.username}")
         
         # Получаем репозитории
-        promo_repo, informing_repo, occurrence_repo, user_repo = get_repositories()
+        promo_repo, informing_repo, occurrence_repo, user_repo = get_async_repositories()
         
         # Поиск пользователя в базе данных
-        user = user_repo.get_user_by_credentials(user_data.username, user_data.password)
+        user = await user_repo.get_user_by_credentials(user_data.username, user_data.password)
         
         if not user:
             logger.warning(f"❌ Неудачная попытка входа для пользователя: {user_data.username}")
@@ -388,10 +388,10 @@ async def get_current_user_info(current_user: dict = Depends(get_current_user)):
         logger.info(f"👤 Запрос информации о пользователе: {current_user['username']}")
         
         # Получаем репозитории
-        promo_repo, informing_repo, occurrence_repo, user_repo = get_repositories()
+        promo_repo, informing_repo, occurrence_repo, user_repo = get_async_repositories()
         
         # Получаем полную информацию о пользователе
-        user = user_repo.get_user_by_id(current_user['user_id'])
+        user = await user_repo.get_user_by_id(current_user['user_id'])
         
         if not user:
             raise HTTPException(
@@ -466,10 +466,10 @@ async def check_auth_status(request: Request):
         logger.info(f"🔍 Проверка статуса аутентификации для пользователя: {username}")
         
         # Получаем репозитории для получения полной информации о пользователе
-        promo_repo, informing_repo, occurrence_repo, user_repo = get_repositories()
+        promo_repo, informing_repo, occurrence_repo, user_repo = get_async_repositories()
         
         # Получаем полную информацию о пользователе
-        user = user_repo.get_user_by_id(user_id)
+        user = await user_repo.get_user_by_id(user_id)
         
         if not user:
             return {
@@ -0,0 +1,128 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, validator
+from typing import List, Optional
+from datetime import datetime, date, timedelta
+import asyncio
+import os
+from roaters.middleware import require_admin
+from database import get_async_repositories
+from utils.deadline_calc import deadline_calc_batch
+from utils.fast_json import FastJSONResponse
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Создаем роутер
+deadlines_router = APIRouter(prefix="/api/deadlines", tags=["deadlines"])
+
+# Максимальное число промо-акций в одном запросе расчёта сроков
+MAX_DEADLINE_BATCH = int(os.getenv('MAX_DEADLINE_BATCH', '10000'))
+
+# Максимальная длина периода (в днях) в запросе сохранённых сроков
+MAX_DEADLINE_RANGE_DAYS = int(os.getenv('MAX_DEADLINE_RANGE_DAYS', '366'))
+
+# Pydantic модели
+class DeadlinePromo(BaseModel):
+    """Промо-акция для расчёта сроков"""
+    id: Optional[str] = None  # Идентификатор из UI, возвращается как есть
+    project: str
+    start_date: datetime
+    end_date: datetime
+
+    @validator('project')
+    def validate_project(cls, v):
+        if not v or not v.strip():
+            raise ValueError('Проект не может быть пустым')
+        return v.strip()
+
+class DeadlineBatchRequest(BaseModel):
+    """Запрос расчёта сроков для нескольких промо-акций"""
+    promos: List[DeadlinePromo]
+
+@deadlines_router.post("/batch")
+async def calculate_deadlines_batch(request: DeadlineBatchRequest):
+    """
+    Рассчитать сроки задач для списка промо-акций одним запросом.
+
+    Для каждой промо-акции возвращаются те же ключи, что и в deadline_calc_dict
+    (сроки задач и размещений), в порядке входного списка.
+    """
+    promos = request.promos
+    if len(promos) > MAX_DEADLINE_BATCH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Слишком много промо-акций в запросе: {len(promos)} (максимум {MAX_DEADLINE_BATCH})"
+        )
+    if not promos:
+        return FastJSONResponse(content={"deadlines": []})
+
+    try:
+        # Векторный расчёт занимает десятки миллисекунд — не блокируем event loop
+        columns = await asyncio.to_thread(
+            deadline_calc_batch,
+            [promo.project for promo in promos],
+            [promo.start_date for promo in promos],
+            [promo.end_date for promo in promos]
+        )
+    except Exception as e:
+        logger.error(f"Ошибка пакетного расчёта сроков: {e}")
+        raise HTTPException(status_code=500, detail=f"Ошибка расчёта сроков: {str(e)}")
+
+    keys = list(columns)
+    deadlines = [
+        {'id': promo.id, 'project': promo.project, **dict(zip(keys, values))}
+        for promo, values in zip(promos, zip(*columns.values()))
+    ]
+    logger.info(f"📅 Рассчитаны сроки для {len(deadlines)} промо-акций")
+    return FastJSONResponse(content={"deadlines": deadlines})
+
+@deadlines_router.get("/due")
+async def get_deadlines_due(
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    kind: Optional[List[str]] = Query(None)
+):
+    """
+    Сроки задач, приходящиеся на период from..to (включительно), из таблицы promo_deadlines.
+
+    По умолчанию — текущая неделя (понедельник..воскресенье). kind можно
+    передать несколько раз, чтобы оставить только нужные виды сроков.
+    """
+    if from_date is None:
+        today = date.today()
+        from_date = today - timedelta(days=today.weekday())
+    if to_date is None:
+        to_date = from_date + timedelta(days=6)
+    if to_date < from_date:
+        raise HTTPException(status_code=400, detail="Дата окончания периода раньше даты начала")
+    if (to_date - from_date).days >= MAX_DEADLINE_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Слишком длинный период: не более {MAX_DEADLINE_RANGE_DAYS} дней"
+        )
+
+    try:
+        promo_repo, informing_repo, occurrence_repo, user_repo = get_async_repositories()
+        deadlines = await promo_repo.get_deadlines_due(from_date, to_date + timedelta(days=1), kind)
+    except Exception as e:
+        logger.error(f"Ошибка получения сроков за {from_date} — {to_date}: {e}")
+        raise HTTPException(status_code=500, detail=f"Ошибка получения сроков: {str(e)}")
+
+    return FastJSONResponse(content={
+        "from": from_date.isoformat(),
+        "to": to_date.isoformat(),
+        "deadlines": deadlines
+    })
+
+@deadlines_router.post("/rebuild")
+async def rebuild_deadlines(current_user: dict = Depends(require_admin)):
+    """Пересчитать сохранённые сроки всех промо-акций (после изменения календарей праздников)"""
+    try:
+        promo_repo, informing_repo, occurrence_repo, user_repo = get_async_repositories()
+        written = await promo_repo.rebuild_deadlines()
+    except Exception as e:
+        logger.error(f"Ошибка пересчёта сроков: {e}")
+        raise HTTPException(status_code=500, detail=f"Ошибка пересчёта сроков: {str(e)}")
+
+    logger.info(f"📅 Сроки промо-акций пересчитаны пользователем {current_user.get('sub')}: {written} строк")
+    return {"message": "Сроки промо-акций пересчитаны", "deadlines": written}
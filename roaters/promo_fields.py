@@ -3,7 +3,7 @@ from pydantic import BaseModel, validator
 from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime
-from utils.deadline_calc import deadline_calc_dict
+from utils.deadline_calc import deadline_calc_dict, deadline_memo
 from Task_creator.geo_dep import create_geo_dep_tasks
 
 router = APIRouter(prefix="/api/promo-fields", tags=["promo-fields"])
@@ -52,6 +52,11 @@ class PromoFieldsGeoDep(BaseModel):
             raise ValueError('Поля промо не могут быть пустыми')
         return v
 
+@router.get("/deadline-cache")
+async def get_deadline_cache_stats():
+    """Статистика кэша расчёта сроков (попадания/промахи)"""
+    return deadline_memo.stats()
+
 @router.post("/geodep")
 async def create_geo_dep_promo(promo_data: PromoFieldsGeoDep):
     """
@@ -3,7 +3,7 @@ from pydantic import BaseModel
 from typing import List
 from roaters.middleware import require_auth, require_admin, get_current_user_id
 from roaters.auth_router import get_current_user
-from database import get_repositories
+from database import get_async_repositories
 import logging
 
 logger = logging.getLogger(__name__)
@@ -47,10 +47,10 @@ async def get_admin_data(current_user: dict = Depends(require_admin)):
         logger.info(f"👑 Запрос данных администратора от пользователя: {current_user['sub']}")
         
         # Получаем репозитории
-        promo_repo, informing_repo, user_repo = get_repositories()
+        promo_repo, informing_repo, occurrence_repo, user_repo = get_async_repositories()
         
         # Получаем количество пользователей (пример административной функции)
-        users = user_repo.get_all_users()
+        users = await user_repo.get_all_users()
         user_count = len(users) if users else 0
         
         return AdminData(
@@ -73,10 +73,10 @@ async def get_user_profile(user_id: int = Depends(get_current_user_id)):
         logger.info(f"👤 Запрос профиля пользователя с ID: {user_id}")
         
         # Получаем репозитории
-        promo_repo, informing_repo, user_repo = get_repositories()
+        promo_repo, informing_repo, occurrence_repo, user_repo = get_async_repositories()
         
         # Получаем данные пользователя
-        user = user_repo.get_user_by_id(user_id)
+        user = await user_repo.get_user_by_id(user_id)
         
         if not user:
             raise HTTPException(
@@ -137,11 +137,11 @@ async def get_admin_statistics(current_user: dict = Depends(require_admin)):
         logger.info(f"📊 Запрос статистики от администратора: {current_user['sub']}")
         
         # Получаем репозитории
-        promo_repo, informing_repo, user_repo = get_repositories()
+        promo_repo, informing_repo, occurrence_repo, user_repo = get_async_repositories()
         
         # Получаем статистику
-        users = user_repo.get_all_users()
-        promotions = promo_repo.get_all_promotions_with_informing()
+        users = await user_repo.get_all_users()
+        promotions = await promo_repo.get_all_promotions_with_informing()
         
         statistics = {
             "total_users": len(users) if users else 0,
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, Field
 from typing import Optional, List
-from database import get_repositories
+from database import get_async_repositories
+from utils.fast_json import FastJSONResponse
+from utils.month_cache import events_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,6 +11,10 @@ logger = logging.getLogger(__name__)
 # Создаем роутер
 user_router = APIRouter(prefix="/api/users", tags=["users"])
 
+# Поля пользователя, которые отдаются в списках (без password)
+USER_RESPONSE_FIELDS = ('id', 'login', 'token', 'mail', 'server', 'accountId', 'api_key', 'token_trello')
+USER_BRIEF_FIELDS = ('id', 'login', 'mail')
+
 # Pydantic модели
 class UserResponse(BaseModel):
     """Модель ответа с данными пользователя"""
@@ -43,10 +49,10 @@ async def get_user_by_login(login: str):
     """Получить данные пользователя по логину"""
     try:
         logger.info(f"🔍 Запрос пользователя по логину: '{login}'")
-        promo_repo, informing_repo, occurrence_repo, user_repo = get_repositories()
+        promo_repo, informing_repo, occurrence_repo, user_repo = get_async_repositories()
         
         # Получаем пользователя по логину
-        user = user_repo.get_user_by_login(login)
+        user = await user_repo.get_user_by_login(login)
         logger.info(f"📋 Результат поиска: {user}")
         
         if not user:
@@ -75,26 +81,15 @@ async def get_user_by_login(login: str):
 async def get_all_users():
     """Получить список всех пользователей (для диагностики)"""
     try:
-        promo_repo, informing_repo, occurrence_repo, user_repo = get_repositories()
+        promo_repo, informing_repo, occurrence_repo, user_repo = get_async_repositories()
         
         # Получаем всех пользователей
-        users = user_repo.get_all_users()
-        
-        result = []
-        for user in users:
-            result.append(UserResponse(
-                id=user.get('id'),
-                login=user.get('login', ''),
-                password=user.get('password', ''),
-                token=user.get('token'),
-                mail=user.get('mail'),
-                server=user.get('server'),
-                accountId=user.get('accountId'),
-                api_key=user.get('api_key'),
-                token_trello=user.get('token_trello')
-            ))
-        
-        return result
+        users = await user_repo.get_all_users()
+        
+        # Готовые словари без password сериализуются orjson напрямую, без валидации моделей
+        result = [{field: user.get(field) for field in USER_RESPONSE_FIELDS} for user in users]
+        
+        return FastJSONResponse(content=result)
         
     except Exception as e:
         logger.error(f"Ошибка получения списка пользователей: {e}")
@@ -105,21 +100,15 @@ async def get_users_brief():
     """Получить краткий список всех пользователей (id, login, mail)"""
     try:
         logger.info("🔍 Запрос краткого списка пользователей")
-        promo_repo, informing_repo, occurrence_repo, user_repo = get_repositories()
+        promo_repo, informing_repo, occurrence_repo, user_repo = get_async_repositories()
         
         # Получаем всех пользователей
-        users = user_repo.get_all_users()
+        users = await user_repo.get_all_users()
         
-        result = []
-        for user in users:
-            result.append(UserBriefResponse(
-                id=user.get('id'),
-                login=user.get('login', ''),
-                mail=user.get('mail')
-            ))
+        result = [{field: user.get(field) for field in USER_BRIEF_FIELDS} for user in users]
         
         logger.info(f"✅ Возвращено {len(result)} пользователей")
-        return result
+        return FastJSONResponse(content=result)
         
     except Exception as e:
         logger.error(f"Ошибка получения краткого списка пользователей: {e}")
@@ -129,19 +118,23 @@ async def get_users_brief():
 async def update_user(user_id: int, user_data: UserUpdate):
     """Обновить данные пользователя по ID"""
     try:
-        promo_repo, informing_repo, occurrence_repo, user_repo = get_repositories()
+        promo_repo, informing_repo, occurrence_repo, user_repo = get_async_repositories()
         
         # Проверяем существование пользователя
-        existing_user = user_repo.get_user_by_id(user_id)
+        existing_user = await user_repo.get_user_by_id(user_id)
         if not existing_user:
             raise HTTPException(status_code=404, detail=f"Пользователь с ID {user_id} не найден")
         
         # Обновляем пользователя
-        success = user_repo.update_user(user_id, user_data.dict(exclude_unset=True))
+        success = await user_repo.update_user(user_id, user_data.dict(exclude_unset=True))
         
         if not success:
             raise HTTPException(status_code=500, detail="Не удалось обновить пользователя")
         
+        # Логин ответственного отдается в событиях календаря — закэшированные месяцы устарели
+        if user_data.login is not None and user_data.login != existing_user.get('login'):
+            events_cache.clear()
+        
         return {"message": f"Пользователь {user_id} успешно обновлен"}
         
     except HTTPException:
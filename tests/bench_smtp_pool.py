@@ -0,0 +1,105 @@
+"""
+Бенчмарк пула SMTP-соединений EmailService на локальном отладочном сервере.
+
+    python tests/bench_smtp_pool.py [число писем]
+
+Сервер — aiosmtpd (pip install aiosmtpd), а если он не установлен —
+smtpd из стандартной библиотеки (есть до Python 3.11). Отладочный сервер
+не поддерживает STARTTLS/AUTH, поэтому они отключены, и выигрыш на
+настоящем сервере больше: там каждое новое соединение — ещё TLS-рукопожатие
+и логин.
+"""
+import os
+import smtplib
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.email_service import EmailService
+
+
+class NoAuthSMTP(smtplib.SMTP):
+    """Отладочный сервер без AUTH: логин пропускается"""
+
+    def login(self, user, password, *, initial_response_ok=True):
+        return 235, b'skipped'
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int):
+    """Запустить сервер, принимающий и выбрасывающий письма; вернуть функцию остановки"""
+    try:
+        from aiosmtpd.controller import Controller
+    except ImportError:
+        Controller = None
+
+    if Controller is not None:
+        class Sink:
+            async def handle_DATA(self, server, session, envelope):
+                return '250 OK'
+
+        controller = Controller(Sink(), hostname='127.0.0.1', port=port)
+        controller.start()
+        return controller.stop
+
+    import asyncore
+    import smtpd
+
+    class SinkServer(smtpd.SMTPServer):
+        def process_message(self, peer, mailfrom, rcpttos, data, **kwargs):
+            return None
+
+    server = SinkServer(('127.0.0.1', port), None)
+    thread = threading.Thread(target=asyncore.loop, kwargs={'timeout': 0.05}, daemon=True)
+    thread.start()
+
+    def stop():
+        server.close()
+        thread.join()
+    return stop
+
+
+def make_service(port: int, pool_size: int) -> EmailService:
+    os.environ.update({
+        'SMTP_SERVER': '127.0.0.1', 'SMTP_PORT': str(port), 'SMTP_STARTTLS': 'false',
+        'SMTP_USERNAME': 'bench@example.com', 'SMTP_PASSWORD': 'bench', 'SMTP_POOL_SIZE': str(pool_size),
+    })
+    return EmailService()
+
+
+def run(name: str, service: EmailService, count: int, batch_size: int) -> None:
+    messages = [(f'user{i}@example.com', f'Промо {i}', 'Текст уведомления') for i in range(count)]
+    started = time.perf_counter()
+    for offset in range(0, count, batch_size):
+        results = service.send_batch(messages[offset:offset + batch_size])
+        assert all(results), results
+    elapsed = time.perf_counter() - started
+    service.close()
+    print(f"  {name:<32} {count / elapsed:8.0f} msg/s   {service.stats}")
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    smtplib.SMTP = NoAuthSMTP
+    port = free_port()
+    stop = start_server(port)
+    try:
+        print(f"{count} писем на 127.0.0.1:{port}")
+        # pool_size=0: соединение закрывается после каждого письма, как до пула
+        run("connect per message:", make_service(port, 0), count, 1)
+        run("pooled, one message per call:", make_service(port, 2), count, 1)
+        run("pooled, send_batch of 20:", make_service(port, 2), count, 20)
+    finally:
+        stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Поддельные курсор и менеджер БД для тестов репозиториев без MySQL"""
+from contextlib import contextmanager
+
+
+class FakeCursor:
+    """
+    Курсор, отвечающий на запросы функцией respond(query, params) -> строки.
+
+    Все выполненные запросы (с нормализованными пробелами) копятся в queries,
+    число отданных строк — в rows_fetched.
+    """
+
+    def __init__(self, respond=None):
+        self.respond = respond or (lambda query, params: [])
+        self.queries = []
+        self.rows_fetched = 0
+        self.rowcount = 1
+        self.lastrowid = None
+        self._result = []
+
+    def execute(self, query, params=()):
+        query = ' '.join(query.split())
+        self.queries.append((query, params))
+        self._result = list(self.respond(query, params) or [])
+
+    def fetchall(self):
+        rows, self._result = self._result, []
+        self.rows_fetched += len(rows)
+        return rows
+
+    def fetchone(self):
+        rows = self.fetchall()
+        return rows[0] if rows else None
+
+    def executed(self, fragment):
+        """Запросы, содержащие fragment"""
+        return [(query, params) for query, params in self.queries if fragment in query]
+
+
+class FakeConnection:
+    def __init__(self):
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+
+class FakeDatabaseManager:
+    """get_cursor()/transaction() на одном FakeCursor"""
+
+    def __init__(self, respond=None):
+        self.cursor = FakeCursor(respond)
+        self.connection = FakeConnection()
+
+    @contextmanager
+    def get_cursor(self, dictionary=True):
+        yield self.cursor, self.connection
+
+    transaction = get_cursor
+
+
+class FakeUserDirectory:
+    def __init__(self, users=None):
+        self.users = users or {}
+
+    def get_many(self, user_ids, cursor=None):
+        return {user_id: self.users[user_id] for user_id in user_ids if user_id in self.users}
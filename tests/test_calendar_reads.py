@@ -0,0 +1,104 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import database
+from fake_db import FakeDatabaseManager, FakeUserDirectory
+
+BASE = datetime(2025, 3, 1, 10)
+
+
+def promotion_row(promo_id):
+    return {
+        'id': promo_id, 'project': 'SOL', 'promo_type': 'Акция', 'promo_kind': '',
+        'start_date': BASE, 'end_date': BASE + timedelta(days=5), 'title': f'Промо {promo_id}',
+        'comment': 'c' * 500, 'segment': 'СНГ', 'link': '', 'responsible_id': 1
+    }
+
+
+def channel_row(promo_id, number):
+    return {
+        'id': promo_id * 100 + number, 'promo_id': promo_id, 'informing_type': 'PUSH',
+        'project': None if number % 2 else 'JET', 'start_date': BASE + timedelta(hours=number),
+        'title': 'Канал', 'comment': None, 'segment': 'СНГ', 'link': None
+    }
+
+
+def calendar_db(promo_count, channels_per_promo):
+    promotions = [promotion_row(promo_id) for promo_id in range(1, promo_count + 1)]
+
+    def respond(query, params):
+        if query.startswith('SELECT id, promo_id, informing_type'):
+            return [channel_row(promo_id, n) for promo_id in params for n in range(channels_per_promo)]
+        if 'FROM promotions' in query or 'month_promos' in query:
+            return promotions
+        return []
+
+    return FakeDatabaseManager(respond)
+
+
+@pytest.fixture(autouse=True)
+def users(monkeypatch):
+    monkeypatch.setattr(database, 'user_directory', FakeUserDirectory({1: {'login': 'ivan'}}))
+
+
+@pytest.mark.parametrize('channels_per_promo', [0, 5, 30])
+def test_month_read_is_two_narrow_queries(channels_per_promo):
+    db = calendar_db(promo_count=50, channels_per_promo=channels_per_promo)
+    promotions = database.PromoRepository(db).get_promotions_by_month('2025-03')
+
+    # Промо-акции — одной выборкой, каналы — второй; поля промо не повторяются в строках каналов
+    assert len(db.cursor.queries) == 2
+    assert not db.cursor.executed('JOIN informing')
+    assert db.cursor.rows_fetched == 50 + 50 * channels_per_promo
+    assert all(len(promo['info_channels']) == channels_per_promo for promo in promotions)
+
+
+def test_channels_are_attached_to_their_promo_with_project_fallback():
+    db = calendar_db(promo_count=2, channels_per_promo=2)
+    promotions = database.PromoRepository(db).get_promotions_by_month('2025-03')
+
+    first = promotions[0]
+    assert first['responsible_name'] == 'ivan'
+    assert [channel['id'] for channel in first['info_channels']] == [100, 101]
+    assert [channel['project'] for channel in first['info_channels']] == ['JET', 'SOL']
+    assert first['info_channels'][1]['comment'] == '' and first['info_channels'][1]['link'] == ''
+
+
+def test_channel_lookup_is_chunked(monkeypatch):
+    monkeypatch.setattr(database, 'INFORMING_IN_CHUNK_SIZE', 2)
+    db = calendar_db(promo_count=5, channels_per_promo=1)
+    promotions = database.PromoRepository(db).get_promotions_by_month('2025-03')
+
+    assert len(db.cursor.executed('FROM informing WHERE promo_id IN')) == 3
+    assert all(len(promo['info_channels']) == 1 for promo in promotions)
+
+
+def test_month_query_unions_promotions_and_informing_by_utc_date():
+    db = calendar_db(promo_count=1, channels_per_promo=0)
+    database.PromoRepository(db).get_promotions_by_month('2025-12')
+
+    (query, params), = db.cursor.executed('month_promos')
+    assert query.count('UNION') == 3
+    assert 'SELECT promo_id FROM informing WHERE start_date_utc >= %s AND start_date_utc < %s' in query
+    first_day, next_month = date(2025, 12, 1), date(2026, 1, 1)
+    assert params == (first_day, next_month, first_day, next_month, next_month, first_day, first_day, next_month)
+
+
+def test_ensure_schema_backfills_start_date_utc(monkeypatch):
+    def respond(query, params):
+        if 'information_schema.columns' in query:
+            return [(1,)]  # колонки уже есть
+        return []
+
+    db = FakeDatabaseManager(respond)
+    monkeypatch.setattr(database, 'db_manager', db)
+    monkeypatch.setattr(database, 'BUSINESS_TZ', '-05:00')
+    database.ensure_schema()
+
+    (query, params), = db.cursor.executed('UPDATE informing')
+    assert "SET start_date_utc = CONVERT_TZ(start_date, %s, '+00:00')" in query
+    assert 'start_date_utc IS NULL' in query
+    assert params == ('-05:00',)
+    assert not db.cursor.executed('ALTER TABLE')
+    assert db.connection.commits == 1
@@ -0,0 +1,77 @@
+from datetime import datetime
+
+import database
+from fake_db import FakeDatabaseManager
+
+START = datetime(2025, 3, 10, 12)
+
+
+def stored_channel(channel_id, **fields):
+    """Строка informing из БД (старые строки хранят NULL вместо пустых comment/link)"""
+    row = {
+        'id': channel_id, 'informing_type': 'PUSH', 'project': 'SOL', 'start_date': START,
+        'start_date_utc': database.to_utc(START), 'title': f'Канал {channel_id}', 'comment': None,
+        'segment': 'СНГ', 'promo_id': 7, 'link': None, 'insert_key': None
+    }
+    row.update(fields)
+    return row
+
+
+def request_channel(channel_id, **fields):
+    """Канал в том виде, в каком его присылает update_event"""
+    channel = {
+        'id': str(channel_id) if channel_id else None, 'type': 'PUSH', 'project': 'SOL',
+        'start_date': '2025-03-10 12:00:00', 'name': f'Канал {channel_id}', 'comment': '',
+        'segments': 'СНГ', 'link': ''
+    }
+    channel.update(fields)
+    return channel
+
+
+def sync(stored, channels):
+    def respond(query, params):
+        if 'FOR UPDATE' in query:
+            return stored
+        if query.startswith('SELECT id, insert_key'):
+            return [{'id': 900 + i, 'insert_key': key} for i, key in enumerate(params)]
+        return []
+
+    db = FakeDatabaseManager(respond)
+    result = database.InformingRepository(db).sync_promo_channels(7, channels)
+    return result, db.cursor
+
+
+def test_null_and_empty_strings_count_as_unchanged():
+    result, cursor = sync([stored_channel(1), stored_channel(2)], [request_channel(1), request_channel(2)])
+    assert result == {'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 2}
+    assert len(cursor.queries) == 1  # только SELECT ... FOR UPDATE
+
+
+def test_changes_are_applied_with_one_statement_each():
+    stored = [stored_channel(1), stored_channel(2), stored_channel(3)]
+    channels = [
+        request_channel(1),                          # без изменений
+        request_channel(2, comment='Новый текст'),  # изменён
+        request_channel(None, name='Новый канал'),   # создан
+        request_channel(3, start_date='2025-03-11 12:00:00'),
+    ]
+    result, cursor = sync(stored, channels)
+    assert result == {'created': 1, 'updated': 2, 'deleted': 0, 'unchanged': 1}
+
+    (upsert, params), = cursor.executed('ON DUPLICATE KEY UPDATE')
+    assert ' AS new ON DUPLICATE KEY UPDATE ' in upsert and 'VALUES(' not in upsert
+    assert 'comment = new.comment' in upsert
+    assert [params[0], params[10]] == [2, 3]  # id изменённых строк
+    assert len(cursor.executed('INSERT INTO informing (informing_type')) == 1
+
+
+def test_channels_missing_from_request_are_deleted():
+    result, cursor = sync([stored_channel(1), stored_channel(2), stored_channel(3)], [request_channel(2)])
+    assert result == {'created': 0, 'updated': 0, 'deleted': 2, 'unchanged': 1}
+    (delete, params), = cursor.executed('DELETE FROM informing')
+    assert params == (7, 1, 3)
+
+
+def test_foreign_or_repeated_ids_create_new_channels():
+    result, cursor = sync([stored_channel(1)], [request_channel(1), request_channel(1), request_channel(55)])
+    assert result == {'created': 2, 'updated': 0, 'deleted': 0, 'unchanged': 1}
@@ -0,0 +1,73 @@
+import pytest
+from mysql.connector import pooling
+
+import database
+
+
+class FakeConnection:
+    """Физическое соединение: считает ping'и (is_connected) и переподключения"""
+
+    def __init__(self, **config):
+        self.pings = 0
+        self.connected = True
+
+    def is_connected(self):
+        self.pings += 1
+        return self.connected
+
+    def config(self, **config):
+        pass
+
+    def reconnect(self):
+        self.connected = True
+
+    def reset_session(self):
+        pass
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(pooling, 'MYSQL_CNX_CLASS', (FakeConnection,))
+    monkeypatch.setattr(pooling, 'connect', lambda **config: FakeConnection(**config))
+    return database.IdleCheckingConnectionPool(idle_check_seconds=30, pool_name='test', pool_size=2, host='db')
+
+
+def idle_all(pool, seconds):
+    for cnx in list(pool._cnx_queue.queue):
+        cnx.pool_last_used -= seconds
+
+
+def test_fresh_connection_is_not_pinged_on_first_checkout(pool):
+    connection = pool.get_connection()
+    assert pool.stats == {'checkouts': 1, 'health_checks': 0, 'reconnects': 0, 'session_inits': 2}
+    assert connection._cnx.pings == 0
+
+
+def test_returned_connection_is_not_pinged_before_idle_threshold(pool):
+    pool.get_connection().close()
+    idle_all(pool, 10)
+    pool.get_connection()
+    assert pool.stats['health_checks'] == 0
+
+
+def test_idle_connection_is_pinged_and_reconnected_if_dropped(pool):
+    idle_all(pool, 60)
+    cnx = pool._cnx_queue.queue[0]
+    cnx.connected = False
+
+    pool.get_connection()
+    assert pool.stats['health_checks'] == 1
+    assert pool.stats['reconnects'] == 1
+    assert cnx.pings == 1
+
+
+def test_unknown_driver_internals_fall_back_to_ping_on_every_checkout(monkeypatch):
+    monkeypatch.setattr(pooling, 'MYSQL_CNX_CLASS', (FakeConnection,))
+    monkeypatch.setattr(pooling, 'connect', lambda **config: FakeConnection(**config))
+    monkeypatch.setattr(database.IdleCheckingConnectionPool, '_DRIVER_INTERNALS', ('_renamed_queue',))
+    pool = database.IdleCheckingConnectionPool(idle_check_seconds=30, pool_name='test', pool_size=2, host='db')
+
+    assert not pool.idle_check_supported
+    connection = pool.get_connection()
+    assert connection._cnx.pings == 1
+    assert pool.stats['health_checks'] == 1
@@ -0,0 +1,77 @@
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from utils import deadline_calc
+from utils.holiday_calendar import holiday_calendars
+
+SHIFTS = (-25, -7, -3, -2, -1, 0, 1, 2, 3, 7, 25)
+
+
+def random_datetimes(count, first, last, seed):
+    """Случайные даты со временем в [first, last]"""
+    rnd = random.Random(seed)
+    span = (last - first).days
+    return [
+        datetime.combine(first + timedelta(days=rnd.randint(0, span)), datetime.min.time())
+        + timedelta(minutes=rnd.randint(0, 1439))
+        for _ in range(count)
+    ]
+
+
+def assert_same_as_loop(value, days, country=None):
+    """Индекс рабочих дней даёт то же, что и прежние циклы по дням (включая тип результата)"""
+    expected = deadline_calc._add_workdays_iter(value, days, country)
+    result = deadline_calc.add_workdays(value, days, country)
+    assert result == expected and type(result) is type(expected), ('add_workdays', value, days, country)
+
+    expected = deadline_calc._check_day_iter(value, days, country)
+    result = deadline_calc.check_day(value, days, country)
+    assert result == expected and type(result) is type(expected), ('check_day', value, days, country)
+
+
+@pytest.mark.parametrize('country', [None, 'KZ', 'GB'])
+def test_index_matches_loop_on_random_dates(country):
+    rnd = random.Random(19)
+    for value in random_datetimes(1500, date(2020, 1, 1), date(2035, 12, 31), seed=str(country)):
+        for days in SHIFTS + (rnd.randint(-60, 60),):
+            assert_same_as_loop(value, days, country)
+
+
+def test_index_matches_loop_for_date_inputs():
+    for value in random_datetimes(500, date(2024, 1, 1), date(2026, 12, 31), seed=7):
+        for days in SHIFTS:
+            assert_same_as_loop(value.date(), days)
+
+
+def test_index_matches_loop_on_holidays_and_overrides():
+    # Новогодние каникулы, перенесённые выходные из holiday_calendars.json и обычные выходные
+    days_to_check = [date(2025, 1, 1) + timedelta(days=i) for i in range(14)]
+    days_to_check += [date(2025, 3, 1) + timedelta(days=i) for i in range(10)]
+    days_to_check += [date(2024, 11, 2) + timedelta(days=i) for i in range(4)]
+    for day in days_to_check:
+        for hour in (0, 14, 15, 23):
+            for days in SHIFTS:
+                assert_same_as_loop(datetime(day.year, day.month, day.day, hour, 30), days)
+
+
+def test_index_range_edges_fall_back_to_loop():
+    index = holiday_calendars.business_days()
+    first, last = date(index.first_year, 1, 1), date(index.last_year, 12, 31)
+    edges = [first + timedelta(days=i) for i in range(-10, 10)] + [last + timedelta(days=i) for i in range(-10, 10)]
+    for day in edges:
+        for days in SHIFTS + (-60, 60):
+            assert_same_as_loop(datetime(day.year, day.month, day.day, 12), days)
+
+
+def test_batch_matches_single_promo_calculation():
+    starts = random_datetimes(300, date(2024, 1, 1), date(2026, 12, 31), seed=20)
+    rnd = random.Random(20)
+    ends = [start + timedelta(days=rnd.randint(0, 30), hours=rnd.randint(0, 23)) for start in starts]
+    projects = [rnd.choice(['SOL', 'JET', 'IZZI']) for _ in starts]
+
+    columns = deadline_calc.deadline_calc_batch(projects, starts, ends)
+    for i, (project, start, end) in enumerate(zip(projects, starts, ends)):
+        expected = deadline_calc.deadline_calc_dict(project, start, end)
+        assert {key: values[i] for key, values in columns.items()} == expected
@@ -0,0 +1,151 @@
+import smtplib
+
+import pytest
+
+from utils.email_service import EmailService
+
+
+class FakeSMTP:
+    """smtplib.SMTP без сети: записывает команды, ошибки задаются заранее"""
+
+    instances = []
+
+    def __init__(self, host, port, timeout=None):
+        self.commands = []
+        self.sent = []
+        self.noop_code = 250
+        self.fail_next = []  # исключения для следующих sendmail
+        FakeSMTP.instances.append(self)
+
+    def starttls(self):
+        self.commands.append('STARTTLS')
+
+    def login(self, username, password):
+        self.commands.append('AUTH')
+
+    def noop(self):
+        self.commands.append('NOOP')
+        return self.noop_code, b'OK'
+
+    def sendmail(self, from_addr, to_addrs, msg):
+        if self.fail_next:
+            raise self.fail_next.pop(0)
+        self.sent.append(to_addrs)
+
+    def quit(self):
+        self.commands.append('QUIT')
+
+    def close(self):
+        self.commands.append('CLOSE')
+
+
+@pytest.fixture
+def service(monkeypatch):
+    FakeSMTP.instances = []
+    monkeypatch.setattr(smtplib, 'SMTP', FakeSMTP)
+    monkeypatch.setenv('SMTP_USERNAME', 'robot@example.com')
+    monkeypatch.setenv('SMTP_PASSWORD', 'secret')
+    monkeypatch.setenv('SMTP_NOOP_AFTER_SECONDS', '30')
+    monkeypatch.setenv('SMTP_MAX_IDLE_SECONDS', '240')
+    return EmailService()
+
+
+def idle_all(service, seconds):
+    service._idle_connections = [(server, last_used - seconds) for server, last_used in service._idle_connections]
+
+
+def messages(*recipients):
+    return [(to_email, 'Тема', 'Текст') for to_email in recipients]
+
+
+def test_connection_is_reused_across_messages_and_calls(service):
+    assert service.send_batch(messages('a@example.com', 'b@example.com')) == [True, True]
+    assert service._send_email('c@example.com', 'Тема', 'Текст')
+
+    server, = FakeSMTP.instances
+    assert server.sent == ['a@example.com', 'b@example.com', 'c@example.com']
+    assert server.commands == ['STARTTLS', 'AUTH']
+    assert service.stats == {'connects': 1, 'reuses': 1, 'noops': 0, 'reconnects': 0}
+
+
+def test_noop_only_after_noop_after_seconds(service):
+    service.send_batch(messages('a@example.com'))
+    idle_all(service, 10)
+    service.send_batch(messages('b@example.com'))
+    server, = FakeSMTP.instances
+    assert 'NOOP' not in server.commands
+
+    idle_all(service, 60)
+    service.send_batch(messages('c@example.com'))
+    assert server.commands.count('NOOP') == 1
+    assert service.stats['noops'] == 1
+    assert len(FakeSMTP.instances) == 1
+
+
+def test_failed_noop_opens_a_new_connection(service):
+    service.send_batch(messages('a@example.com'))
+    stale, = FakeSMTP.instances
+    stale.noop_code = 421
+    idle_all(service, 60)
+
+    assert service.send_batch(messages('b@example.com')) == [True]
+    fresh = FakeSMTP.instances[1]
+    assert fresh.sent == ['b@example.com']
+    assert stale.commands[-1] == 'QUIT'
+    assert service.stats['reconnects'] == 1
+
+
+def test_connection_idle_past_max_idle_seconds_is_closed(service):
+    service.send_batch(messages('a@example.com'))
+    idle_all(service, 300)
+    service.send_batch(messages('b@example.com'))
+
+    stale, fresh = FakeSMTP.instances
+    assert stale.commands == ['STARTTLS', 'AUTH', 'QUIT']
+    assert fresh.sent == ['b@example.com']
+    assert service.stats['noops'] == 0
+
+
+def test_disconnect_is_retried_once_on_a_new_connection(service):
+    service.send_batch(messages('a@example.com'))
+    dropped, = FakeSMTP.instances
+    dropped.fail_next = [smtplib.SMTPServerDisconnected('Connection unexpectedly closed')]
+
+    assert service.send_batch(messages('b@example.com', 'c@example.com')) == [True, True]
+    fresh = FakeSMTP.instances[1]
+    assert fresh.sent == ['b@example.com', 'c@example.com']
+    assert service.stats['reconnects'] == 1
+
+
+def test_second_disconnect_fails_the_message(service, monkeypatch):
+    original_connect = service._connect
+
+    def connect_dropping():
+        server = original_connect()
+        server.fail_next = [smtplib.SMTPServerDisconnected('Connection unexpectedly closed')]
+        return server
+
+    monkeypatch.setattr(service, '_connect', connect_dropping)
+    assert service.send_batch(messages('a@example.com')) == [False]
+    assert len(FakeSMTP.instances) == 2
+    assert service._idle_connections == []
+
+
+def test_rejected_recipient_keeps_the_session(service):
+    service.send_batch(messages('a@example.com'))
+    server, = FakeSMTP.instances
+    server.fail_next = [smtplib.SMTPRecipientsRefused({'bad@example.com': (550, b'No such user')})]
+
+    assert service.send_batch(messages('bad@example.com', 'b@example.com')) == [False, True]
+    assert len(FakeSMTP.instances) == 1
+    assert server.sent == ['a@example.com', 'b@example.com']
+    assert 'QUIT' not in server.commands
+    assert len(service._idle_connections) == 1
+
+
+def test_close_sends_quit_to_pooled_connections(service):
+    service.send_batch(messages('a@example.com'))
+    service.close()
+    server, = FakeSMTP.instances
+    assert server.commands[-1] == 'QUIT'
+    assert service._idle_connections == []
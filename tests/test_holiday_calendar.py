@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from utils.holiday_calendar import HolidayCalendarRegistry, holiday_calendars
+
+
+def write_config(tmp_path, config):
+    path = tmp_path / 'holiday_calendars.json'
+    path.write_text(json.dumps(config) if isinstance(config, dict) else config, encoding='utf-8')
+    return str(path)
+
+
+def test_shipped_config_is_valid():
+    registry = HolidayCalendarRegistry(holiday_calendars.path)
+    assert registry.default_country == 'RU'
+    assert registry.country_for_project('SOL') == 'RU'
+
+
+def test_language_codes_are_translated_to_countries(tmp_path):
+    registry = HolidayCalendarRegistry(write_config(tmp_path, {
+        'projects': {'SOL': 'EN', 'JET': 'kz'},
+        'countries': {'EN': {'add': {'2025-06-02': 'корпоратив'}}}
+    }))
+    assert registry.projects == {'SOL': 'GB', 'JET': 'KZ'}
+    assert list(registry.overrides) == ['GB']
+
+
+@pytest.mark.parametrize('config, problem', [
+    ({'default_country': 'XX'}, 'default_country: XX'),
+    ({'projects': {'SOL': 'QQ'}}, 'projects.SOL: QQ'),
+    ({'countries': {'ZZ': {}}}, 'countries: ZZ'),
+    ({'countries': {'RU': {'add': {'2025-13-01': 'x'}}}}, "countries.RU: дата '2025-13-01'"),
+    ({'countries': {'RU': {'remove': ['01.05.2025']}}}, "countries.RU: дата '01.05.2025'"),
+    ('{not json', 'Ошибка чтения'),
+])
+def test_invalid_config_is_rejected_on_load(tmp_path, config, problem):
+    with pytest.raises(ValueError, match=problem):
+        HolidayCalendarRegistry(write_config(tmp_path, config))
+
+
+def test_rejected_reload_keeps_previous_config(tmp_path):
+    path = write_config(tmp_path, {'projects': {'SOL': 'KZ'}})
+    registry = HolidayCalendarRegistry(path)
+    write_config(tmp_path, {'projects': {'SOL': 'EN1'}})
+
+    with pytest.raises(ValueError):
+        registry.reload()
+    assert registry.country_for_project('SOL') == 'KZ'
+    assert registry.version == 0
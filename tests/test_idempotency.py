@@ -0,0 +1,169 @@
+import asyncio
+
+import pytest
+
+from utils import idempotency
+from utils.idempotency import IdempotencyKeyMismatch, IdempotencyStore, request_fingerprint
+
+
+class Handler:
+    """Обработчик создания, считающий реальные выполнения"""
+
+    def __init__(self, result='created', error=None, delay=0):
+        self.calls = 0
+        self.result, self.error, self.delay = result, error, delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {'id': self.calls, 'result': self.result}
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_fingerprint_ignores_key_order():
+    assert request_fingerprint({'a': 1, 'b': [1, 2]}) == request_fingerprint({'b': [1, 2], 'a': 1})
+    assert request_fingerprint({'a': 1}) != request_fingerprint({'a': 2})
+
+
+def test_retry_with_same_key_returns_stored_response():
+    store, handler = IdempotencyStore(), Handler()
+
+    async def scenario():
+        first = await store.run('create_event', 'key-1', 'fp', handler)
+        second = await store.run('create_event', 'key-1', 'fp', handler)
+        return first, second
+
+    first, second = run(scenario())
+    assert first == second == {'id': 1, 'result': 'created'}
+    assert handler.calls == 1
+    assert (store.hits, store.misses) == (1, 1)
+
+
+def test_requests_without_key_or_in_other_scope_always_run():
+    store, handler = IdempotencyStore(), Handler()
+
+    async def scenario():
+        await store.run('create_event', None, 'fp', handler)
+        await store.run('create_event', None, 'fp', handler)
+        await store.run('create_event', 'key-1', 'fp', handler)
+        await store.run('create_channel', 'key-1', 'fp', handler)
+
+    run(scenario())
+    assert handler.calls == 4
+
+
+def test_same_key_with_different_body_is_rejected():
+    store, handler = IdempotencyStore(), Handler()
+
+    async def scenario():
+        await store.run('create_event', 'key-1', 'fp-1', handler)
+        await store.run('create_event', 'key-1', 'fp-2', handler)
+
+    with pytest.raises(IdempotencyKeyMismatch):
+        run(scenario())
+    assert handler.calls == 1
+
+
+def test_concurrent_retry_waits_for_first_request():
+    store, handler = IdempotencyStore(), Handler(delay=0.05)
+
+    async def scenario():
+        return await asyncio.gather(*(store.run('create_event', 'key-1', 'fp', handler) for _ in range(3)))
+
+    results = run(scenario())
+    assert handler.calls == 1
+    assert results == [{'id': 1, 'result': 'created'}] * 3
+
+
+def test_errors_are_not_cached():
+    store = IdempotencyStore()
+    failing, succeeding = Handler(error=RuntimeError('db down')), Handler()
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await store.run('create_event', 'key-1', 'fp', failing)
+        return await store.run('create_event', 'key-1', 'fp', succeeding)
+
+    assert run(scenario()) == {'id': 1, 'result': 'created'}
+    assert (failing.calls, succeeding.calls) == (1, 1)
+
+
+def test_entry_expires_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(idempotency.time, 'monotonic', lambda: now[0])
+    store, handler = IdempotencyStore(ttl=60), Handler()
+
+    async def scenario():
+        await store.run('create_event', 'key-1', 'fp', handler)
+        now[0] += 61
+        await store.run('create_event', 'key-1', 'fp', handler)
+
+    run(scenario())
+    assert handler.calls == 2
+
+
+def test_expired_entries_are_evicted_despite_hits_and_requests_in_flight(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(idempotency.time, 'monotonic', lambda: now[0])
+    store, handler, slow = IdempotencyStore(ttl=60), Handler(), Handler(delay=0.05)
+
+    async def scenario():
+        in_flight = asyncio.ensure_future(store.run('create_event', 'slow', 'fp', slow))
+        await asyncio.sleep(0)
+        await store.run('create_event', 'key-1', 'fp', handler)
+        await store.run('create_event', 'key-2', 'fp', handler)
+        now[0] += 30
+        await store.run('create_event', 'key-1', 'fp', handler)  # повтор не продлевает срок и не переставляет запись
+        now[0] += 31
+        await store.run('create_event', 'key-3', 'fp', handler)
+        keys = [key for _, key in store._entries]
+        await in_flight
+        return keys
+
+    # key-1 и key-2 истекли и удалены, хотя перед ними висит ещё выполняющийся запрос
+    assert run(scenario()) == ['slow', 'key-3']
+    assert handler.calls == 3
+
+
+def test_oldest_key_is_evicted_when_full():
+    store, handler = IdempotencyStore(max_size=2), Handler()
+
+    async def scenario():
+        for key in ('key-1', 'key-2', 'key-3', 'key-1'):
+            await store.run('create_event', key, 'fp', handler)
+
+    run(scenario())
+    assert handler.calls == 4
+
+
+def test_create_event_retry_creates_promo_once(monkeypatch):
+    from fastapi.testclient import TestClient
+    import main
+
+    class Repo:
+        bundles = 0
+
+        async def create_promotions_bundle(self, promotions_data, notification_type=None):
+            Repo.bundles += 1
+            return list(range(1, len(promotions_data) + 1))
+
+    repo = Repo()
+    monkeypatch.setattr(main, 'get_repos', lambda: (repo, repo, repo, repo))
+    monkeypatch.setattr(main, 'idempotency_store', IdempotencyStore())
+    client = TestClient(main.app)
+    body = {'project': ['SOL'], 'promo_type': 'Акция', 'name': 'Промо',
+            'start_date': '2025-03-10', 'end_date': '2025-03-12'}
+
+    first = client.post('/api/events', json=body, headers={'Idempotency-Key': 'retry-1'})
+    second = client.post('/api/events', json=body, headers={'Idempotency-Key': 'retry-1'})
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert Repo.bundles == 1
+
+    changed = client.post('/api/events', json={**body, 'name': 'Другое'}, headers={'Idempotency-Key': 'retry-1'})
+    assert changed.status_code == 422
@@ -0,0 +1,180 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from utils import month_cache
+from utils.month_cache import MonthCache, events_cache, informing_months, months_between
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(month_cache.time, 'monotonic', fake)
+    return fake
+
+
+def test_set_and_get(clock):
+    cache = MonthCache(ttl=300)
+    assert cache.get('2025-03') is None
+    etag = cache.set('2025-03', b'{"events":[]}', cache.version('2025-03'))
+    assert cache.get('2025-03') == (etag, b'{"events":[]}')
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entry_expires_after_ttl(clock):
+    cache = MonthCache(ttl=300)
+    cache.set('2025-03', b'{}', cache.version('2025-03'))
+    clock.now += 299
+    assert cache.get('2025-03') is not None
+    clock.now += 2
+    assert cache.get('2025-03') is None
+
+
+def test_least_recently_used_month_is_evicted(clock):
+    cache = MonthCache(max_size=2)
+    for month in ('2025-01', '2025-02'):
+        cache.set(month, b'{}', cache.version(month))
+    cache.get('2025-01')
+    cache.set('2025-03', b'{}', cache.version('2025-03'))
+    assert cache.get('2025-02') is None
+    assert cache.get('2025-01') is not None and cache.get('2025-03') is not None
+
+
+def test_invalidate_drops_only_given_months(clock):
+    cache = MonthCache()
+    for month in ('2025-01', '2025-02'):
+        cache.set(month, b'{}', cache.version(month))
+    cache.invalidate(['2025-01', None])
+    assert cache.get('2025-01') is None
+    assert cache.get('2025-02') is not None
+
+
+def test_read_racing_with_invalidate_is_not_stored(clock):
+    cache = MonthCache()
+    version = cache.version('2025-03')  # чтение из БД началось
+    cache.invalidate(['2025-03'])       # конкурентная запись в месяц
+    cache.set('2025-03', b'stale', version)
+    assert cache.get('2025-03') is None
+
+    cache.set('2025-03', b'fresh', cache.version('2025-03'))
+    assert cache.get('2025-03')[1] == b'fresh'
+
+
+def test_read_racing_with_clear_is_not_stored(clock):
+    cache = MonthCache()
+    version = cache.version('2025-03')
+    cache.clear()
+    cache.set('2025-03', b'stale', version)
+    assert cache.get('2025-03') is None
+
+
+def test_months_between_spans_year_boundary():
+    assert months_between('2024-11-20', '2025-02-01T10:00:00Z') == ['2024-11', '2024-12', '2025-01', '2025-02']
+    assert months_between('2025-03-10', None) == ['2025-03']
+    assert months_between(None) == []
+
+
+def test_informing_on_first_day_touches_previous_month():
+    moscow = timedelta(hours=3)
+    assert informing_months('2025-03-01 01:00:00', moscow) == {'2025-03', '2025-02'}
+    assert informing_months('2025-03-01 04:00:00', moscow) == {'2025-03'}
+    assert informing_months('2025-03-15', moscow) == {'2025-03'}
+
+
+def test_informing_on_last_day_touches_next_month_for_negative_offset():
+    new_york = -timedelta(hours=5)
+    assert informing_months('2025-03-31 22:00:00', new_york) == {'2025-03', '2025-04'}
+    assert informing_months(datetime(2025, 3, 31, 18), new_york) == {'2025-03'}
+    assert informing_months('2025-03-01 01:00:00', new_york) == {'2025-03'}
+    # Без времени — оба края дня
+    assert informing_months('2025-03-31', new_york) == {'2025-03', '2025-04'}
+
+
+class FakeRepo:
+    """Асинхронные репозитории календаря с подсчётом обращений к «БД»"""
+
+    def __init__(self):
+        self.reads = 0
+        self.promotions = []
+
+    async def get_promotions_by_month(self, month):
+        self.reads += 1
+        return list(self.promotions)
+
+    async def get_occurrences_by_month(self, month):
+        return []
+
+    async def create_promotions_bundle(self, promotions_data, notification_type=None):
+        self.promotions.append({'id': '1', 'name': promotions_data[0]['name'], 'start_date': '2025-03-10T10:00:00Z'})
+        return [1]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    repo = FakeRepo()
+    monkeypatch.setattr(main, 'get_repos', lambda: (repo, repo, repo, repo))
+    events_cache.clear()
+    yield TestClient(main.app), repo
+    events_cache.clear()
+
+
+def test_events_month_is_served_from_cache_until_a_write(client):
+    client, repo = client
+    assert client.get('/api/events?month=2025-03').json() == {'events': []}
+    client.get('/api/events?month=2025-03')
+    assert repo.reads == 1
+
+    response = client.post('/api/events', json={
+        'project': ['SOL'], 'promo_type': 'Акция', 'name': 'Весна',
+        'start_date': '2025-03-10 10:00:00', 'end_date': '2025-03-12 10:00:00'
+    })
+    assert response.status_code == 200
+
+    events = client.get('/api/events?month=2025-03').json()['events']
+    assert repo.reads == 2
+    assert [event['name'] for event in events] == ['Весна']
+
+
+def test_etag_is_stable_across_rebuilds_and_workers(clock):
+    worker_a, worker_b = MonthCache(ttl=300), MonthCache(ttl=300)
+    etag = worker_a.set('2025-03', b'{"events":[]}', worker_a.version('2025-03'))
+    clock.now += 301  # пересборка после TTL с теми же данными
+    assert worker_a.get('2025-03') is None
+    assert worker_a.set('2025-03', b'{"events":[]}', worker_a.version('2025-03')) == etag
+    assert worker_b.set('2025-03', b'{"events":[]}', worker_b.version('2025-03')) == etag
+    assert worker_b.set('2025-03', b'{"events":[1]}', worker_b.version('2025-03')) != etag
+
+
+def test_events_not_modified_until_data_changes(client):
+    client, repo = client
+    etag = client.get('/api/events?month=2025-03').headers['ETag']
+    events_cache.clear()  # другой воркер / истёкший TTL: ответ собирается заново
+
+    response = client.get('/api/events?month=2025-03', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert repo.reads == 2
+
+    repo.promotions.append({'id': '1', 'name': 'Весна', 'start_date': '2025-03-10T10:00:00Z'})
+    events_cache.invalidate(['2025-03'])
+    response = client.get('/api/events?month=2025-03', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+@pytest.mark.parametrize('url', ['/api/events?month=2025-13', '/api/standalone-channels?month=март'])
+def test_invalid_month_is_a_client_error(client, url):
+    client, repo = client
+    response = client.get(url)
+    assert response.status_code == 400
+    assert 'YYYY-MM' in response.json()['detail']
+    assert repo.reads == 0
@@ -0,0 +1,145 @@
+import asyncio
+import json
+
+import pytest
+
+import database
+from fake_db import FakeDatabaseManager, FakeUserDirectory
+from utils import notification_outbox
+from utils.email_service import email_service
+from utils.notification_outbox import NotificationOutboxWorker
+
+USERS = {1: {'login': 'ivan', 'mail': 'ivan@example.com'}, 2: {'login': 'olga', 'mail': 'olga@example.com'}}
+
+
+def outbox_row(notification_id, recipient_id, promo_name, notification_type='assignment', attempts=0):
+    return {
+        'id': notification_id, 'recipient_id': recipient_id, 'promo_id': notification_id,
+        'notification_type': notification_type, 'attempts': attempts,
+        'payload': json.dumps({'promo_name': promo_name, 'project': 'SOL', 'promo_type': 'Акция',
+                               'start_date': '2025-03-10', 'end_date': '2025-03-12', 'changed_by': 'admin'})
+    }
+
+
+def test_enqueued_notifications_wait_for_the_coalesce_window(monkeypatch):
+    monkeypatch.setattr(database, 'NOTIFICATION_COALESCE_SECONDS', 60)
+    db = FakeDatabaseManager()
+    database._enqueue_notifications(db.cursor, [
+        database._outbox_values(5, {'responsible_id': 1, 'name': 'Промо'}, 'assignment'),
+        database._outbox_values(6, {'responsible_id': 1, 'name': 'Другое'}, 'update'),
+    ])
+
+    (query, params), = db.cursor.queries
+    assert query.count('UTC_TIMESTAMP() + INTERVAL %s SECOND') == 2
+    assert params[4] == params[9] == 60
+    assert json.loads(params[3])['promo_name'] == 'Промо'
+
+
+def test_claim_batch_takes_all_pending_rows_of_due_recipients(monkeypatch):
+    monkeypatch.setattr(database, 'user_directory', FakeUserDirectory(USERS))
+    pending = [outbox_row(1, 1, 'Промо'), outbox_row(2, 1, 'Другое')]
+
+    def respond(query, params):
+        if query.startswith('SELECT recipient_id'):
+            return [{'recipient_id': 1}]  # готово только первое уведомление получателя
+        if query.startswith('SELECT id, recipient_id'):
+            return [dict(row) for row in pending]
+        return []
+
+    db = FakeDatabaseManager(respond)
+    rows = database.NotificationOutboxRepository(db).claim_batch(limit=20, lease_seconds=300)
+
+    select_all, = db.cursor.executed('WHERE recipient_id IN')
+    assert 'attempts = 0' in select_all[0] and 'SKIP LOCKED' in select_all[0]
+    assert select_all[1] == (1,)
+    (lease, lease_params), = db.cursor.executed('UPDATE notification_outbox')
+    assert lease_params == (300, 1, 2)
+
+    assert [row['id'] for row in rows] == [1, 2]
+    assert rows[0]['mail'] == 'ivan@example.com' and rows[0]['payload']['promo_name'] == 'Промо'
+    assert all(row['attempts'] == 1 for row in rows)
+
+
+class FakeOutboxRepo:
+    def __init__(self, rows):
+        self.rows = rows
+        self.sent, self.retried, self.failed = [], [], []
+
+    async def claim_batch(self, limit, lease_seconds):
+        return self.rows
+
+    async def mark_sent(self, ids):
+        self.sent.extend(ids)
+
+    async def mark_retry(self, notification_id, error, delay):
+        self.retried.append((notification_id, delay))
+
+    async def mark_failed(self, notification_id, error, status='failed'):
+        self.failed.append((notification_id, status))
+
+
+def claimed(notification_id, recipient_id, promo_name, notification_type='assignment', attempts=1):
+    row = outbox_row(notification_id, recipient_id, promo_name, notification_type, attempts)
+    return {**row, **USERS[recipient_id], 'payload': json.loads(row['payload'])}
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    sent_messages = []
+    results = []
+
+    def send_batch(messages):
+        sent_messages.extend(messages)
+        return results.pop(0) if results else [True] * len(messages)
+
+    monkeypatch.setattr(email_service, 'enabled', True)
+    monkeypatch.setattr(email_service, 'send_batch', send_batch)
+
+    def use(rows):
+        repo = FakeOutboxRepo(rows)
+        monkeypatch.setattr(notification_outbox, 'get_outbox_repository', lambda: repo)
+        return repo
+
+    return use, sent_messages, results
+
+
+def test_worker_sends_one_digest_per_recipient(outbox):
+    use, sent_messages, _ = outbox
+    repo = use([
+        claimed(1, 1, 'Весна'), claimed(2, 1, 'Лето', 'update'), claimed(3, 1, 'Осень'),
+        claimed(4, 2, 'Зима'),
+    ])
+
+    processed = asyncio.run(NotificationOutboxWorker().process_batch())
+
+    assert processed == 4
+    assert sorted(repo.sent) == [1, 2, 3, 4]
+    assert [mail for mail, _, _ in sent_messages] == ['ivan@example.com', 'olga@example.com']
+    digest_subject, digest_body = sent_messages[0][1:]
+    assert digest_subject.endswith('(3)')
+    assert 'Весна' in digest_body and 'Лето' in digest_body and 'Осень' in digest_body
+    assert 'Зима' in sent_messages[1][1]
+
+
+def test_failed_digest_retries_every_notification_in_it(outbox):
+    use, _, results = outbox
+    results.append([False, True])
+    repo = use([claimed(1, 1, 'Весна'), claimed(2, 1, 'Лето', attempts=8), claimed(3, 2, 'Зима')])
+
+    worker = NotificationOutboxWorker(max_attempts=8)
+    asyncio.run(worker.process_batch())
+
+    assert repo.sent == [3]
+    assert repo.retried == [(1, worker.backoff(1))]
+    assert repo.failed == [(2, 'failed')]
+
+
+def test_recipient_without_email_is_skipped(outbox):
+    use, sent_messages, _ = outbox
+    row = {**claimed(1, 1, 'Весна'), 'mail': None}
+    repo = use([row, claimed(2, 2, 'Зима')])
+
+    asyncio.run(NotificationOutboxWorker().process_batch())
+
+    assert repo.failed == [(1, 'skipped')]
+    assert repo.sent == [2] and len(sent_messages) == 1
@@ -0,0 +1,183 @@
+import itertools
+from datetime import date
+
+import pytest
+from pydantic import ValidationError
+
+import database
+import main
+from fake_db import FakeDatabaseManager, FakeUserDirectory
+
+
+def insert_db():
+    """БД, которая выдаёт id вставленных строк по ключам корреляции (в обратном порядке, с разрывами)"""
+    next_id = itertools.count(100, 7)
+
+    def respond(query, params):
+        if query.startswith('SELECT id, insert_key'):
+            return [{'id': next(next_id), 'insert_key': key} for key in reversed(params)]
+        return []
+
+    return FakeDatabaseManager(respond)
+
+
+@pytest.fixture(autouse=True)
+def users(monkeypatch):
+    monkeypatch.setattr(database, 'user_directory', FakeUserDirectory())
+
+
+def occurrence_values(db):
+    query, params = db.cursor.executed('INSERT INTO promotion_occurrences')[0]
+    columns = query.split('(')[1].split(')')[0].split(', ')
+    rows = [params[i:i + len(columns)] for i in range(0, len(params), len(columns))]
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def test_bundle_scopes_client_occurrence_keys_per_promo():
+    db = insert_db()
+    occurrences = [
+        {'occurrence_start': '2025-03-10', 'occurrence_end': '2025-03-11', 'occurrence_key': 'week-1'},
+        {'occurrence_start': '2025-03-17 10:00:00', 'occurrence_end': '2025-03-18'},
+    ]
+    promo_ids = database.PromoRepository(db).create_promotions_bundle([
+        {'project': project, 'name': 'Промо', 'start_date': '2025-03-10', 'end_date': '2025-03-18',
+         'occurrences': occurrences}
+        for project in ('SOL', 'JET')
+    ])
+
+    keys = [row['occurrence_key'] for row in occurrence_values(db)]
+    assert keys == [
+        f'{promo_ids[0]}#week-1', f'{promo_ids[0]}#20250317100000',
+        f'{promo_ids[1]}#week-1', f'{promo_ids[1]}#20250317100000',
+    ]
+    # id вхождений читаются по insert_key, а не по ключу от клиента
+    assert db.cursor.executed('SELECT id, insert_key FROM promotion_occurrences')
+    assert not db.cursor.executed('WHERE occurrence_key IN')
+
+
+def event(**fields):
+    return dict(project=['SOL', 'JET'], promo_type='Акция', name='Промо',
+                start_date='2025-03-10', end_date='2025-03-18', **fields)
+
+
+def test_duplicate_occurrence_keys_are_rejected():
+    with pytest.raises(ValidationError, match='Повторяющийся ключ вхождения: k'):
+        main.PromoEventCreate(**event(occurrences=[
+            {'occurrence_start': '2025-03-10', 'occurrence_end': '2025-03-11', 'occurrence_key': 'k'},
+            {'occurrence_start': '2025-03-17', 'occurrence_end': '2025-03-18', 'occurrence_key': 'k'},
+        ]))
+
+
+def test_occurrences_with_same_start_and_no_key_are_rejected():
+    with pytest.raises(ValidationError, match='20250310100000'):
+        main.PromoEventCreate(**event(occurrences=[
+            {'occurrence_start': '2025-03-10T10:00:00Z', 'occurrence_end': '2025-03-11'},
+            {'occurrence_start': '2025-03-10 10:00:00', 'occurrence_end': '2025-03-12'},
+        ]))
+
+
+@pytest.mark.parametrize('field', ['occurrence_start', 'occurrence_end'])
+def test_unparseable_occurrence_date_is_rejected(field):
+    occurrence = {'occurrence_start': '2025-03-10', 'occurrence_end': '2025-03-11', field: '10.03.2025'}
+    with pytest.raises(ValidationError, match='Дата должна быть в формате'):
+        main.PromoEventCreate(**event(occurrences=[occurrence]))
+
+
+def test_insert_rows_returns_ids_in_input_order_for_non_contiguous_ids():
+    db = insert_db()  # id выдаются в обратном порядке ключей и с шагом 7
+    ids = database._insert_rows(db.cursor, 'promotions', ('project', 'title'), [('SOL', 'a'), ('JET', 'b'), ('IZZI', 'c')])
+
+    (insert_query, insert_params), = db.cursor.executed('INSERT INTO promotions')
+    assert insert_query.startswith('INSERT INTO promotions (project, title, insert_key) VALUES (%s, %s, %s), ')
+    keys = insert_params[2::3]
+    assert len(set(keys)) == 3
+
+    # Строке i соответствует id, выданный базой именно для её ключа
+    (_, select_params), = db.cursor.executed('SELECT id, insert_key FROM promotions')
+    id_by_key = {key: 100 + 7 * position for position, key in enumerate(reversed(select_params))}
+    assert ids == [id_by_key[key] for key in keys]
+    assert ids == [114, 107, 100]
+
+
+def test_insert_rows_uses_key_column_from_values():
+    db = FakeDatabaseManager(lambda query, params: [
+        {'id': 10 + i, 'occurrence_key': key} for i, key in enumerate(params)
+    ] if query.startswith('SELECT') else [])
+    ids = database._insert_rows(
+        db.cursor, 'promotion_occurrences', ('promo_id', 'occurrence_key'), [(1, '1#a'), (1, '1#b')],
+        key_column='occurrence_key'
+    )
+    assert ids == [10, 11]
+    assert 'insert_key' not in db.cursor.queries[0][0]
+
+
+def test_insert_rows_reads_ids_back_in_chunks(monkeypatch):
+    monkeypatch.setattr(database, 'INFORMING_IN_CHUNK_SIZE', 2)
+    db = insert_db()
+    ids = database._insert_rows(db.cursor, 'informing', ('title',), [('a',), ('b',), ('c',)])
+    assert len(db.cursor.executed('INSERT INTO informing')) == 1
+    assert len(db.cursor.executed('SELECT id, insert_key FROM informing')) == 2
+    assert len(set(ids)) == 3
+
+
+def test_insert_rows_without_rows_does_nothing():
+    db = insert_db()
+    assert database._insert_rows(db.cursor, 'informing', ('title',), []) == []
+    assert db.cursor.queries == []
+
+
+def deadline_rows(db):
+    (query, params), = db.cursor.executed('INSERT INTO promo_deadlines')
+    return [tuple(params[i:i + 3]) for i in range(0, len(params), 3)]
+
+
+def test_create_writes_deadlines_in_the_same_transaction_without_output(capsys):
+    db = insert_db()
+    promo_ids = database.PromoRepository(db).create_promotions_bundle([
+        {'project': project, 'name': 'Промо', 'start_date': '2025-03-10T10:00:00Z', 'end_date': '2025-03-20 16:00:00'}
+        for project in ('SOL', 'JET')
+    ])
+
+    rows = deadline_rows(db)
+    kinds = {kind for _, kind, _ in rows}
+    assert {promo_id for promo_id, _, _ in rows} == set(promo_ids)
+    assert len(rows) == 2 * len(kinds)
+    assert (promo_ids[0], 'local_task', date(2025, 3, 6)) in rows
+    assert (promo_ids[0], 'end_news_placement', date(2025, 3, 21)) in rows
+    assert capsys.readouterr().out == ''
+
+
+def test_update_replaces_deadlines():
+    db = insert_db()
+    database.PromoRepository(db).update_promotion(
+        7, {'project': 'SOL', 'name': 'Промо', 'start_date': '2025-03-17 10:00:00', 'end_date': '2025-03-18 10:00:00'}
+    )
+    (delete, params), = db.cursor.executed('DELETE FROM promo_deadlines')
+    assert params == (7,)
+    assert (7, 'master_task', date(2025, 3, 17)) in deadline_rows(db)
+
+
+def test_promo_with_unusable_dates_is_saved_without_deadlines():
+    db = insert_db()
+    database.PromoRepository(db).update_promotion(7, {'project': 'SOL', 'name': 'Промо', 'start_date': None})
+    assert db.cursor.executed('UPDATE promotions')
+    assert db.cursor.executed('DELETE FROM promo_deadlines')
+    assert not db.cursor.executed('INSERT INTO promo_deadlines')
+
+
+def test_deadlines_due_is_one_range_query(monkeypatch):
+    monkeypatch.setattr(database, 'user_directory', FakeUserDirectory({4: {'login': 'ivan'}}))
+    db = FakeDatabaseManager(lambda query, params: [{
+        'promo_id': 3, 'kind': 'news_deadline', 'due_date': date(2025, 3, 5), 'project': 'SOL',
+        'title': 'Промо', 'start_date': None, 'responsible_id': 4
+    }] if 'FROM promo_deadlines' in query else [])
+
+    deadlines = database.PromoRepository(db).get_deadlines_due(date(2025, 3, 3), date(2025, 3, 10), ['news_deadline'])
+
+    (query, params), = db.cursor.queries
+    assert 'd.due_date >= %s AND d.due_date < %s AND d.kind IN (%s)' in query
+    assert params == (date(2025, 3, 3), date(2025, 3, 10), 'news_deadline')
+    assert deadlines == [{
+        'promo_id': '3', 'kind': 'news_deadline', 'due_date': '2025-03-05', 'project': 'SOL',
+        'name': 'Промо', 'start_date': '', 'responsible_id': 4, 'responsible_name': 'ivan'
+    }]
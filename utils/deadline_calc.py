@@ -1,186 +1,424 @@
-import holidays.countries
-import pandas as pd
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
 
-def custom_holiday():
-    custom_holidays = holidays.Russia()
-    custom_holidays.append({"2025-03-01":"may pr","2025-03-02":"may pr","2025-03-08":"may pr","2025-03-09":"may pr","2024-11-04":"may pr"})
-    return custom_holidays
+from utils.holiday_calendar import holiday_calendars
+
+# holidays и numpy импортируются лениво: модуль подключается при старте
+# приложения, а календарь праздников нужен только при первом расчёте сроков
+
+def custom_holiday(country=None):
+    return holiday_calendars.calendar(country)
+
+
+def holidays_changed():
+    """Перечитать календари праздников; индексы рабочих дней и кэш сроков сбрасываются"""
+    holiday_calendars.reload()
+
+
+class DeadlineMemo:
+    """
+    Ограниченный LRU-кэш результатов deadline_calc_dict.
+
+    Сроки зависят только от (проект, старт, окончание) и календаря праздников,
+    а планировщики повторно отправляют одни и те же даты, пока правят поля
+    промо. Версия реестра календарей входит в ключ, поэтому после
+    holidays_changed() старые записи не используются.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(result)
+            self.misses += 1
+
+        result = compute()
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return dict(result)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'calendar_version': holiday_calendars.version,
+            }
+
+
+deadline_memo = DeadlineMemo(max_size=int(os.getenv('DEADLINE_CACHE_SIZE', '1024')))
+holiday_calendars.on_change(deadline_memo.clear)
+
+# Форматы дат в ответе deadline_calc_dict: позиции символов в "YYYY-MM-DD"
+_DATE_FORMATS = {
+    '%Y-%m-%d': None,
+    '%d-%m-%Y': (8, 9, '-', 5, 6, '-', 0, 1, 2, 3),
+    '%d/%m': (8, 9, '/', 5, 6),
+}
+
+# Ключи deadline_calc_dict: (дата, формат)
+_DEADLINE_FIELDS = (
+    ("master_task", 'master_task', '%Y-%m-%d'),
+    ("master_task_d", 'master_task', '%d/%m'),
+    ("local_task", 'local_task', '%Y-%m-%d'),
+    ("text_task", 'text_task', '%Y-%m-%d'),
+    ("local_task_d", 'local_task', '%d/%m'),
+    ("text_task_d", 'text_task', '%d-%m-%Y'),
+    ("design_task_start", 'design_task_start', '%d-%m-%Y'),
+    ("design_task", 'design_task', '%Y-%m-%d'),
+    ("design_task_d", 'design_task', '%d-%m-%Y'),
+    ("setting_task", 'setting_task', '%Y-%m-%d'),
+    ("setting_task_d", 'setting_task', '%d/%m'),
+    ("email_task", 'email_task', '%Y-%m-%d'),
+    ("content_task", 'content_task', '%d-%m-%Y'),
+    ("news_placement", 'news_placement', '%d-%m-%Y'),
+    ("news_deadline", 'news_deadline', '%d-%m-%Y'),
+    ("banner_placement", 'banner_placement', '%d-%m-%Y'),
+    ("banner_deadline", 'banner_deadline', '%d-%m-%Y'),
+    ("page_placement", 'page_placement', '%Y-%m-%d'),
+    ("page_placement_d", 'page_placement', '%d-%m-%Y'),
+    ("page_placement_s", 'page_placement', '%d/%m'),
+    ("page_deadline", 'page_deadline', '%d-%m-%Y'),
+    ('page_deadline_title', 'page_deadline', '%d/%m'),
+    ("msngr_deadline", 'msngr_deadline', '%d-%m-%Y'),
+    ("push_deadline", 'push_deadline', '%d-%m-%Y'),
+    ("end_news_placement", 'end_news_placement', '%d-%m-%Y'),
+    ("end_news_deadline", 'end_news_deadline', '%d-%m-%Y'),
+    ('email_deadline', 'email_deadline', '%d-%m-%Y'),
+    ('smm_date', 'smm_date', '%d-%m-%Y'),
+    ('msngr_placement', 'msngr_placement', '%d-%m-%Y'),
+    ('push_placement', 'push_placement', '%d-%m-%Y'),
+    ("msngr_placement_deadline", 'msngr_placement_deadline', '%Y-%m-%d'),
+)
+
+
+def _to_datetime(value):
+    # Дата из запроса: datetime/date или строка ISO ("YYYY-MM-DD HH:MM", "YYYY-MM-DDTHH:MM:SS")
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return datetime.fromisoformat(str(value).strip())
+
+
+def _deadline_dates(start_date, end_date, country=None):
+    # Все даты задач и размещений для одной промо-акции (рабочие дни — по календарю country)
+    start_date = _to_datetime(start_date)
+    end_date = _to_datetime(end_date)
+    mes,push = mes_and_push(start_date,country)
+    mes_pl,push_pl = mes_and_push_placement(start_date)
+    local_task = add_workdays(start_date,-2,country)
+    design_task_start = add_workdays(start_date,-3,country)
+    news_placement = check_day(start_date,-1,country)
+    banner_placement = check_day(start_date,-1,country)
+    page_placement = add_workdays(start_date,-1,country)
+    if end_date.hour > 14:
+        end_news_placement = add_workdays(end_date,1,country)
+    else:
+        end_news_placement = check_day(end_date,1,country)
+    return {
+        'master_task': start_date,
+        'local_task': local_task,
+        'text_task': add_workdays(local_task,-1,country),
+        'design_task_start': design_task_start,
+        'design_task': add_workdays(design_task_start,-2,country),
+        'setting_task': design_task_start,
+        'email_task': add_workdays(start_date,-1,country),
+        'content_task': add_workdays(start_date,-1,country),
+        'news_placement': news_placement,
+        'news_deadline': add_workdays(news_placement,-2,country),
+        'banner_placement': banner_placement,
+        'banner_deadline': add_workdays(banner_placement,-1,country),
+        'page_placement': page_placement,
+        'page_deadline': add_workdays(page_placement,-1,country),
+        'msngr_deadline': mes,
+        'push_deadline': push,
+        'end_news_placement': end_news_placement,
+        'end_news_deadline': add_workdays(end_news_placement,-1,country),
+        'email_deadline': add_workdays(start_date,-2,country),
+        'smm_date': add_workdays(start_date,-1,country),
+        'msngr_placement': mes_pl,
+        'push_placement': push_pl,
+        'msngr_placement_deadline': add_workdays(start_date,-1,country),
+    }
 
-rus_holidays = custom_holiday()
 
 def deadline_calc(project,start_date,end_date):
-        start_date = pd.Timestamp(start_date)
-        end_date = pd.Timestamp(end_date)
-        mes,push = mes_and_push(start_date)
-        master_task = start_date
-        local_task = add_workdays(start_date,-2)
-        text_task = add_workdays(local_task,-1)
-        design_task_start = add_workdays(start_date,-3)
-        design_task = add_workdays(design_task_start,-2)
-        setting_task = design_task_start
-        email_task = add_workdays(start_date,-1)
-        content_task = add_workdays(start_date,-1)
-        news_placement = check_day(start_date,-1)
-        news_deadline = add_workdays(news_placement,-2)
-        email_deadline = add_workdays(start_date,-2)
-        banner_placement = check_day(start_date,-1)
-        banner_deadline = add_workdays(banner_placement,-1)
-        page_placement = add_workdays(start_date,-1)
-        page_deadline = add_workdays(page_placement,-1)
-        msngr_deadline = mes
-        push_deadline = push
-        if end_date.hour > 14:
-            print("Конец",end_date)
-            end_news_placement = add_workdays(end_date,1)
-            print('Дата',end_news_placement)
-            end_news_deadline = add_workdays(end_news_placement,-1)
-        else:
-            end_news_placement = check_day(end_date,1)
-            end_news_deadline  = add_workdays(end_news_placement,-1)   
+        dates = _deadline_dates(start_date, end_date, holiday_calendars.country_for_project(project))
+        day = lambda name: dates[name].strftime('%d-%m-%Y')
         text = f"""
                 Задача и сроки \n
-                Мастер-таск: {master_task.strftime('%d-%m-%Y')}\n
-                Задача на тексты: {text_task.strftime('%d-%m-%Y')}\n
-                Задача на локализацию: {local_task.strftime('%d-%m-%Y')}\n
-                Задача на дизайн(дата старта): {design_task_start.strftime('%d-%m-%Y')}\n
-                Задача на дизайн(срок исполнения): {design_task.strftime('%d-%m-%Y')}\n
-                Задача на настройку: {setting_task.strftime('%d-%m-%Y')}\n
-                Задача на отправку письма: {email_task.strftime('%d-%m-%Y')}\n
-                Задача на контент: {content_task.strftime('%d-%m-%Y')}\n
+                Мастер-таск: {day('master_task')}\n
+                Задача на тексты: {day('text_task')}\n
+                Задача на локализацию: {day('local_task')}\n
+                Задача на дизайн(дата старта): {day('design_task_start')}\n
+                Задача на дизайн(срок исполнения): {day('design_task')}\n
+                Задача на настройку: {day('setting_task')}\n
+                Задача на отправку письма: {day('email_task')}\n
+                Задача на контент: {day('content_task')}\n
                 Размещение и дедлайны \n
-                Новость(Размещение): {news_placement.strftime('%d-%m-%Y')}\n
-                Новость(Дедлайн): {news_deadline.strftime('%d-%m-%Y')}\n
-                Письмо(Дедлайн): {email_deadline.strftime('%d-%m-%Y')}\n
-                Баннер(Размещение): {banner_placement.strftime('%d-%m-%Y')}\n
-                Баннер(Дедлайн): {banner_deadline.strftime('%d-%m-%Y')}\n
-                Страница турнира(Размещение): {page_placement.strftime('%d-%m-%Y')}\n
-                Страница турнира(Дедлайн): {page_deadline.strftime('%d-%m-%Y')}\n
-                Мессенджер(Дедлайн): {msngr_deadline.strftime('%d-%m-%Y')}\n
-                Пуш(Дедлайн): {push_deadline.strftime('%d-%m-%Y')}\n
-                Новость на завершение(Размещение): {end_news_placement.strftime('%d-%m-%Y')}\n
-                Новость на завершение(Дедлайн): {end_news_deadline.strftime('%d-%m-%Y')}\n"""
+                Новость(Размещение): {day('news_placement')}\n
+                Новость(Дедлайн): {day('news_deadline')}\n
+                Письмо(Дедлайн): {day('email_deadline')}\n
+                Баннер(Размещение): {day('banner_placement')}\n
+                Баннер(Дедлайн): {day('banner_deadline')}\n
+                Страница турнира(Размещение): {day('page_placement')}\n
+                Страница турнира(Дедлайн): {day('page_deadline')}\n
+                Мессенджер(Дедлайн): {day('msngr_deadline')}\n
+                Пуш(Дедлайн): {day('push_deadline')}\n
+                Новость на завершение(Размещение): {day('end_news_placement')}\n
+                Новость на завершение(Дедлайн): {day('end_news_deadline')}\n"""
 
         return text 
-        
-        
+
+
 def deadline_calc_dict(project,start_date,end_date):
-        start_date = pd.Timestamp(start_date)
-        end_date = pd.Timestamp(end_date)
-        mes,push = mes_and_push(start_date)
-        mes_pl,push_pl = mes_and_push_placement(start_date)
-        master_task = start_date
-        local_task = add_workdays(start_date,-2)
-        text_task = add_workdays(local_task,-1)
-        msngr_placement_deadline = add_workdays(mes_pl,-1)
-        design_task_start = add_workdays(start_date,-3)
-        design_task = add_workdays(design_task_start,-2)
-        setting_task = design_task_start
-        msngr_placement = mes_pl
-        msngr_placement_deadline = add_workdays(start_date,-1)
-        push_placement = push_pl
-        email_task = add_workdays(start_date,-1)
-        content_task = add_workdays(start_date,-1)
-        smm_date = add_workdays(start_date,-1)
-        news_placement = check_day(start_date,-1)
-        news_deadline = add_workdays(news_placement,-2)
-        email_deadline = add_workdays(start_date,-2)
-        banner_placement = check_day(start_date,-1)
-        banner_deadline = add_workdays(banner_placement,-1)
-        page_placement = add_workdays(start_date,-1)
-        page_deadline = add_workdays(page_placement,-1)
-        page_deadline_title = page_deadline
-        msngr_deadline = mes
-        push_deadline = push
-        if end_date.hour > 14:
-            print("Конец",end_date)
-            end_news_placement = add_workdays(end_date,1)
-            print('Дата',end_news_placement)
-            end_news_deadline = add_workdays(end_news_placement,-1)
-        else:
-            end_news_placement = check_day(end_date,1)
-            end_news_deadline  = add_workdays(end_news_placement,-1)   
-        dict_result ={
-        "master_task" : master_task.strftime('%Y-%m-%d'),
-        "master_task_d" : master_task.strftime('%d/%m'),
-        "local_task" : local_task.strftime('%Y-%m-%d'),
-        "text_task" : text_task.strftime('%Y-%m-%d'),
-        "local_task_d" : local_task.strftime('%d/%m'),
-        "text_task_d" : text_task.strftime('%d-%m-%Y'),
-        "design_task_start" : design_task_start.strftime('%d-%m-%Y'),
-        "design_task" : design_task.strftime('%Y-%m-%d'),
-        "design_task_d" : design_task.strftime('%d-%m-%Y'),
-        "setting_task" : setting_task.strftime('%Y-%m-%d'),
-        "setting_task_d" : setting_task.strftime('%d/%m'),
-        "email_task" : email_task.strftime('%Y-%m-%d'),
-        "content_task" : content_task.strftime('%d-%m-%Y'),
-        "news_placement" : news_placement.strftime('%d-%m-%Y'),
-        "news_deadline" : news_deadline.strftime('%d-%m-%Y'),
-        "banner_placement" : banner_placement.strftime('%d-%m-%Y'),
-        "banner_deadline" : banner_deadline.strftime('%d-%m-%Y'),
-        "page_placement" : page_placement.strftime('%Y-%m-%d'),
-        "page_placement_d" : page_placement.strftime('%d-%m-%Y'),
-        "page_placement_s" : page_placement.strftime('%d/%m'),
-        "page_deadline" : page_deadline.strftime('%d-%m-%Y'),
-        'page_deadline_title':page_deadline_title.strftime('%d/%m'),
-        "msngr_deadline" : msngr_deadline.strftime('%d-%m-%Y'),
-        "push_deadline" : push_deadline.strftime('%d-%m-%Y'),
-        "end_news_placement" : end_news_placement.strftime('%d-%m-%Y'),
-        "end_news_deadline" : end_news_deadline.strftime('%d-%m-%Y'),
-        'email_deadline': email_deadline.strftime('%d-%m-%Y'),
-        'smm_date': smm_date.strftime('%d-%m-%Y'),
-        'msngr_placement': msngr_placement.strftime('%d-%m-%Y'),
-        'push_placement': push_placement.strftime('%d-%m-%Y'),
-        "msngr_placement_deadline" : msngr_placement_deadline.strftime('%Y-%m-%d')
+        start_date = _to_datetime(start_date)
+        end_date = _to_datetime(end_date)
+        return deadline_memo.get_or_compute(
+            (project, start_date, end_date, holiday_calendars.version),
+            lambda: _deadline_calc_dict(start_date, end_date, holiday_calendars.country_for_project(project))
+        )
+
+
+def _deadline_calc_dict(start_date,end_date,country=None):
+        dates = _deadline_dates(start_date, end_date, country)
+        return {key: dates[name].strftime(fmt) for key, name, fmt in _DEADLINE_FIELDS}
+
+
+def deadline_dates(project,start_date,end_date):
+    """Даты сроков промо-акции по видам: {вид срока (ключ без суффикса формата): date}"""
+    dates = _deadline_dates(start_date, end_date, holiday_calendars.country_for_project(project))
+    return {kind: value.date() for kind, value in dates.items()}
+
+
+def _format_dates(iso, fmt):
+    # Перестановка символов "YYYY-MM-DD" целыми столбцами вместо strftime на каждую дату
+    import numpy as np
+    layout = _DATE_FORMATS[fmt]
+    if layout is None:
+        return iso
+    chars = iso.view('U1').reshape(len(iso), 10)
+    columns = [
+        chars[:, part] if isinstance(part, int) else np.full(len(iso), part, dtype='U1')
+        for part in layout
+    ]
+    return np.ascontiguousarray(np.stack(columns, axis=1)).view(f'U{len(layout)}').ravel()
+
+
+# Ординал 1970-01-01 (нулевой день datetime64)
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _to_datetime64(values):
+    # Массив datetime64[m]; datetime/Timestamp переводим через ординал —
+    # приведение объектного массива в numpy на порядок медленнее
+    import numpy as np
+    array = np.asarray(values)
+    if array.dtype.kind == 'M':
+        return array.astype('datetime64[m]')
+    if array.dtype.kind in 'US':
+        return np.array(values, dtype='datetime64[m]')
+    minutes = np.fromiter(
+        ((value.toordinal() - _EPOCH_ORDINAL) * 1440 + getattr(value, 'hour', 0) * 60 + getattr(value, 'minute', 0)
+         for value in array),
+        dtype=np.int64, count=len(array)
+    )
+    return minutes.view('datetime64[m]')
+
+
+def deadline_calc_batch(projects, start_dates, end_dates):
+    """
+    Сроки задач для пачки промо-акций за один проход.
+
+    Принимает массивы проектов и дат начала/окончания (datetime
+    или строки "YYYY-MM-DD HH:MM") и возвращает колоночный результат: для
+    каждого ключа deadline_calc_dict — список строк в порядке входных промо.
+    Сдвиги на рабочие дни считаются np.busday_offset по тем же календарям
+    праздников, что и add_workdays/check_day: промо группируются по стране
+    проекта, и каждая группа считается одним проходом.
+    """
+    import numpy as np
+    start = _to_datetime64(start_dates)
+    end = _to_datetime64(end_dates)
+    if len(start) != len(end) or len(start) != len(projects):
+        raise ValueError("projects, start_dates и end_dates должны быть одной длины")
+    if not len(start):
+        return {key: [] for key, _, _ in _DEADLINE_FIELDS}
+
+    start_day = start.astype('datetime64[D]')
+    end_day = end.astype('datetime64[D]')
+    end_hour = (end - end_day).view(np.int64) // 60
+
+    years = np.concatenate([start_day, end_day]).astype('datetime64[Y]').view(np.int64) + 1970
+    first_year, last_year = int(years.min()) - 1, int(years.max()) + 1
+
+    country_by_project = {project: holiday_calendars.country_for_project(project) for project in set(projects)}
+    countries = np.array([country_by_project[project] for project in projects])
+    if len(set(country_by_project.values())) == 1:
+        busdaycal = holiday_calendars.business_days(countries[0]).busdaycalendar(first_year, last_year)
+        dates = _deadline_batch_dates(start_day, end_day, end_hour, busdaycal)
+    else:
+        dates = {}
+        for country in np.unique(countries):
+            mask = countries == country
+            busdaycal = holiday_calendars.business_days(country).busdaycalendar(first_year, last_year)
+            group = _deadline_batch_dates(start_day[mask], end_day[mask], end_hour[mask], busdaycal)
+            for name, values in group.items():
+                dates.setdefault(name, np.empty(len(start_day), dtype='datetime64[D]'))[mask] = values
+
+    # Все даты результата лежат в узком диапазоне: строки форматируются один раз
+    # на каждый день диапазона, а столбцы результата выбираются из таблицы по индексу
+    first = min(values.min() for values in dates.values())
+    last = max(values.max() for values in dates.values())
+    iso_table = np.datetime_as_string(np.arange(first, last + np.timedelta64(1, 'D')), unit='D').astype('U10')
+    tables = {fmt: _format_dates(iso_table, fmt) for fmt in _DATE_FORMATS}
+    positions = {name: (values - first).view(np.int64) for name, values in dates.items()}
+    return {key: tables[fmt][positions[name]].tolist() for key, name, fmt in _DEADLINE_FIELDS}
+
+
+def _deadline_batch_dates(start_day, end_day, end_hour, busdaycal):
+    # Даты задач для массивов дней старта/окончания по одному календарю рабочих дней
+    import numpy as np
+
+    def add_workdays_v(days_arr, days):
+        # days > 0: days-й рабочий день строго после даты, days < 0 — строго до
+        roll = 'backward' if days > 0 else 'forward'
+        return np.busday_offset(days_arr, days, roll=roll, busdaycal=busdaycal)
+
+    def check_day_v(days_arr, days):
+        # Ближайший рабочий день не раньше (days > 0) / не позже (days < 0) даты
+        roll = 'forward' if days > 0 else 'backward'
+        return np.busday_offset(days_arr, 0, roll=roll, busdaycal=busdaycal)
+
+    def weekday(days_arr):
+        # 1970-01-01 — четверг
+        return (days_arr.view(np.int64) + 3) % 7
+
+    # mes_and_push: если оба дня после старта — выходные, переносим на четверг
+    mess = start_day + np.timedelta64(1, 'D')
+    push = start_day + np.timedelta64(2, 'D')
+    both_weekend = (weekday(mess) >= 5) & (weekday(push) >= 5)
+    msngr_deadline = np.where(
+        both_weekend, mess - ((weekday(mess) - 3) % 7).view('timedelta64[D]'), add_workdays_v(mess, -1)
+    )
+    push_deadline = np.where(
+        both_weekend, push - ((weekday(push) - 3) % 7).view('timedelta64[D]'), add_workdays_v(push, -1)
+    )
+
+    # Одинаковые сдвиги от даты старта считаются один раз
+    workday_before = add_workdays_v(start_day, -1)
+    two_workdays_before = add_workdays_v(start_day, -2)
+    design_task_start = add_workdays_v(start_day, -3)
+    news_placement = check_day_v(start_day, -1)
+    page_deadline = add_workdays_v(workday_before, -1)
+    end_news_placement = np.where(end_hour > 14, add_workdays_v(end_day, 1), check_day_v(end_day, 1))
+
+    return {
+        'master_task': start_day,
+        'local_task': two_workdays_before,
+        'text_task': add_workdays_v(two_workdays_before, -1),
+        'design_task_start': design_task_start,
+        'design_task': add_workdays_v(design_task_start, -2),
+        'setting_task': design_task_start,
+        'email_task': workday_before,
+        'content_task': workday_before,
+        'news_placement': news_placement,
+        'news_deadline': add_workdays_v(news_placement, -2),
+        'banner_placement': news_placement,
+        'banner_deadline': add_workdays_v(news_placement, -1),
+        'page_placement': workday_before,
+        'page_deadline': page_deadline,
+        'msngr_deadline': msngr_deadline,
+        'push_deadline': push_deadline,
+        'end_news_placement': end_news_placement,
+        'end_news_deadline': add_workdays_v(end_news_placement, -1),
+        'email_deadline': two_workdays_before,
+        'smm_date': workday_before,
+        'msngr_placement': mess,
+        'push_placement': push,
+        'msngr_placement_deadline': workday_before,
     }
-        return dict_result
-def check_day(start_date,days):
-    
+
+
+def check_day(start_date,days,country=None):
+    result = holiday_calendars.business_days(country).check_day(start_date, days)
+    return result if result is not None else _check_day_iter(start_date, days, country)
+
+def _check_day_iter(start_date,days,country=None):
+    calendar = holiday_calendars.calendar(country)
     step = 1 if days >= 0 else -1
     remaining_days = abs(days)
     while remaining_days > 0:
-        if start_date.weekday() < 5 and start_date not in rus_holidays:
+        if start_date.weekday() < 5 and start_date not in calendar:
             remaining_days -= 1
         else:
-            start_date += pd.Timedelta(days=step)
+            start_date += timedelta(days=step)
     return start_date
         
-def add_workdays(start_date, days):
+def add_workdays(start_date, days, country=None):
+    result = holiday_calendars.business_days(country).add_workdays(start_date, days)
+    return result if result is not None else _add_workdays_iter(start_date, days, country)
+
+def _add_workdays_iter(start_date, days, country=None):
+    calendar = holiday_calendars.calendar(country)
     current_date = start_date
     step = 1 if days >= 0 else -1
     remaining_days = abs(days)
     
     while remaining_days > 0:
-        current_date += pd.Timedelta(days=step)
-        if current_date.weekday() < 5 and current_date not in rus_holidays:
+        current_date += timedelta(days=step)
+        if current_date.weekday() < 5 and current_date not in calendar:
             remaining_days -= 1
         
     return current_date
 
 
-def mes_and_push(start_date):
-    mess_date = start_date + pd.Timedelta(days=1)
-    push_date = start_date + pd.Timedelta(days=2)
-    print(mess_date.weekday(),push_date.weekday())
+def mes_and_push(start_date,country=None):
+    mess_date = start_date + timedelta(days=1)
+    push_date = start_date + timedelta(days=2)
     if mess_date.weekday() in [5,6,7] and push_date.weekday() in [5,6,7]:
         while mess_date.weekday() != 3:
-            mess_date = mess_date + pd.Timedelta(days= -1)
+            mess_date = mess_date + timedelta(days= -1)
         while push_date.weekday() != 3:
-            push_date = push_date + pd.Timedelta(days= -1)  
+            push_date = push_date + timedelta(days= -1)  
         return mess_date,push_date
     else:
-        mess_date = add_workdays(mess_date,-1)
-        push_date = add_workdays(push_date,-1)
+        mess_date = add_workdays(mess_date,-1,country)
+        push_date = add_workdays(push_date,-1,country)
         return mess_date,push_date
 
 
 def mes_and_push_placement(start_date):
-    mess_date = start_date + pd.Timedelta(days=1)
-    push_date = start_date + pd.Timedelta(days=2)
+    mess_date = start_date + timedelta(days=1)
+    push_date = start_date + timedelta(days=2)
     return mess_date,push_date
 
 
 def test():
-    start_date = pd.Timestamp('03-12-2024')
+    start_date = datetime(2024, 3, 12)
     print(start_date)
 
 
@@ -1,8 +1,10 @@
 import smtplib
 import os
+import time
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,6 +19,17 @@ class EmailService:
         self.smtp_username = os.getenv('SMTP_USERNAME')
         self.smtp_password = os.getenv('SMTP_PASSWORD')
         self.from_email = os.getenv('FROM_EMAIL', self.smtp_username)
+        self.use_starttls = os.getenv('SMTP_STARTTLS', 'true').lower() in ('1', 'true', 'yes')
+        self.timeout = float(os.getenv('SMTP_TIMEOUT', '30'))
+        
+        # Пул авторизованных SMTP-соединений: connect + STARTTLS + AUTH выполняются
+        # один раз на соединение, а не на каждое письмо
+        self.pool_size = int(os.getenv('SMTP_POOL_SIZE', '2'))
+        self.noop_after_seconds = float(os.getenv('SMTP_NOOP_AFTER_SECONDS', '30'))  # NOOP перед выдачей после простоя
+        self.max_idle_seconds = float(os.getenv('SMTP_MAX_IDLE_SECONDS', '240'))  # дольше сервер всё равно закроет сессию
+        self._idle_connections = []  # [(smtplib.SMTP, время последнего использования)]
+        self._pool_lock = threading.Lock()
+        self.stats = {'connects': 0, 'reuses': 0, 'noops': 0, 'reconnects': 0}
         
         # Проверяем наличие обязательных настроек
         if not self.smtp_username or not self.smtp_password:
@@ -26,6 +39,105 @@ class EmailService:
             self.enabled = True
             logger.info(f"✅ Email сервис инициализирован: {self.smtp_server}:{self.smtp_port}")
     
+    def assignment_message(self, responsible_name: str, promo_name: str, project: str, promo_type: str,
+                           start_date: str, end_date: str, assigned_by: str = "Система") -> Tuple[str, str]:
+        """Тема и текст письма о назначении ответственного"""
+        # Формируем тему письма
+        subject = f"Назначение ответственным за промо-акцию: {promo_name}"
+        
+        # Формируем текст письма
+        body = f"""
+Здравствуйте, {responsible_name}!
+
+Вам назначена ответственность за промо-акцию в системе Promo Calendar.
+
+Детали промо-акции:
+• Название: {promo_name}
+• Проект: {project}
+• Тип: {promo_type}
+• Дата начала: {start_date}
+• Дата окончания: {end_date}
+
+
+Пожалуйста, ознакомьтесь с деталями промо-акции и при необходимости свяжитесь с назначившим.
+
+С уважением,
+Система Promo Calendar
+        """.strip()
+        return subject, body
+    
+    def update_message(self, responsible_name: str, promo_name: str, project: str, promo_type: str,
+                       start_date: str, end_date: str, updated_by: str = "Система") -> Tuple[str, str]:
+        """Тема и текст письма об обновлении промо-акции ответственного"""
+        # Формируем тему письма
+        subject = f"Обновление ответственности за промо-акцию: {promo_name}"
+        
+        # Формируем текст письма
+        body = f"""
+Здравствуйте, {responsible_name}!
+
+Обновлена информация о промо-акции, за которую вы отвечаете.
+
+Детали промо-акции:
+• Название: {promo_name}
+• Проект: {project}
+• Тип: {promo_type}
+• Дата начала: {start_date}
+• Дата окончания: {end_date}
+• Обновил: {updated_by}
+
+Пожалуйста, ознакомьтесь с обновленными деталями промо-акции.
+
+С уважением,
+Система Promo Calendar
+        """.strip()
+        return subject, body
+    
+    def digest_message(self, responsible_name: str, items: List[Dict[str, Any]]) -> Tuple[str, str]:
+        """
+        Тема и текст одного письма вместо нескольких уведомлений получателю
+        
+        Args:
+            responsible_name: Имя ответственного
+            items: Уведомления — словари с ключами notification_type, promo_name,
+                project, promo_type, start_date, end_date, changed_by
+        """
+        assignments = [item for item in items if item.get('notification_type') == 'assignment']
+        updates = [item for item in items if item.get('notification_type') != 'assignment']
+        
+        # Формируем тему письма
+        promo_names = list(dict.fromkeys(item.get('promo_name') for item in items))
+        if len(promo_names) == 1:
+            subject = f"Изменения по промо-акции: {promo_names[0]} ({len(items)})"
+        else:
+            subject = f"Изменения по промо-акциям, за которые вы отвечаете ({len(items)})"
+        
+        def describe(item: Dict[str, Any]) -> str:
+            return (
+                f"• {item.get('promo_name')} — {item.get('project')}, {item.get('promo_type')}, "
+                f"{item.get('start_date')} — {item.get('end_date')} ({item.get('changed_by', 'Система')})"
+            )
+        
+        # Формируем текст письма
+        sections = []
+        if assignments:
+            sections.append("Вам назначена ответственность за промо-акции:\n" + "\n".join(map(describe, assignments)))
+        if updates:
+            sections.append("Обновлена информация о промо-акциях:\n" + "\n".join(map(describe, updates)))
+        details = "\n\n".join(sections)
+        
+        body = f"""
+Здравствуйте, {responsible_name}!
+
+{details}
+
+Пожалуйста, ознакомьтесь с деталями промо-акций в системе Promo Calendar.
+
+С уважением,
+Система Promo Calendar
+        """.strip()
+        return subject, body
+    
     def send_responsible_assignment_notification(
         self, 
         to_email: str, 
@@ -62,28 +174,9 @@ class EmailService:
             return False
         
         try:
-            # Формируем тему письма
-            subject = f"Назначение ответственным за промо-акцию: {promo_name}"
-            
-            # Формируем текст письма
-            body = f"""
-Здравствуйте, {responsible_name}!
-
-Вам назначена ответственность за промо-акцию в системе Promo Calendar.
-
-Детали промо-акции:
-• Название: {promo_name}
-• Проект: {project}
-• Тип: {promo_type}
-• Дата начала: {start_date}
-• Дата окончания: {end_date}
-
-
-Пожалуйста, ознакомьтесь с деталями промо-акции и при необходимости свяжитесь с назначившим.
-
-С уважением,
-Система Promo Calendar
-            """.strip()
+            subject, body = self.assignment_message(
+                responsible_name, promo_name, project, promo_type, start_date, end_date, assigned_by
+            )
             
             # Отправляем письмо
             success = self._send_email(to_email, subject, body)
@@ -135,28 +228,9 @@ class EmailService:
             return False
         
         try:
-            # Формируем тему письма
-            subject = f"Обновление ответственности за промо-акцию: {promo_name}"
-            
-            # Формируем текст письма
-            body = f"""
-Здравствуйте, {responsible_name}!
-
-Обновлена информация о промо-акции, за которую вы отвечаете.
-
-Детали промо-акции:
-• Название: {promo_name}
-• Проект: {project}
-• Тип: {promo_type}
-• Дата начала: {start_date}
-• Дата окончания: {end_date}
-• Обновил: {updated_by}
-
-Пожалуйста, ознакомьтесь с обновленными деталями промо-акции.
-
-С уважением,
-Система Promo Calendar
-            """.strip()
+            subject, body = self.update_message(
+                responsible_name, promo_name, project, promo_type, start_date, end_date, updated_by
+            )
             
             # Отправляем письмо
             success = self._send_email(to_email, subject, body)
@@ -184,30 +258,144 @@ class EmailService:
         Returns:
             bool: True если письмо отправлено успешно
         """
+        return self.send_batch([(to_email, subject, body)])[0]
+    
+    def send_batch(self, messages: List[Tuple[str, str, str]]) -> List[bool]:
+        """
+        Отправить несколько писем в одной SMTP-сессии из пула
+        
+        Args:
+            messages: Список (email получателя, тема, текст)
+        
+        Returns:
+            List[bool]: Результат отправки для каждого письма (в том же порядке)
+        """
+        if not self.enabled:
+            logger.warning("Email сервис отключен - письма не отправлены")
+            return [False] * len(messages)
+        
+        results = []
+        server = None
         try:
-            # Создаем объект сообщения
-            msg = MIMEMultipart()
-            msg['From'] = self.from_email
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            
-            # Добавляем текст письма
-            msg.attach(MIMEText(body, 'plain', 'utf-8'))
-            
-            # Подключаемся к SMTP серверу
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()  # Включаем шифрование
-                server.login(self.smtp_username, self.smtp_password)
+            for to_email, subject, body in messages:
+                text = self._build_message(to_email, subject, body)
                 
-                # Отправляем письмо
-                text = msg.as_string()
-                server.sendmail(self.from_email, to_email, text)
+                # Вторая попытка — на новом соединении, если сервер закрыл сессию
+                for attempt in (1, 2):
+                    try:
+                        if server is None:
+                            server = self._acquire_connection()
+                        server.sendmail(self.from_email, to_email, text)
+                        results.append(True)
+                        break
+                    except smtplib.SMTPServerDisconnected as e:
+                        error = e
+                    except smtplib.SMTPException as e:
+                        # Письмо отклонено (получатель, размер и т.п.) — соединение остаётся рабочим.
+                        # Ловится до OSError: SMTPException — его подкласс
+                        logger.error(f"Ошибка отправки email на {to_email}: {e}")
+                        results.append(False)
+                        break
+                    except OSError as e:
+                        error = e
+                    
+                    # Сессия оборвана — соединение в пул не возвращается
+                    self._close_connection(server)
+                    server = None
+                    if attempt == 1:
+                        self._count('reconnects')
+                        continue
+                    logger.error(f"Ошибка отправки email на {to_email}: {error}")
+                    results.append(False)
+        finally:
+            if server is not None:
+                self._release_connection(server)
+        
+        return results
+    
+    def _build_message(self, to_email: str, subject: str, body: str) -> str:
+        """Собрать MIME-сообщение"""
+        # Создаем объект сообщения
+        msg = MIMEMultipart()
+        msg['From'] = self.from_email
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        
+        # Добавляем текст письма
+        msg.attach(MIMEText(body, 'plain', 'utf-8'))
+        return msg.as_string()
+    
+    def _connect(self) -> smtplib.SMTP:
+        """Открыть новое авторизованное SMTP-соединение"""
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.timeout)
+        try:
+            if self.use_starttls:
+                server.starttls()  # Включаем шифрование
+            server.login(self.smtp_username, self.smtp_password)
+        except Exception:
+            server.close()
+            raise
+        
+        self._count('connects')
+        return server
+    
+    def _count(self, name: str) -> None:
+        """Увеличить счётчик stats (send_batch вызывается из потоков executor'а)"""
+        with self._pool_lock:
+            self.stats[name] += 1
+    
+    def _acquire_connection(self) -> smtplib.SMTP:
+        """Взять соединение из пула (с NOOP-проверкой после простоя) или открыть новое"""
+        while True:
+            with self._pool_lock:
+                if not self._idle_connections:
+                    break
+                server, last_used = self._idle_connections.pop()
             
-            return True
+            idle = time.monotonic() - last_used
+            if idle > self.max_idle_seconds:
+                self._close_connection(server)
+                continue
             
-        except Exception as e:
-            logger.error(f"Ошибка отправки email на {to_email}: {e}")
-            return False
+            if idle > self.noop_after_seconds:
+                self._count('noops')
+                try:
+                    if server.noop()[0] != 250:
+                        raise smtplib.SMTPServerDisconnected("NOOP не прошёл")
+                except (smtplib.SMTPException, OSError):
+                    self._count('reconnects')
+                    self._close_connection(server)
+                    continue
+            
+            self._count('reuses')
+            return server
+        
+        return self._connect()
+    
+    def _release_connection(self, server: smtplib.SMTP) -> None:
+        """Вернуть соединение в пул (лишние закрываются)"""
+        with self._pool_lock:
+            if len(self._idle_connections) < self.pool_size:
+                self._idle_connections.append((server, time.monotonic()))
+                return
+        self._close_connection(server)
+    
+    def _close_connection(self, server: Optional[smtplib.SMTP]) -> None:
+        """Корректно закрыть соединение (QUIT), не выбрасывая ошибок"""
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+    
+    def close(self) -> None:
+        """Закрыть все соединения пула"""
+        with self._pool_lock:
+            connections = [server for server, _ in self._idle_connections]
+            self._idle_connections.clear()
+        for server in connections:
+            self._close_connection(server)
 
 # Глобальный экземпляр сервиса
 email_service = EmailService() 
\ No newline at end of file
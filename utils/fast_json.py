@@ -0,0 +1,26 @@
+from typing import Any, Dict
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def dumps(content: Any) -> bytes:
+    """Сериализовать ответ в JSON (UTF-8 bytes) через orjson"""
+    return orjson.dumps(content)
+
+
+def join_months(bodies: Dict[str, bytes]) -> bytes:
+    """Склеить уже сериализованные ответы за месяцы в {"months": {"YYYY-MM": ...}} без повторной сериализации"""
+    return b'{"months":{' + b','.join(dumps(month) + b':' + body for month, body in bodies.items()) + b'}}'
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse с сериализацией через orjson.
+
+    Используется для больших списков (события календаря, пользователи), которые
+    отдаются готовыми словарями в формате ответа, минуя jsonable_encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,271 @@
+import os
+import json
+import threading
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Коды языков из utils.data_info.lang_dict, не совпадающие с ISO-кодом страны
+LANG_COUNTRY = {
+    'EN': 'GB',
+    'JA': 'JP',
+    'DA': 'DK',
+}
+
+DEFAULT_COUNTRY = 'RU'
+
+# Файл с переопределениями праздников и привязкой проектов к странам
+HOLIDAY_CALENDARS_FILE = os.getenv(
+    'HOLIDAY_CALENDARS_FILE',
+    os.path.join(os.path.dirname(__file__), 'holiday_calendars.json')
+)
+
+
+def country_for_lang(lang: str) -> str:
+    """ISO-код страны для кода языка/гео из lang_dict (EN -> GB, остальные совпадают)"""
+    lang = (lang or '').strip().upper()
+    return LANG_COUNTRY.get(lang, lang)
+
+
+def supported_countries() -> Set[str]:
+    """ISO-коды стран, для которых в holidays есть календарь (без загрузки самих календарей)"""
+    from holidays.registry import COUNTRIES
+    return {codes[1] for codes in COUNTRIES.values()}
+
+
+class BusinessDayIndex:
+    """
+    Предрасчитанный календарь рабочих дней на [first_year, last_year].
+
+    Для каждого дня диапазона хранится число рабочих дней от начала диапазона
+    по этот день включительно, плюс ординалы самих рабочих дней — «N рабочих
+    дней до/после» и «ближайший рабочий день» становятся двумя обращениями
+    к спискам вместо цикла по дням с проверкой в holidays. Строится лениво
+    при первом обращении (calendar_factory возвращает календарь праздников);
+    даты вне диапазона считаются прежним циклом.
+    """
+
+    def __init__(self, calendar_factory, first_year=2020, last_year=2035):
+        self.calendar_factory = calendar_factory
+        self.first_year = first_year
+        self.last_year = last_year
+        self._lock = threading.Lock()
+        self._built = False
+        self._busdaycalendars = {}
+
+    def _build(self):
+        with self._lock:
+            if self._built:
+                return
+            first = date(self.first_year, 1, 1).toordinal()
+            last = date(self.last_year, 12, 31).toordinal()
+            calendar = self.calendar_factory()
+            is_workday = []
+            workdays = []
+            count_through = []  # рабочих дней в [first, день] включительно
+            for ordinal in range(first, last + 1):
+                day = date.fromordinal(ordinal)
+                workday = day.weekday() < 5 and day not in calendar
+                is_workday.append(workday)
+                if workday:
+                    workdays.append(ordinal)
+                count_through.append(len(workdays))
+            self._first, self._last = first, last
+            self._is_workday, self._workdays, self._count_through = is_workday, workdays, count_through
+            self._built = True
+
+    def _position(self, value):
+        # Индекс дня в диапазоне или None, если дата вне его
+        if not self._built:
+            self._build()
+        ordinal = value.toordinal()
+        if self._first <= ordinal <= self._last:
+            return ordinal - self._first
+        return None
+
+    def _shift(self, value, workday_index):
+        # Сдвинуть дату (сохраняя время и тип) на рабочий день с индексом workday_index
+        if 0 <= workday_index < len(self._workdays):
+            return value + timedelta(days=self._workdays[workday_index] - value.toordinal())
+        return None
+
+    def add_workdays(self, start_date, days):
+        position = self._position(start_date)
+        if days == 0 or position is None:
+            return None if position is None else start_date
+        if days > 0:
+            # days-й рабочий день строго после start_date
+            return self._shift(start_date, self._count_through[position] + days - 1)
+        # |days|-й рабочий день строго до start_date
+        before = self._count_through[position] - self._is_workday[position]
+        return self._shift(start_date, before + days)
+
+    def check_day(self, start_date, days):
+        position = self._position(start_date)
+        if days == 0 or position is None:
+            return None if position is None else start_date
+        if days > 0:
+            # Ближайший рабочий день не раньше start_date
+            return self._shift(start_date, self._count_through[position] - self._is_workday[position])
+        # Ближайший рабочий день не позже start_date
+        return self._shift(start_date, self._count_through[position] - 1)
+
+    def busdaycalendar(self, first_year=None, last_year=None):
+        """np.busdaycalendar с теми же выходными и праздниками (для пакетного расчёта)"""
+        years = (
+            min(first_year or self.first_year, self.first_year),
+            max(last_year or self.last_year, self.last_year)
+        )
+        busdaycal = self._busdaycalendars.get(years)
+        if busdaycal is None:
+            busdaycal = self._busdaycalendars[years] = self._busdaycalendar(*years)
+        return busdaycal
+
+    def _busdaycalendar(self, first_year, last_year):
+        import numpy as np
+        calendar = self.calendar_factory()
+        first = date(first_year, 1, 1).toordinal()
+        last = date(last_year, 12, 31).toordinal()
+        holiday_dates = [
+            date.fromordinal(ordinal) for ordinal in range(first, last + 1)
+            if date.fromordinal(ordinal) in calendar
+        ]
+        return np.busdaycalendar(weekmask='1111100', holidays=np.array(holiday_dates, dtype='datetime64[D]'))
+
+
+class HolidayCalendarRegistry:
+    """
+    Реестр календарей праздников по странам.
+
+    Календарь страны — holidays.country_holidays(код) с переопределениями из
+    HOLIDAY_CALENDARS_FILE ("add" — дополнительные выходные, "remove" —
+    рабочие дни вместо праздников). Календари и индексы рабочих дней
+    строятся при первом обращении к стране и кэшируются; reload() перечитывает
+    файл, сбрасывает всё построенное и увеличивает version — её используют
+    кэши, зависящие от праздников.
+
+    Формат файла:
+        {
+            "default_country": "RU",
+            "projects": {"<проект>": "<код страны или языка>"},
+            "countries": {"RU": {"add": {"2025-03-01": "..."}, "remove": ["2025-05-09"]}}
+        }
+
+    Сроки — это задачи команды промо, которая работает по российскому
+    календарю, поэтому в поставляемом файле "projects" пуст и все проекты
+    считаются по default_country; проект с отдельной ГЕО-командой
+    добавляется туда кодом страны или языка из lang_dict.
+
+    Файл проверяется целиком при загрузке: неизвестный код страны или
+    некорректная дата — ValueError, а при reload() остаётся прежняя
+    конфигурация (иначе ошибка всплыла бы только при расчёте сроков,
+    внутри транзакции записи промо-акции).
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.version = 0
+        self._lock = threading.RLock()
+        self._listeners: List[Callable[[], None]] = []
+        self._calendars = {}
+        self._indexes: Dict[str, BusinessDayIndex] = {}
+        self._load_config()
+
+    def _load_config(self) -> None:
+        config = {}
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    config = json.load(f)
+            except Exception as e:
+                raise ValueError(f"Ошибка чтения календарей праздников {self.path}: {e}")
+        
+        default_country = country_for_lang(config.get('default_country', DEFAULT_COUNTRY))
+        projects = {
+            project: country_for_lang(country) for project, country in config.get('projects', {}).items()
+        }
+        overrides = {country_for_lang(code): value for code, value in config.get('countries', {}).items()}
+        
+        supported = supported_countries()
+        errors = [f"default_country: {default_country}"] if default_country not in supported else []
+        errors.extend(
+            f"projects.{project}: {country}" for project, country in projects.items() if country not in supported
+        )
+        for code, value in overrides.items():
+            if code not in supported:
+                errors.append(f"countries: {code}")
+            for day in list(value.get('add') or {}) + list(value.get('remove') or []):
+                try:
+                    date.fromisoformat(day)
+                except (TypeError, ValueError):
+                    errors.append(f"countries.{code}: дата {day!r}")
+        if errors:
+            raise ValueError(f"Некорректный файл календарей праздников {self.path}: {'; '.join(errors)}")
+        
+        self.default_country, self.projects, self.overrides = default_country, projects, overrides
+
+    def country_for_project(self, project: Optional[str]) -> str:
+        """Страна, по календарю которой считаются сроки проекта"""
+        if project in self.projects:
+            return self.projects[project]
+        return self.default_country
+
+    def calendar(self, country: Optional[str] = None):
+        """Календарь праздников страны (holidays.HolidayBase) с переопределениями"""
+        country = (country or self.default_country).upper()
+        calendar = self._calendars.get(country)
+        if calendar is None:
+            with self._lock:
+                calendar = self._calendars.get(country)
+                if calendar is None:
+                    calendar = self._calendars[country] = self._build_calendar(country)
+        return calendar
+
+    def business_days(self, country: Optional[str] = None) -> BusinessDayIndex:
+        """Индекс рабочих дней страны (строится при первом расчёте)"""
+        country = (country or self.default_country).upper()
+        index = self._indexes.get(country)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(country)
+                if index is None:
+                    index = self._indexes[country] = BusinessDayIndex(lambda: self.calendar(country))
+        return index
+
+    def on_change(self, listener: Callable[[], None]) -> None:
+        """Подписаться на изменение календарей (сброс зависимых кэшей)"""
+        self._listeners.append(listener)
+
+    def reload(self) -> None:
+        """Перечитать файл переопределений и сбросить построенные календари (ValueError — файл отклонён)"""
+        with self._lock:
+            try:
+                self._load_config()
+            except ValueError as e:
+                logger.error(f"❌ {e}; календари праздников не изменены")
+                raise
+            self._calendars = {}
+            self._indexes = {}
+            self.version += 1
+        for listener in self._listeners:
+            listener()
+        logger.info(f"📅 Календари праздников перечитаны (версия {self.version})")
+
+    def _build_calendar(self, country: str):
+        import holidays
+        calendar = holidays.country_holidays(country)
+        overrides = self.overrides.get(country, {})
+        if overrides.get('add'):
+            calendar.append(overrides['add'])
+        for day in overrides.get('remove', []):
+            day = date.fromisoformat(day)
+            if day in calendar:  # заодно заполняет праздники этого года
+                calendar.pop(day)
+        logger.info(f"📅 Загружен календарь праздников {country}")
+        return calendar
+
+
+# Глобальный реестр календарей
+holiday_calendars = HolidayCalendarRegistry(HOLIDAY_CALENDARS_FILE)
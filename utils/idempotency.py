@@ -0,0 +1,106 @@
+import os
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+import logging
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyKeyMismatch(Exception):
+    """Idempotency-Key уже использован с другим телом запроса"""
+
+
+def request_fingerprint(payload: Any) -> str:
+    """Отпечаток тела запроса (ключи отсортированы, чтобы порядок полей не влиял)"""
+    return hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    In-memory кэш ответов на неидемпотентные запросы по заголовку Idempotency-Key.
+
+    Первый запрос с ключом выполняет обработчик, ответ хранится ttl секунд.
+    Повтор с тем же ключом и тем же телом получает сохранённый ответ без
+    повторных вставок и уведомлений; если первый запрос ещё выполняется,
+    повтор дожидается его результата. Ошибки не кэшируются — после неё
+    запрос можно повторить с тем же ключом.
+
+    Срок хранения фиксирован и не продлевается при повторе, поэтому записи
+    лежат в порядке истечения (FIFO); при переполнении вытесняются самые старые.
+    Хранилище живёт в процессе, поэтому защищает от ретраев, попадающих в тот
+    же воркер uvicorn.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 86400):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # (scope, key) -> (expires_at, fingerprint, future)
+        self.hits = 0
+        self.misses = 0
+
+    def _evict_expired(self, now: float) -> None:
+        """Удалить записи с истёкшим сроком (записи лежат в порядке истечения)"""
+        expired = []
+        for entry_key, (expires_at, _, future) in self._entries.items():
+            if expires_at >= now:
+                break
+            # Запрос ещё выполняется — запись удалится на следующем проходе после его завершения
+            if future.done():
+                expired.append(entry_key)
+        for entry_key in expired:
+            del self._entries[entry_key]
+
+    async def run(self, scope: str, key: Optional[str], fingerprint: str,
+                  handler: Callable[[], Awaitable[Any]]) -> Any:
+        """Выполнить handler не более одного раза для (scope, key) и вернуть его ответ"""
+        if not key:
+            return await handler()
+
+        now = time.monotonic()
+        self._evict_expired(now)
+        entry_key = (scope, key)
+
+        entry = self._entries.get(entry_key)
+        if entry is not None and entry[0] >= now:
+            expires_at, stored_fingerprint, future = entry
+            if stored_fingerprint != fingerprint:
+                raise IdempotencyKeyMismatch(key)
+
+            self.hits += 1
+            logger.info(f"♻️ Повторный запрос {scope} с Idempotency-Key {key}: возвращаем сохранённый ответ")
+            return await asyncio.shield(future)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._entries[entry_key] = (now + self.ttl, fingerprint, future)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+        try:
+            result = await handler()
+        except BaseException as e:
+            # Ответ с ошибкой не сохраняем: повтор с тем же ключом выполнит запрос заново
+            if self._entries.get(entry_key, (None, None, None))[2] is future:
+                del self._entries[entry_key]
+            if isinstance(e, Exception):
+                future.set_exception(e)
+                # Исключение уже пробрасывается вызывающему; ожидающие повторы получат его же
+                future.exception()
+            else:
+                future.cancel()
+            raise
+
+        future.set_result(result)
+        return result
+
+
+# Глобальный экземпляр для POST /api/events и POST /api/channels
+idempotency_store = IdempotencyStore(
+    max_size=int(os.getenv('IDEMPOTENCY_CACHE_SIZE', '10000')),
+    ttl=float(os.getenv('IDEMPOTENCY_TTL', '86400'))
+)
@@ -0,0 +1,207 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, date, timedelta
+from typing import Any, Iterable, List, Optional, Set, Tuple
+import logging
+
+from database import BUSINESS_TZ_OFFSET
+
+logger = logging.getLogger(__name__)
+
+
+def parse_month_date(value) -> Optional[date]:
+    """Привести дату из запроса/БД (datetime, date или строка) к date"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+
+    try:
+        value = str(value).strip()
+        if 'T' in value:
+            # ISO формат (в т.ч. с "Z" на конце)
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).date()
+        if '.' in value.split()[0]:
+            # Формат DD.MM.YYYY
+            return datetime.strptime(value.split()[0], "%d.%m.%Y").date()
+        # Форматы YYYY-MM-DD и YYYY-MM-DD HH:MM:SS
+        return datetime.strptime(value.split()[0], "%Y-%m-%d").date()
+    except Exception:
+        logger.warning(f"Не удалось определить месяц для даты '{value}'")
+        return None
+
+
+def month_key(value) -> Optional[str]:
+    """Ключ месяца "YYYY-MM" для даты"""
+    parsed = parse_month_date(value)
+    return f"{parsed.year}-{parsed.month:02d}" if parsed else None
+
+
+def months_between(start, end=None) -> List[str]:
+    """Все месяцы "YYYY-MM", которые пересекает интервал [start, end]"""
+    start_date = parse_month_date(start)
+    end_date = parse_month_date(end) or start_date
+    if not start_date:
+        return []
+    if end_date < start_date:
+        start_date, end_date = end_date, start_date
+
+    months = []
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end_date.year, end_date.month):
+        months.append(f"{year}-{month:02d}")
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+    return months
+
+
+def informing_months(value, tz_offset: timedelta = BUSINESS_TZ_OFFSET) -> Set[str]:
+    """
+    Месяцы, в которых информирование попадает в календарь.
+
+    Календарь выбирает информирования по start_date_utc (дата из бизнес-таймзоны
+    минус tz_offset), поэтому у границы месяца оно может относиться к соседнему:
+    к предыдущему при положительном смещении и к следующему при отрицательном.
+    Если время не известно (только дата), берутся оба края дня.
+    """
+    parsed = parse_month_date(value)
+    if not parsed:
+        return set()
+
+    months = {month_key(parsed)}
+    moment = _parse_moment(value)
+    if moment:
+        months.add(month_key(moment - tz_offset))
+    else:
+        day_start = datetime.combine(parsed, datetime.min.time())
+        months.add(month_key(day_start - tz_offset))
+        months.add(month_key(day_start + timedelta(days=1) - timedelta(microseconds=1) - tz_offset))
+    return months
+
+
+def _parse_moment(value) -> Optional[datetime]:
+    """Дата со временем из datetime или ISO-строки; None, если известна только дата"""
+    if isinstance(value, datetime):
+        return value
+    text = str(value).strip()
+    if isinstance(value, date) or len(text) <= 10:
+        return None
+    try:
+        return datetime.fromisoformat(text.replace('Z', ''))
+    except ValueError:
+        return None
+
+
+def content_etag(payload: Any) -> str:
+    """Сильный ETag из хэша сериализованного ответа: одинаков во всех воркерах и между пересборками"""
+    if isinstance(payload, str):
+        payload = payload.encode()
+    return '"' + hashlib.blake2b(payload, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """Проверить заголовок If-None-Match (список тегов или "*") против ETag"""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+
+    # If-None-Match сравнивается по слабому правилу: префикс W/ игнорируется
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return any((tag[2:] if tag.startswith('W/') else tag) == etag for tag in candidates)
+
+
+class MonthCache:
+    """
+    In-process кэш собранных (уже сериализованных в JSON) ответов календаря
+    по ключу месяца "YYYY-MM".
+
+    Записи живут не дольше ttl секунд (это же ограничивает устаревание данных
+    между несколькими воркерами uvicorn), при переполнении вытесняется самый
+    давно использованный месяц. У каждого месяца есть версия: invalidate()
+    увеличивает её, а set() сохраняет ответ, только если версия не менялась
+    с момента начала чтения из БД — иначе конкурентная запись могла бы
+    «воскресить» устаревшие данные.
+
+    ETag записи — хэш самого ответа (content_etag), а не версии: пересборка
+    после TTL с теми же данными и любой другой воркер uvicorn дают тот же тег,
+    поэтому 304 можно отдавать прямо из кэша, не обращаясь к MySQL.
+    """
+
+    def __init__(self, max_size: int = 36, ttl: float = 300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # month -> (expires_at, etag, payload)
+        self._versions = {}
+        self._generation = 0  # увеличивается при clear()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, month: str) -> tuple:
+        """Текущая версия месяца (снимается перед чтением из БД)"""
+        with self._lock:
+            return self._generation, self._versions.get(month, 0)
+
+    def get(self, month: str) -> Optional[Tuple[str, Any]]:
+        """Получить (etag, ответ) из кэша или None"""
+        with self._lock:
+            entry = self._entries.get(month)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[month]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(month)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def set(self, month: str, payload: Any, version: tuple) -> str:
+        """Сохранить ответ, если месяц не инвалидировали во время чтения; вернуть его ETag"""
+        etag = content_etag(payload)
+        with self._lock:
+            if (self._generation, self._versions.get(month, 0)) != version:
+                # Ответ не кэшируется, но ETag у него корректный — он описывает именно это тело
+                return etag
+
+            self._entries[month] = (time.monotonic() + self.ttl, etag, payload)
+            self._entries.move_to_end(month)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return etag
+
+    def invalidate(self, months: Iterable[str]) -> None:
+        """Сбросить кэш для указанных месяцев"""
+        months = {m for m in months if m}
+        with self._lock:
+            for month in months:
+                self._entries.pop(month, None)
+                self._versions[month] = self._versions.get(month, 0) + 1
+        if months:
+            logger.info(f"🧹 Сброшен кэш календаря за месяцы: {sorted(months)}")
+
+    def clear(self) -> None:
+        """Сбросить кэш целиком"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+# Глобальный экземпляр кэша ответов GET /api/events
+events_cache = MonthCache(
+    max_size=int(os.getenv('EVENTS_CACHE_SIZE', '36')),
+    ttl=float(os.getenv('EVENTS_CACHE_TTL', '300'))
+)
+
+# Глобальный экземпляр кэша ответов GET /api/standalone-channels
+standalone_channels_cache = MonthCache(
+    max_size=int(os.getenv('EVENTS_CACHE_SIZE', '36')),
+    ttl=float(os.getenv('EVENTS_CACHE_TTL', '300'))
+)
@@ -0,0 +1,165 @@
+import os
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from database import get_outbox_repository
+from utils.email_service import email_service
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationOutboxWorker:
+    """
+    Фоновая отправка email-уведомлений из таблицы notification_outbox.
+
+    Обработчики запросов только кладут письмо в очередь (в транзакции изменения
+    промо-акции), а SMTP-соединения, STARTTLS и логин происходят здесь, вне
+    латентности API. Все уведомления одного получателя, накопившиеся за окно
+    объединения (NOTIFICATION_COALESCE_SECONDS), уходят одним письмом-дайджестом.
+    Неудачная отправка повторяется с экспоненциальной задержкой, после
+    max_attempts попыток уведомление помечается failed.
+    """
+
+    def __init__(self, poll_interval: float = 5, batch_size: int = 20, max_attempts: int = 8,
+                 base_backoff: int = 30, max_backoff: int = 3600, lease_seconds: int = 300):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.lease_seconds = lease_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Запустить воркер в текущем event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info("📬 Воркер очереди уведомлений запущен")
+
+    async def stop(self) -> None:
+        """Остановить воркер"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                processed = await self.process_batch()
+            except Exception as e:
+                logger.error(f"❌ Ошибка обработки очереди уведомлений: {e}")
+                processed = 0
+            if processed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    def backoff(self, attempts: int) -> int:
+        """Задержка перед следующей попыткой: base * 2^(n-1), не больше max_backoff"""
+        return min(self.base_backoff * 2 ** (attempts - 1), self.max_backoff)
+
+    async def process_batch(self) -> int:
+        """Отправить одну пачку готовых уведомлений; вернуть число обработанных"""
+        outbox_repo = get_outbox_repository()
+        notifications = await outbox_repo.claim_batch(self.batch_size, self.lease_seconds)
+
+        # claim_batch возвращает все ожидающие уведомления получателя — одно письмо на получателя
+        groups: Dict[Any, List[Dict[str, Any]]] = {}
+        for notification in notifications:
+            groups.setdefault(notification['recipient_id'], []).append(notification)
+
+        deliverable = []
+        for group in groups.values():
+            group_ids = [notification['id'] for notification in group]
+
+            if not email_service.enabled:
+                await self._mark_failed(outbox_repo, group_ids, "SMTP не настроен", status='skipped')
+            elif not group[0].get('mail'):
+                logger.warning(f"⚠️ У пользователя {group[0].get('login')} не указан email")
+                await self._mark_failed(outbox_repo, group_ids, "У получателя не указан email", status='skipped')
+            else:
+                try:
+                    deliverable.append((group, self._message(group)))
+                except Exception as e:
+                    await self._mark_failed(outbox_repo, group_ids, str(e))
+
+        if not deliverable:
+            return len(notifications)
+
+        # Вся пачка уходит в одной SMTP-сессии; smtplib блокирующий — отправляем в потоке
+        try:
+            results = await asyncio.to_thread(email_service.send_batch, [message for _, message in deliverable])
+            error = "SMTP сервер не принял письмо"
+        except Exception as e:
+            results, error = [False] * len(deliverable), str(e)
+
+        sent_ids = [notification['id'] for (group, _), success in zip(deliverable, results) if success
+                    for notification in group]
+        await outbox_repo.mark_sent(sent_ids)
+        if len(sent_ids) > len(deliverable):
+            logger.info(f"📬 {len(sent_ids)} уведомлений отправлено {len(deliverable)} письмами")
+
+        for (group, _), success in zip(deliverable, results):
+            if success:
+                continue
+            for notification in group:
+                notification_id = notification['id']
+                if notification['attempts'] >= self.max_attempts:
+                    logger.error(f"❌ Уведомление {notification_id} не отправлено за {notification['attempts']} попыток: {error}")
+                    await outbox_repo.mark_failed(notification_id, error)
+                else:
+                    delay = self.backoff(notification['attempts'])
+                    logger.warning(f"🔁 Уведомление {notification_id} будет отправлено повторно через {delay} с: {error}")
+                    await outbox_repo.mark_retry(notification_id, error, delay)
+
+        return len(notifications)
+
+    @staticmethod
+    async def _mark_failed(outbox_repo, notification_ids: List[int], error: str, status: str = 'failed') -> None:
+        for notification_id in notification_ids:
+            await outbox_repo.mark_failed(notification_id, error, status=status)
+
+    def _message(self, group: List[Dict[str, Any]]) -> Tuple[str, str, str]:
+        """Письмо (email получателя, тема, текст) для уведомлений одного получателя из очереди"""
+        recipient = group[0]
+        responsible_name = recipient.get('login') or 'Пользователь'
+
+        for notification in group:
+            if notification['notification_type'] not in ('assignment', 'update'):
+                raise ValueError(f"Неизвестный тип уведомления: {notification['notification_type']}")
+
+        if len(group) > 1:
+            subject, body = email_service.digest_message(responsible_name, [
+                {**notification['payload'], 'notification_type': notification['notification_type']}
+                for notification in group
+            ])
+            return recipient['mail'], subject, body
+
+        payload = recipient['payload']
+        params = (
+            responsible_name,
+            payload.get('promo_name'),
+            payload.get('project'),
+            payload.get('promo_type'),
+            payload.get('start_date'),
+            payload.get('end_date'),
+            payload.get('changed_by', 'Система')
+        )
+
+        if recipient['notification_type'] == 'assignment':
+            subject, body = email_service.assignment_message(*params)
+        else:
+            subject, body = email_service.update_message(*params)
+
+        return recipient['mail'], subject, body
+
+
+# Глобальный экземпляр воркера (запускается при старте приложения)
+notification_worker = NotificationOutboxWorker(
+    poll_interval=float(os.getenv('NOTIFICATION_POLL_INTERVAL', '5')),
+    batch_size=int(os.getenv('NOTIFICATION_BATCH_SIZE', '20')),
+    max_attempts=int(os.getenv('NOTIFICATION_MAX_ATTEMPTS', '8'))
+)